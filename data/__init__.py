@@ -1,11 +1,22 @@
 # data/__init__.py
 
-# Import necessary modules or classes from the data directory
-from .fetcher import DataFetcher
-from .cleaner import DataCleaner
-from .processor import DataProcessor
-from ..models.train import ModelTrainer
-from ..trading.strategy import TradingStrategy
-from ..trading.executer import TradeExecuter
-from ..trading.risk_management import RiskManager
-from ..utilities.config import Config
+# Classes are imported on first access so importing the package stays cheap
+import importlib
+
+_EXPORTS = {
+    'DataFetcher': '.fetcher',
+    'AsyncDataFetcher': '.async_fetcher',
+    'CandleStore': '.candle_store',
+    'DataCleaner': '.cleaner',
+    'DataProcessor': '.processor',
+    'StreamingIndicators': '.indicator_engine',
+    'IndicatorPanel': '.panel',
+    'compute_indicator_panel': '.panel',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
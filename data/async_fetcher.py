@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import os
+import time
+from email.utils import parsedate_to_datetime
+
+import aiohttp
+import pandas as pd
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        """
+        Token bucket shared by every request to one API.
+        rate is tokens per second, capacity the largest burst allowed.
+        """
+        if rate <= 0 or capacity <= 0:
+            logging.error("Rate and capacity must be positive values.")
+            raise ValueError("Rate and capacity must be positive values.")
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Wait until a token is available (and any server-requested pause is over), then take it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds):
+        """Stop handing out tokens for the given number of seconds, e.g. after a Retry-After."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+class AsyncDataFetcher:
+    def __init__(self, stock_calls_per_minute=60, news_calls_per_minute=60, burst=10,
+                 max_in_flight=32, max_retries=5, backoff_factor=1, timeout=10):
+        """
+        Asyncio counterpart of DataFetcher. Each API (stock and news) has its own token bucket
+        and in-flight budget shared by all symbols, so the quota is respected globally.
+        """
+        self.stock_api_url = 'https://finnhub.io/api/v1/stock/candle'
+        self.news_api_url = 'https://newsapi.org/v2/everything'
+        self.api_key_finnhub = os.getenv('FINNHUB_API_KEY')
+        self.api_key_newsapi = os.getenv('NEWSAPI_KEY')
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_in_flight = max_in_flight
+
+        self.limiters = {
+            'stock': TokenBucket(stock_calls_per_minute / 60, burst),
+            'news': TokenBucket(news_calls_per_minute / 60, burst),
+        }
+        self.in_flight = {api: asyncio.Semaphore(max_in_flight) for api in self.limiters}
+        self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def get_session(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=2 * self.max_in_flight, keepalive_timeout=60)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self.session
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    @staticmethod
+    def parse_retry_after(value):
+        """Return the Retry-After header as seconds to wait, or None if absent or malformed."""
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+    async def fetch_data_with_retry(self, api, url, params):
+        """Fetch data under the API's rate limit, honouring Retry-After and backing off on errors."""
+        limiter = self.limiters[api]
+        session = self.get_session()
+        params = {key: value for key, value in params.items() if value is not None}  # Dropped like requests does
+        for attempt in range(self.max_retries + 1):
+            await limiter.acquire()
+            try:
+                async with self.in_flight[api]:
+                    async with session.get(url, params=params) as response:
+                        if response.status in RETRY_STATUSES and attempt < self.max_retries:
+                            delay = self.parse_retry_after(response.headers.get('Retry-After'))
+                            if delay is None:
+                                delay = self.backoff_factor * (2 ** attempt)
+                            elif response.status == 429:
+                                # The quota is shared, so every request to this API waits
+                                limiter.pause(delay)
+                            logging.warning("HTTP %s from %s, retrying in %.2fs", response.status, api, delay)
+                        else:
+                            response.raise_for_status()
+                            return await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt >= self.max_retries:
+                    logging.error("Fetching data failed: %s", e)
+                    return None
+                delay = self.backoff_factor * (2 ** attempt)
+            await asyncio.sleep(delay)
+        return None
+
+    async def fetch_stock_data(self, symbol, resolution, from_time, to_time):
+        """Fetch historical stock data in a format suitable for LSTM processing."""
+        params = {
+            'symbol': symbol,
+            'resolution': resolution,
+            'from': from_time,
+            'to': to_time,
+            'token': self.api_key_finnhub
+        }
+        data = await self.fetch_data_with_retry('stock', self.stock_api_url, params)
+        if data and 'c' in data:  # Ensure data contains 'close' prices
+            return pd.DataFrame(data)
+        return None
+
+    async def fetch_news(self, query):
+        """Fetch news articles."""
+        params = {
+            'q': query,
+            'apiKey': self.api_key_newsapi
+        }
+        return await self.fetch_data_with_retry('news', self.news_api_url, params)
+
+    async def fetch_many(self, symbols, resolution, from_time, to_time):
+        """Fetch candles for every symbol concurrently, returning {symbol: DataFrame or None}."""
+        frames = await asyncio.gather(*(self.fetch_stock_data(symbol, resolution, from_time, to_time) for symbol in symbols))
+        return dict(zip(symbols, frames))
+
+    async def fetch_news_many(self, queries):
+        """Fetch news for every query concurrently, returning {query: articles or None}."""
+        articles = await asyncio.gather(*(self.fetch_news(query) for query in queries))
+        return dict(zip(queries, articles))
+
+# Example usage
+if __name__ == "__main__":
+    async def main():
+        async with AsyncDataFetcher() as fetcher:
+            stock_data = await fetcher.fetch_many(['AAPL', 'GOOGL', 'MSFT'], 'D', 1615299000, 1615385400)
+            news_data = await fetcher.fetch_news_many(['AAPL', 'stock market'])
+            print({symbol: None if df is None else len(df) for symbol, df in stock_data.items()})
+            print({query: None if data is None else len(data.get('articles', [])) for query, data in news_data.items()})
+
+    asyncio.run(main())
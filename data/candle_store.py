@@ -0,0 +1,86 @@
+import os
+import threading
+import logging
+import numpy as np
+import pandas as pd
+
+# On-disk record layout, one row per bar, sorted by timestamp
+CANDLE_DTYPE = np.dtype([('t', 'i8'), ('o', 'f8'), ('h', 'f8'), ('l', 'f8'), ('c', 'f8'), ('v', 'f8')])
+
+class CandleStore:
+    def __init__(self, root_dir):
+        """
+        Local candle cache keyed by (symbol, resolution). Each key is one .npy file of
+        CANDLE_DTYPE records which is memory-mapped on read, so warm starts don't hit the API.
+        """
+        self.root_dir = root_dir
+        os.makedirs(root_dir, exist_ok=True)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, symbol, resolution):
+        return os.path.join(self.root_dir, f"{symbol}_{resolution}.npy")
+
+    def _lock(self, symbol, resolution):
+        with self._locks_guard:
+            return self._locks.setdefault((symbol, resolution), threading.Lock())
+
+    def load(self, symbol, resolution):
+        """Return the cached records as a read-only memory map, or None if nothing is cached."""
+        path = self._path(symbol, resolution)
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode='r')
+
+    def time_range(self, symbol, resolution):
+        """Return (first_ts, last_ts) of the cached bars, or None if nothing is cached."""
+        records = self.load(symbol, resolution)
+        if records is None or len(records) == 0:
+            return None
+        return int(records['t'][0]), int(records['t'][-1])
+
+    def read(self, symbol, resolution, from_time, to_time):
+        """Return cached bars with from_time <= t <= to_time as a Finnhub-style DataFrame."""
+        records = self.load(symbol, resolution)
+        if records is None:
+            return None
+        start = np.searchsorted(records['t'], from_time, side='left')
+        end = np.searchsorted(records['t'], to_time, side='right')
+        window = records[start:end]
+        return pd.DataFrame({field: np.array(window[field]) for field in ('c', 'h', 'l', 'o', 't', 'v')})
+
+    def merge(self, symbol, resolution, data):
+        """
+        Merge new bars (Finnhub dict or DataFrame with c/h/l/o/t/v) into the cache.
+        Bars with an already cached timestamp are replaced by the new values.
+        """
+        new = np.empty(len(data['t']), dtype=CANDLE_DTYPE)
+        for field in CANDLE_DTYPE.names:
+            new[field] = np.asarray(data[field], dtype=CANDLE_DTYPE[field])
+
+        with self._lock(symbol, resolution):
+            cached = self.load(symbol, resolution)
+            combined = new if cached is None else np.concatenate([np.array(cached), new])
+            # Stable sort by time, then keep the last occurrence of each timestamp (the newest fetch)
+            combined = combined[np.argsort(combined['t'], kind='stable')]
+            keep = np.append(combined['t'][1:] != combined['t'][:-1], True)
+            combined = combined[keep]
+
+            path = self._path(symbol, resolution)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, combined)
+            os.replace(tmp_path, path)  # Atomic, so readers never see a half-written file
+        logging.info(f"Cached {len(new)} bars for {symbol} ({resolution}), {len(combined)} total.")
+        return len(combined)
+
+# Example usage
+if __name__ == "__main__":
+    import tempfile
+
+    store = CandleStore(tempfile.mkdtemp())
+    bars = {'t': [1, 2, 3], 'o': [10, 11, 12], 'h': [11, 12, 13], 'l': [9, 10, 11], 'c': [10.5, 11.5, 12.5], 'v': [100, 110, 120]}
+    store.merge('AAPL', 'D', bars)
+    store.merge('AAPL', 'D', {'t': [3, 4], 'o': [12, 13], 'h': [13, 14], 'l': [11, 12], 'c': [12.7, 13.5], 'v': [125, 130]})
+    print(store.time_range('AAPL', 'D'))
+    print(store.read('AAPL', 'D', 2, 4))
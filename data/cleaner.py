@@ -1,20 +1,74 @@
+import os
 import pandas as pd
 import numpy as np
 import re
-from scipy import stats
-from sklearn.feature_extraction.text import TfidfVectorizer
-from nltk.stem import WordNetLemmatizer
-from nltk.corpus import stopwords
-import nltk
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from numpy.lib.stride_tricks import sliding_window_view
 
-nltk.download('stopwords')
-nltk.download('wordnet')
+# NLTK, scikit-learn and scipy are imported on first use so importing this module does no I/O.
+# Corpora are resolved from this directory and only downloaded into it when missing.
+NLTK_DATA_DIR = os.getenv('NLTK_DATA', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'nltk_data'))
+NLTK_RESOURCES = [('stopwords', 'corpora/stopwords'), ('wordnet', 'corpora/wordnet')]
+
+# Finnhub candle keys and the column names used throughout the project
+STOCK_COLUMNS = [('c', 'Close'), ('h', 'High'), ('l', 'Low'), ('o', 'Open'), ('v', 'Volume')]
+TIMESTAMP_COLUMN = ('t', 'Timestamp')  # Bar open time in epoch seconds, carried through cleaning when present
+
+NEWS_FIELDS = ['title', 'description', 'content']
+NON_ALPHA = re.compile(r'[^a-zA-Z\s]+')
+
+# Per-process cleaner used by clean_news_batch workers
+_worker_cleaner = None
+
+def ensure_nltk_data(data_dir=NLTK_DATA_DIR):
+    """Make NLTK look in the local data directory, downloading the corpora there only if missing."""
+    import nltk
+    if data_dir not in nltk.data.path:
+        nltk.data.path.insert(0, data_dir)
+    for resource, path in NLTK_RESOURCES:
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            nltk.download(resource, download_dir=data_dir, quiet=True)
+
+def _clean_articles_chunk(articles):
+    global _worker_cleaner
+    if _worker_cleaner is None:
+        _worker_cleaner = DataCleaner()
+    return [_worker_cleaner.clean_article(article) for article in articles]
 
 class DataCleaner:
     def __init__(self):
-        self.lemmatizer = WordNetLemmatizer()
-        self.vectorizer = TfidfVectorizer(stop_words=stopwords.words('english'))
-        
+        self._stop_words = None
+        self._lemmatize = None
+        self._vectorizer = None
+        self._outlier_state = {}  # symbol -> (timestamp of the last settled bar, timestamps of rejected bars)
+
+    @property
+    def stop_words(self):
+        if self._stop_words is None:
+            ensure_nltk_data()
+            from nltk.corpus import stopwords
+            self._stop_words = frozenset(stopwords.words('english'))
+        return self._stop_words
+
+    @property
+    def lemmatize(self):
+        if self._lemmatize is None:
+            ensure_nltk_data()
+            from nltk.stem import WordNetLemmatizer
+            # News vocabulary is small and repetitive, so most lemmas come from the cache
+            self._lemmatize = lru_cache(maxsize=100000)(WordNetLemmatizer().lemmatize)
+        return self._lemmatize
+
+    @property
+    def vectorizer(self):
+        if self._vectorizer is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            self._vectorizer = TfidfVectorizer(stop_words=list(self.stop_words))
+        return self._vectorizer
+
     def clean_stock_data(self, data):
         """Convert JSON from Finnhub to pandas DataFrame, clean, and handle outliers."""
         df = pd.DataFrame(data)
@@ -29,33 +83,134 @@ class DataCleaner:
         df = df.apply(pd.to_numeric, errors='coerce')
 
         # Remove outliers using z-score
+        from scipy import stats
         df = df[(np.abs(stats.zscore(df.select_dtypes(include=[np.number]))) < 3).all(axis=1)]
 
         return df
 
+    def clean_stock_arrays(self, data, outlier_window=None, z_threshold=3.0, symbol=None):
+        """
+        Fast path for clean_stock_data working directly on the raw Finnhub c/h/l/o/v arrays.
+        Coercion, gap filling and outlier rejection run over one contiguous float64 buffer.
+        A 't' (or 'Timestamp') array is kept as an int64 Timestamp column, so later stages can tell bars apart.
+        With outlier_window set, outliers are judged by a local median/MAD window instead of whole-history z-scores.
+        The windowed scores are taken on bar-to-bar log changes, so a trend does not read as an outlier, and the
+        bar that merely reverts a rejected spike is kept.
+        With a symbol (and timestamps), the verdicts on completed bars are remembered, so a later call only scores
+        the bars it has not settled yet (plus the still-forming last bar) against trailing windows: the cost of a
+        call then depends on the new bars and the window, not on the length of the history.
+        """
+        n = len(data['c'] if 'c' in data else data['Close'])
+        buffer = np.empty((n, len(STOCK_COLUMNS)), dtype=np.float64)
+        for i, (key, column) in enumerate(STOCK_COLUMNS):
+            raw = data[key] if key in data else data[column]
+            try:
+                buffer[:, i] = np.asarray(raw, dtype=np.float64)
+            except (TypeError, ValueError):
+                buffer[:, i] = pd.to_numeric(pd.Series(raw), errors='coerce').to_numpy(dtype=np.float64)
+
+        # Linear interpolation inside gaps, nearest valid value at the edges (interpolate + ffill + bfill)
+        positions = np.arange(n)
+        for i in range(buffer.shape[1]):
+            column = buffer[:, i]
+            missing = np.isnan(column)
+            if missing.any() and not missing.all():
+                column[missing] = np.interp(positions[missing], positions[~missing], column[~missing])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if outlier_window is None:
+                scores = (buffer - buffer.mean(axis=0)) / buffer.std(axis=0)
+                keep = (np.abs(scores) < z_threshold).all(axis=1)
+            else:
+                key, column = TIMESTAMP_COLUMN
+                timestamps = None
+                if key in data or column in data:
+                    timestamps = np.asarray(data[key] if key in data else data[column], dtype=np.int64)
+                state = self._outlier_state.get(symbol) if symbol is not None and timestamps is not None else None
+                # Bars up to the last settled one keep their verdict; the bar before the first new one is
+                # rescored too, so a new bar that reverts a spike is still recognised
+                settled = 0 if state is None else int(np.searchsorted(timestamps, state[0], side='right'))
+                start = max(settled - 1, 0)
+
+                tail = buffer[max(start - outlier_window, 0):]
+                changes = np.diff(np.log1p(tail), axis=0, prepend=np.log1p(tail[:1]))
+                scores = np.zeros((n, buffer.shape[1]))
+                scores[n - len(tail):] = self._rolling_robust_scores(changes, outlier_window,
+                                                                     start - (n - len(tail)), trailing=start > 0)
+                scores[0] = 0.0  # The first bar has no previous bar to be judged against
+                outlier = ~(np.abs(scores) < z_threshold)
+                # A spike is followed by a jump back of the opposite sign; only the spike itself is rejected
+                reverts = outlier[1:] & outlier[:-1] & (np.sign(scores[1:]) == -np.sign(scores[:-1]))
+                outlier[1:] &= ~reverts
+                keep = ~outlier.any(axis=1)
+                if state is not None:
+                    keep[:settled] = ~np.isin(timestamps[:settled], state[1])
+                if symbol is not None and timestamps is not None and n > 1:
+                    # The last bar may still be forming, so it is judged again on the next call
+                    self._outlier_state[symbol] = (timestamps[-2], timestamps[:-1][~keep[:-1]])
+
+        cleaned = pd.DataFrame(buffer[keep], columns=[column for _, column in STOCK_COLUMNS])
+        key, column = TIMESTAMP_COLUMN
+        if key in data or column in data:
+            cleaned[column] = np.asarray(data[key] if key in data else data[column], dtype=np.int64)[keep]
+        return cleaned
+
+    @staticmethod
+    def _rolling_robust_scores(buffer, window, start=0, trailing=False):
+        """
+        Robust z-scores (0.6745 * deviation / MAD) against a centred median/MAD window per column (Hampel filter),
+        for rows start onwards (earlier rows score 0). The newest bars, which have no full centred window yet, and
+        every row when trailing is set, use the trailing window ending at them. Only the windows of scored rows
+        are gathered, so the cost follows the number of scored rows rather than the length of buffer.
+        """
+        n = buffer.shape[0]
+        window = min(window, n)
+        windows = sliding_window_view(buffer, window, axis=0)  # (n - window + 1, columns, window), no copy
+        positions = np.arange(start, n)
+        if trailing:
+            rows = np.maximum(positions - window + 1, 0)
+        else:
+            centred = positions - window // 2
+            # Bars at the start are judged against the first full window, bars at the end causally
+            rows = np.where(centred > n - window, positions - window + 1, np.maximum(centred, 0))
+        needed, rows = np.unique(rows, return_inverse=True)
+        scored = windows[needed]  # Copies only the windows that are used
+        median = np.median(scored, axis=-1)
+        mad = np.median(np.abs(scored - median[..., None]), axis=-1)
+        median, mad = median[rows], mad[rows]
+        scores = np.zeros(buffer.shape)
+        scores[start:] = 0.6745 * (buffer[start:] - median) / mad
+        scores[start:][mad == 0] = 0.0  # A flat window gives no basis for rejecting anything
+        return scores
+
     def clean_news_data(self, news_data):
         """Extract relevant fields from news data and clean text."""
-        articles = []
-        for article in news_data['articles']:
-            clean_title = self.clean_text(article['title'])
-            clean_description = self.clean_text(article['description'])
-            clean_content = self.clean_text(article['content'])
-            articles.append({
-                'title': clean_title,
-                'description': clean_description,
-                'content': clean_content
-            })
-        return pd.DataFrame(articles)
+        return self.clean_news_batch(news_data['articles'])
+
+    def clean_news_batch(self, articles, workers=None, chunk_size=500):
+        """
+        Clean the title, description and content of many articles.
+        With workers > 1, chunks of articles are cleaned in a process pool.
+        """
+        articles = list(articles)
+        if workers and workers > 1 and len(articles) > chunk_size:
+            chunks = [articles[i:i + chunk_size] for i in range(0, len(articles), chunk_size)]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                cleaned = [row for rows in pool.map(_clean_articles_chunk, chunks) for row in rows]
+        else:
+            cleaned = [self.clean_article(article) for article in articles]
+        return pd.DataFrame(cleaned, columns=NEWS_FIELDS)
+
+    def clean_article(self, article):
+        return {field: self.clean_text(article.get(field)) for field in NEWS_FIELDS}
 
     def clean_text(self, text):
         """Remove unwanted characters and normalize text."""
         if not text:
             return ""
-        text = re.sub(r'\s+', ' ', text)  # Replace multiple spaces with a single space
-        text = re.sub(r'[^a-zA-Z\s]', '', text)  # Remove non-alphabetic characters
-        text = text.lower()  # Convert to lowercase
-        tokens = [self.lemmatizer.lemmatize(word) for word in text.split() if word not in stopwords.words('english')]
-        return ' '.join(tokens)
+        text = NON_ALPHA.sub('', text).lower()  # Keep letters and whitespace only; split() collapses the spaces
+        stop_words, lemmatize = self.stop_words, self.lemmatize
+        return ' '.join([lemmatize(word) for word in text.split() if word not in stop_words])
 
 # Example usage
 if __name__ == "__main__":
@@ -65,4 +220,17 @@ if __name__ == "__main__":
     cleaned_stock = cleaner.clean_stock_data(stock_data)
     cleaned_news = cleaner.clean_news_data(news_data)
     print(cleaned_stock)
+    print(cleaner.clean_stock_arrays(stock_data))
     print(cleaned_news)
+
+    # Throughput benchmark on a synthetic batch of articles
+    import time
+    article = {'title': 'Stocks rally as tech earnings beat expectations',
+               'description': 'Shares of major technology companies climbed on Tuesday after quarterly results...',
+               'content': 'Investors cheered stronger-than-expected earnings, sending the index to record highs. ' * 20}
+    batch = [dict(article) for _ in range(5000)]
+    for workers in (None, 4):
+        start = time.perf_counter()
+        cleaner.clean_news_batch(batch, workers=workers)
+        elapsed = time.perf_counter() - start
+        print(f"workers={workers}: {len(batch) / elapsed:.0f} articles/sec")
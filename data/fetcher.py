@@ -2,41 +2,95 @@ import requests
 import os
 import time
 import logging
+import threading
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
 
 class DataFetcher:
-    def __init__(self):
+    def __init__(self, pool_connections=10, pool_maxsize=32, max_retries=5, backoff_factor=1, timeout=10, candle_store=None):
         self.stock_api_url = 'https://finnhub.io/api/v1/stock/candle'
         self.news_api_url = 'https://newsapi.org/v2/everything'
         self.api_key_finnhub = os.getenv('FINNHUB_API_KEY')
         self.api_key_newsapi = os.getenv('NEWSAPI_KEY')
-    
-    def fetch_data_with_retry(self, url, params):
-        """Fetch data with retries and exponential backoff."""
-        retry_strategy = Retry(
-            total=5,
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.candle_store = candle_store  # Optional CandleStore for incremental fetches
+        self._empty_heads = {}  # (symbol, resolution) -> earliest from_time known to have no bars before the cache
+
+        # Built once and shared by every session
+        self.retry_strategy = Retry(
+            total=max_retries,
             status_forcelist=[429, 500, 502, 503, 504],
-            method_whitelist=["HEAD", "GET", "OPTIONS"],
-            backoff_factor=1
+            allowed_methods=["HEAD", "GET", "OPTIONS"],
+            backoff_factor=backoff_factor
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        session = requests.Session()
-        session.mount('http://', adapter)
-        session.mount('https://', adapter)
+        self.sessions = {}  # One long-lived keep-alive session per host
+        self._sessions_lock = threading.Lock()
 
+    def get_session(self, url):
+        """Return the persistent session for the host of url, creating it on first use."""
+        host = urlsplit(url).netloc
+        session = self.sessions.get(host)
+        if session is None:
+            with self._sessions_lock:
+                session = self.sessions.get(host)
+                if session is None:
+                    adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize,
+                                          max_retries=self.retry_strategy)
+                    session = requests.Session()
+                    session.headers.update({'Connection': 'keep-alive'})
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self.sessions[host] = session
+        return session
+
+    def fetch_data_with_retry(self, url, params):
+        """Fetch data with retries and exponential backoff."""
+        session = self.get_session(url)
         try:
-            response = session.get(url, params=params)
+            response = session.get(url, params=params, timeout=self.timeout)
             response.raise_for_status()  # Will raise an HTTPError for bad responses
             return response.json()
         except requests.exceptions.RequestException as e:
             logging.error("Fetching data failed: %s", e)
             return None
 
-    def fetch_stock_data(self, symbol, resolution, from_time, to_time):
-        """Fetch historical stock data in a format suitable for LSTM processing."""
+    def connection_stats(self):
+        """
+        Count connections opened versus requests served on an already open (reused) connection.
+        """
+        opened, requests_made = 0, 0
+        for session in list(self.sessions.values()):
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in list(pools.keys()):
+                    pool = pools.get(key)
+                    if pool is not None:
+                        opened += pool.num_connections
+                        requests_made += pool.num_requests
+        return {'opened': opened, 'reused': max(requests_made - opened, 0), 'requests': requests_made}
+
+    def close(self):
+        """Close every pooled connection."""
+        with self._sessions_lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+
+    def fetch_candles(self, symbol, resolution, from_time, to_time):
+        """Fetch raw Finnhub candles for one time window, or None if none were returned."""
+        data = self._candle_response(symbol, resolution, from_time, to_time)
+        if data and 'c' in data:  # Ensure data contains 'close' prices
+            return data
+        return None
+
+    def _candle_response(self, symbol, resolution, from_time, to_time):
+        """The raw candle response (also Finnhub's {'s': 'no_data'}), or None if the request failed."""
         params = {
             'symbol': symbol,
             'resolution': resolution,
@@ -44,10 +98,48 @@ class DataFetcher:
             'to': to_time,
             'token': self.api_key_finnhub
         }
-        data = self.fetch_data_with_retry(self.stock_api_url, params)
-        if data and 'c' in data:  # Ensure data contains 'close' prices
-            return pd.DataFrame(data)
-        return None
+        return self.fetch_data_with_retry(self.stock_api_url, params)
+
+    def fetch_stock_data(self, symbol, resolution, from_time, to_time):
+        """Fetch historical stock data in a format suitable for LSTM processing."""
+        if self.candle_store is None:
+            data = self.fetch_candles(symbol, resolution, from_time, to_time)
+            return pd.DataFrame(data) if data else None
+
+        # Only request the parts of the window that are not cached yet
+        cached_range = self.candle_store.time_range(symbol, resolution)
+        if cached_range is None:
+            missing = [(from_time, to_time)]
+        else:
+            first_ts, last_ts = cached_range
+            missing = []
+            # A head gap that already came back empty (e.g. before the listing date) is not asked for again
+            checked = self._empty_heads.get((symbol, resolution))
+            if from_time < first_ts and (checked is None or from_time < checked):
+                missing.append((from_time, first_ts))
+            if to_time > last_ts:
+                missing.append((max(from_time, last_ts), to_time))  # Refetch the last bar, it may have been partial
+
+        for start, end in missing:
+            data = self._candle_response(symbol, resolution, start, end)
+            if data is None:
+                continue  # Failed requests are retried on the next call
+            timestamps = data.get('t') if 'c' in data else None
+            if timestamps:
+                self.candle_store.merge(symbol, resolution, data)
+            if cached_range is None or (end == cached_range[0] and not any(ts < end for ts in timestamps or [])):
+                # Nothing exists between start and the first stored bar; remember it so the gap is not refetched
+                self._empty_heads[(symbol, resolution)] = start
+
+        df = self.candle_store.read(symbol, resolution, from_time, to_time)
+        return df if df is not None and len(df) else None
+
+    def fetch_many(self, symbols, resolution, from_time, to_time, max_workers=None):
+        """Fetch candles for many symbols concurrently over the pooled connections."""
+        max_workers = max_workers or min(self.pool_maxsize, max(len(symbols), 1))
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            frames = pool.map(lambda symbol: self.fetch_stock_data(symbol, resolution, from_time, to_time), symbols)
+            return dict(zip(symbols, frames))
 
     def fetch_news(self, query):
         """Fetch news articles."""
@@ -64,3 +156,7 @@ if __name__ == "__main__":
     news_data = fetcher.fetch_news('stock market')
     print(stock_data)
     print(news_data)
+    universe = fetcher.fetch_many(['AAPL', 'GOOGL', 'MSFT', 'AMZN'], 'D', 1615299000, 1615385400)
+    print({symbol: None if df is None else len(df) for symbol, df in universe.items()})
+    print(fetcher.connection_stats())
+    fetcher.close()
@@ -0,0 +1,170 @@
+import math
+from collections import deque
+
+INDICATOR_COLUMNS = ['SMA_20', 'SMA_50', 'EMA_20', 'EMA_50', 'RSI', 'STD', 'Upper_Band', 'Middle_Band', 'Lower_Band']
+NORMALIZED_COLUMNS = ['SMA_20', 'SMA_50', 'EMA_20', 'EMA_50', 'RSI', 'Upper_Band', 'Middle_Band', 'Lower_Band']
+
+class RollingWindow:
+    def __init__(self, size):
+        """
+        Fixed-size window keeping a running sum and a sliding Welford mean/M2,
+        so mean and sample variance cost O(1) per new value.
+        """
+        self.size = size
+        self.values = deque()
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, value):
+        self.values.append(value)
+        self.total += value
+        if len(self.values) <= self.size:
+            delta = value - self.mean
+            self.mean += delta / len(self.values)
+            self.m2 += delta * (value - self.mean)
+        else:
+            old = self.values.popleft()
+            self.total -= old
+            old_mean = self.mean
+            self.mean += (value - old) / self.size
+            self.m2 += (value - old) * (value - self.mean + old - old_mean)
+
+    @property
+    def full(self):
+        return len(self.values) == self.size
+
+    def sum(self):
+        return self.total if self.full else math.nan
+
+    def average(self):
+        return self.total / self.size if self.full else math.nan
+
+    def std(self):
+        """Sample standard deviation (ddof=1) of the window, like pandas rolling().std()."""
+        if not self.full:
+            return math.nan
+        return math.sqrt(max(self.m2, 0.0) / (self.size - 1))
+
+class RunningStats:
+    def __init__(self):
+        """Welford mean/variance over every non-NaN value seen so far."""
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, value):
+        if math.isnan(value):
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def zscore(self, value):
+        if self.count < 2:
+            return math.nan
+        std = math.sqrt(self.m2 / (self.count - 1))
+        return (value - self.mean) / std if std > 0 else math.nan
+
+class StreamingIndicators:
+    def __init__(self):
+        """
+        Incremental version of DataProcessor.add_technical_indicators. Each update() costs O(1)
+        and produces the same values as the last row of the batch computation.
+        """
+        self.sma_20 = RollingWindow(20)
+        self.sma_50 = RollingWindow(50)
+        self.ema_20 = None
+        self.ema_50 = None
+        self.gains = RollingWindow(14)
+        self.losses = RollingWindow(14)
+        self.previous_close = None
+        self.bars = 0
+        # Whole-history statistics backing normalize_features
+        self.feature_stats = {column: RunningStats() for column in NORMALIZED_COLUMNS}
+        self.latest = dict.fromkeys(INDICATOR_COLUMNS, math.nan)
+
+    @classmethod
+    def from_history(cls, closes):
+        """Warm up the engine on a history of close prices."""
+        engine = cls()
+        for close in closes:
+            engine.update(close)
+        return engine
+
+    def update(self, close):
+        """Consume one new close price and return the raw (un-normalized) indicator values."""
+        close = float(close)
+        self.bars += 1
+
+        self.sma_20.push(close)
+        self.sma_50.push(close)
+
+        # Recursive EMA, equivalent to ewm(span=n, adjust=False)
+        self.ema_20 = close if self.ema_20 is None else self.ema_20 + (2 / 21) * (close - self.ema_20)
+        self.ema_50 = close if self.ema_50 is None else self.ema_50 + (2 / 51) * (close - self.ema_50)
+
+        # RSI over the same 14-bar simple averages of gains and losses as the batch path
+        delta = 0.0 if self.previous_close is None else close - self.previous_close
+        self.previous_close = close
+        self.gains.push(max(delta, 0.0))
+        self.losses.push(max(-delta, 0.0))
+        avg_gain, avg_loss = self.gains.average(), self.losses.average()
+        if math.isnan(avg_gain) or (avg_gain == 0 and avg_loss == 0):
+            rsi = math.nan
+        elif avg_loss == 0:
+            rsi = 100.0
+        else:
+            rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+
+        middle = self.sma_20.average()
+        std = self.sma_20.std()
+
+        self.latest = {
+            'SMA_20': middle,
+            'SMA_50': self.sma_50.average(),
+            'EMA_20': self.ema_20,
+            'EMA_50': self.ema_50,
+            'RSI': rsi,
+            'STD': std,
+            'Upper_Band': middle + std * 2,
+            'Middle_Band': middle,
+            'Lower_Band': middle - std * 2,
+        }
+        for column, stats in self.feature_stats.items():
+            stats.push(self.latest[column])
+        return self.latest
+
+    def normalized(self):
+        """
+        Latest indicator values z-scored against their whole history,
+        matching the last row returned by DataProcessor.add_technical_indicators.
+        """
+        row = dict(self.latest)
+        for column, stats in self.feature_stats.items():
+            row[column] = stats.zscore(self.latest[column])
+        return row
+
+# Example usage
+if __name__ == "__main__":
+    import time
+    import numpy as np
+    import pandas as pd
+    from processor import DataProcessor
+
+    closes = 100 + np.cumsum(np.random.default_rng(0).normal(0, 1, 2000))
+    engine = StreamingIndicators.from_history(closes[:-1])
+
+    start = time.perf_counter()
+    engine.update(closes[-1])
+    streaming_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = DataProcessor().add_technical_indicators(pd.DataFrame({'Close': closes}))
+    batch_seconds = time.perf_counter() - start
+
+    streamed = engine.normalized()
+    worst = max(abs(streamed[column] - batch[column].iloc[-1]) for column in INDICATOR_COLUMNS)
+    print(f"Max difference from batch path: {worst:.2e}")
+    print(f"Per-bar update: {streaming_seconds * 1e6:.1f}us, batch recompute: {batch_seconds * 1e3:.1f}ms")
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+PANEL_COLUMNS = {
+    'SMA': ['SMA_20', 'SMA_50'],
+    'EMA': ['EMA_20', 'EMA_50'],
+    'RSI': ['RSI'],
+    'Bollinger': ['Middle_Band', 'STD', 'Upper_Band', 'Lower_Band'],
+}
+NORMALIZED_COLUMNS = ['SMA_20', 'SMA_50', 'EMA_20', 'EMA_50', 'RSI', 'Upper_Band', 'Middle_Band', 'Lower_Band']
+
+class IndicatorPanel:
+    def __init__(self, values, columns, index, symbols):
+        """
+        Indicators for a whole universe held in one array of shape (n_columns, n_bars, n_symbols).
+        """
+        self.values = values
+        self.columns = list(columns)
+        self.index = index
+        self.symbols = list(symbols)
+        self._positions = {column: i for i, column in enumerate(self.columns)}
+
+    def __getitem__(self, column):
+        """Return one indicator as a (n_bars, n_symbols) array view."""
+        return self.values[self._positions[column]]
+
+    def frame(self, column):
+        """Return one indicator as a wide DataFrame (bars x symbols)."""
+        return pd.DataFrame(self[column], index=self.index, columns=self.symbols)
+
+    def latest(self):
+        """Return the last bar of every indicator as a DataFrame (symbols x indicators)."""
+        return pd.DataFrame(self.values[:, -1, :].T, index=self.symbols, columns=self.columns)
+
+def _rolling_mean(x, window):
+    """Rolling mean along axis 0 from cumulative sums; NaN until the window is full or if it holds a NaN."""
+    missing = np.isnan(x)
+    sums = np.cumsum(np.where(missing, 0.0, x), axis=0)
+    counts = np.cumsum(missing, axis=0)
+    out = np.full(x.shape, np.nan)
+    window_sums = sums[window - 1:].copy()
+    window_sums[1:] -= sums[:-window]
+    window_missing = counts[window - 1:].copy()
+    window_missing[1:] -= counts[:-window]
+    out[window - 1:] = np.where(window_missing == 0, window_sums / window, np.nan)
+    return out
+
+def _rolling_std(x, window):
+    """Rolling sample standard deviation (ddof=1) along axis 0 from cumulative sums."""
+    # Centering per symbol keeps the cumulative sums small, which limits cancellation error
+    centered = x - np.nanmean(x, axis=0)
+    mean = _rolling_mean(centered, window)
+    mean_sq = _rolling_mean(centered * centered, window)
+    variance = np.maximum(mean_sq - mean * mean, 0.0) * window / (window - 1)
+    return np.sqrt(variance)
+
+def _ema(x, span):
+    """ewm(span, adjust=False) for every column at once, as a first-order IIR filter."""
+    alpha = 2 / (span + 1)
+    valid = ~np.isnan(x)
+    # Leading NaNs take the first valid price (a constant prefix leaves the EMA unchanged), interior gaps are carried forward
+    filled = pd.DataFrame(x).ffill().bfill().to_numpy()
+    ema = lfilter([alpha], [1, alpha - 1], filled, axis=0, zi=((1 - alpha) * filled[:1]))[0]
+    ema[np.cumsum(valid, axis=0) == 0] = np.nan
+    return ema
+
+def compute_indicator_panel(prices, indicators=('SMA', 'EMA', 'RSI', 'Bollinger'), normalize=True):
+    """
+    Compute the DataProcessor.add_technical_indicators columns for every symbol at once.
+    prices is a wide DataFrame (bars x symbols) of closes or a 2-D float array.
+    """
+    if isinstance(prices, pd.DataFrame):
+        index, symbols = prices.index, prices.columns
+        close = prices.to_numpy(dtype=np.float64)
+    else:
+        close = np.asarray(prices, dtype=np.float64)
+        if close.ndim != 2:
+            raise ValueError("Prices must be a 2-D (time x symbol) array")
+        index, symbols = pd.RangeIndex(close.shape[0]), range(close.shape[1])
+
+    if close.shape[0] < 50:
+        raise ValueError("Prices must have at least 50 rows to calculate all indicators")
+
+    columns = [column for name in PANEL_COLUMNS if name in indicators for column in PANEL_COLUMNS[name]]
+    values = np.empty((len(columns),) + close.shape)
+    out = {column: values[i] for i, column in enumerate(columns)}
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if 'SMA' in indicators:
+            out['SMA_20'][:] = _rolling_mean(close, 20)
+            out['SMA_50'][:] = _rolling_mean(close, 50)
+
+        if 'EMA' in indicators:
+            out['EMA_20'][:] = _ema(close, 20)
+            out['EMA_50'][:] = _ema(close, 50)
+
+        if 'RSI' in indicators:
+            delta = np.zeros_like(close)
+            delta[1:] = np.diff(close, axis=0)
+            avg_gain = _rolling_mean(np.where(delta > 0, delta, 0.0), 14)
+            avg_loss = _rolling_mean(np.where(delta < 0, -delta, 0.0), 14)
+            out['RSI'][:] = 100 - (100 / (1 + avg_gain / avg_loss))
+
+        if 'Bollinger' in indicators:
+            out['Middle_Band'][:] = _rolling_mean(close, 20)
+            out['STD'][:] = _rolling_std(close, 20)
+            out['Upper_Band'][:] = out['Middle_Band'] + out['STD'] * 2
+            out['Lower_Band'][:] = out['Middle_Band'] - out['STD'] * 2
+
+        if normalize:
+            # z-score each indicator per symbol over its whole history, like normalize_features
+            for column in NORMALIZED_COLUMNS:
+                if column in out:
+                    series = out[column]
+                    series -= np.nanmean(series, axis=0)
+                    series /= np.nanstd(series, axis=0, ddof=1)
+
+    return IndicatorPanel(values, columns, index, symbols)
+
+# Example usage
+if __name__ == "__main__":
+    import time
+    from processor import DataProcessor
+
+    n_bars, n_symbols = 500, 1000
+    rng = np.random.default_rng(0)
+    prices = pd.DataFrame(100 + np.cumsum(rng.normal(0, 1, (n_bars, n_symbols)), axis=0),
+                          columns=[f"SYM{i}" for i in range(n_symbols)])
+
+    start = time.perf_counter()
+    panel = compute_indicator_panel(prices)
+    panel_seconds = time.perf_counter() - start
+
+    processor = DataProcessor()
+    start = time.perf_counter()
+    frames = {symbol: processor.add_technical_indicators(pd.DataFrame({'Close': prices[symbol]})) for symbol in prices.columns}
+    loop_seconds = time.perf_counter() - start
+
+    worst = max(np.nanmax(np.abs(panel.frame(column).to_numpy() - np.column_stack([frames[s][column] for s in prices.columns])))
+                for column in panel.columns)
+    print(f"{n_symbols} symbols x {n_bars} bars: panel {panel_seconds * 1e3:.1f}ms, "
+          f"per-symbol loop {loop_seconds * 1e3:.1f}ms ({loop_seconds / panel_seconds:.0f}x)")
+    print(f"Max difference from per-symbol path: {worst:.2e}")
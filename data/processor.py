@@ -2,7 +2,11 @@ import pandas as pd
 import numpy as np
 
 class DataProcessor:
-    def add_technical_indicators(self, df, indicators=['SMA', 'EMA', 'RSI', 'Bollinger']):
+    def add_technical_indicators(self, df, indicators=['SMA', 'EMA', 'RSI', 'Bollinger'], normalize=True):
+        """
+        Add the indicator columns to df. With normalize (model features) they are z-scored over the whole
+        frame; the trading rules compare them with the raw close, so decisions use normalize=False.
+        """
         if 'Close' not in df.columns:
             raise ValueError("DataFrame must contain 'Close' column")
 
@@ -38,16 +42,25 @@ class DataProcessor:
             df['Lower_Band'] = df['Middle_Band'] - (df['STD'] * 2)
 
         # Normalize technical indicators to ensure they are on the same scale
-        df = self.normalize_features(df, ['SMA_20', 'SMA_50', 'EMA_20', 'EMA_50', 'RSI', 'Upper_Band', 'Middle_Band', 'Lower_Band'])
+        if normalize:
+            df = self.normalize_features(df, ['SMA_20', 'SMA_50', 'EMA_20', 'EMA_50', 'RSI', 'Upper_Band', 'Middle_Band', 'Lower_Band'])
 
         return df
 
     def normalize_features(self, df, feature_names):
         """Normalize selected features within the DataFrame."""
-        for feature in feature_names:
-            df[feature] = (df[feature] - df[feature].mean()) / df[feature].std()
+        features = df[feature_names]
+        df[feature_names] = (features - features.mean()) / features.std()
         return df
 
+    def add_technical_indicators_panel(self, prices, indicators=['SMA', 'EMA', 'RSI', 'Bollinger']):
+        """
+        Compute the same indicators for a whole universe at once.
+        prices is a wide (time x symbol) DataFrame or 2-D array of closes; returns an IndicatorPanel.
+        """
+        from data.panel import compute_indicator_panel
+        return compute_indicator_panel(prices, indicators)
+
 # Example usage
 if __name__ == "__main__":
     processor = DataProcessor()
@@ -1,56 +1,221 @@
+import argparse
+import asyncio
 import logging
 import time
+from functools import partial
+import numpy as np
 from data.fetcher import DataFetcher
+from data.candle_store import CandleStore
 from data.cleaner import DataCleaner
 from data.processor import DataProcessor
-from models.train import ModelTrainer
-from trading.strategy import TradingStrategy
+from trading.strategy import TradingStrategy, LatestIndicators, ACTION_NAMES, ACTION_CODES, HOLD
 from trading.executer import TradeExecuter
-from trading.risk_management import RiskManager
+from trading.order_tracker import OrderTracker
+from trading.risk_management import RiskManager, PortfolioRiskManager
+from trading.pipeline import TradingPipeline
 from utilities.config import Config
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # Initialize components
-fetcher = DataFetcher()
+fetcher = DataFetcher(candle_store=CandleStore(Config.CANDLE_STORE_DIR))
 cleaner = DataCleaner()
 processor = DataProcessor()
-trainer = ModelTrainer()
-executer = TradeExecuter(Config.TRADE_EXECUTION_URL, Config.API_KEY_BROKERAGE)
+update_service = None  # Created on first use, see get_update_service
+executer = TradeExecuter(Config.TRADE_EXECUTION_URL, Config.API_KEY_BROKERAGE, Config.ORDER_MAX_IN_FLIGHT,
+                         Config.ORDER_MAX_RETRIES, bulk_orders=Config.BULK_ORDERS, max_batch_size=Config.ORDER_BATCH_SIZE)
+order_tracker = OrderTracker(executer, Config.ORDER_STREAM_URL, Config.ORDER_POLL_INTERVAL_SECONDS)
 risk_manager = RiskManager(Config.MAX_TRADE_LIMIT, Config.STOP_LOSS_THRESHOLD, Config.VOLATILITY_THRESHOLD)
+strategy = TradingStrategy(None, risk_manager)  # Built once; the rules do not depend on the model
+
+def get_update_service():
+    """
+    Start the online update service on first use, so TensorFlow is only imported when a model update is needed.
+    Updates run on its background thread; trading only hands it new bars.
+    """
+    global update_service
+    if update_service is None:
+        from models.online_update import OnlineUpdateService
+        update_service = OnlineUpdateService.from_paths(
+            Config.MODEL_PATH, Config.SCALER_PATH, Config.LOOKBACK,
+            buffer_capacity=Config.REPLAY_BUFFER_CAPACITY, batch_size=Config.ONLINE_UPDATE_BATCH_SIZE,
+            steps_per_update=Config.ONLINE_UPDATE_STEPS, min_new_samples=Config.ONLINE_UPDATE_MIN_NEW_SAMPLES,
+            interval_seconds=Config.ONLINE_UPDATE_INTERVAL_SECONDS,
+            feature_columns=Config.MODEL_FEATURE_COLUMNS).start()
+    return update_service
+
+def queue_model_update(symbol, processed_data):
+    """Hand new bars to the background online update; a failure here is logged and never blocks trading."""
+    try:
+        get_update_service().add_bars(symbol, processed_data)
+    except Exception as e:
+        logging.error(f"Online update skipped for {symbol}: {str(e)}")
+
+def build_portfolio(symbols):
+    return PortfolioRiskManager(symbols, Config.PORTFOLIO_CASH, Config.MAX_GROSS_EXPOSURE, Config.MAX_NET_EXPOSURE,
+                                Config.MAX_SYMBOL_EXPOSURE, Config.MAX_PORTFOLIO_VAR, Config.VAR_CONFIDENCE,
+                                Config.COVARIANCE_DECAY)
+
+def apply_fill(portfolio, fill):
+    """Book a fill event from the order tracker; fills without any known price are logged and left out."""
+    if fill['price'] is None:
+        logging.error(f"Fill of {fill['quantity']} {fill['symbol']} (order {fill['order_id']}) has no price; "
+                      f"portfolio not updated.")
+        return
+    portfolio.on_fill(fill['symbol'], fill['quantity'], fill['price'])
 
 def main_trading_loop():
     stocks = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'FB', 'TSLA']  # Example list of stocks
+    latest = LatestIndicators(stocks)
+    portfolio = build_portfolio(stocks)
+    loop = asyncio.new_event_loop()  # One loop for every cycle, so the order gateway keeps its connections
+    # Fills reach the portfolio as they are reported, from the order stream or the batched status poll
+    order_tracker.add_listener(lambda fill: apply_fill(portfolio, fill))
+    order_tracker.start(loop)
+    last_closed_timestamps = None
     while True:
+        ready = {}
         for symbol in stocks:
             try:
                 # Fetch and process data for each stock
-                raw_data = fetcher.fetch_stock_data(symbol, '1d')  # Fetch daily data for the stock
-                cleaned_data = cleaner.clean_stock_data(raw_data)
-                processed_data = processor.add_technical_indicators(cleaned_data)
+                raw_data = fetch_symbol(symbol)
+                if raw_data is None:
+                    logging.warning(f"No candles returned for {symbol}.")
+                    continue
+                cleaned_data = cleaner.clean_stock_arrays(raw_data, Config.OUTLIER_WINDOW, Config.OUTLIER_Z_THRESHOLD, symbol)
+                # The rules compare the close with the bands, so the indicators stay in price units
+                processed_data = processor.add_technical_indicators(cleaned_data, normalize=False)
                 logging.info(f"Data cleaned and processed for {symbol}.")
 
-                # Update model with new data or retrain if necessary
-                model = trainer.update_model(processed_data)  # Assuming we have a method to update or retrain
+                # Keep the latest indicator values for the batched trading decision
+                latest.update(symbol, processed_data)
+                ready[symbol] = processed_data
 
-                # Get market data for trading decision
-                market_data = {'current_price': processed_data['Close'].iloc[-1], 'volume': processed_data['Volume'].iloc[-1]}
+            except Exception as e:
+                logging.error(f"Error occurred for {symbol}: {str(e)}")
 
-                # Implement trading strategy
-                strategy = TradingStrategy(model, risk_manager)
-                action, trade_size = strategy.decide(market_data)
-                logging.info(f"Trading decision for {symbol}: {action} at price {market_data['current_price']}")
+        # Fold each completed bar into the covariance once, with its final closes; the forming bar only marks
+        if not np.array_equal(latest.closed_timestamps, last_closed_timestamps, equal_nan=True):
+            portfolio.fold_bar(latest.closes)
+            last_closed_timestamps = latest.closed_timestamps.copy()
+        portfolio.mark(latest.prices)
+        # Implement trading strategy for the whole universe in one call, sized from the portfolio's cash
+        actions, trade_sizes = strategy.decide_batch(latest.values, latest.prices, portfolio.cash)
+        # Pre-trade portfolio checks for the cycle's orders together; action codes sign the quantities
+        rows = [latest.rows[symbol] for symbol in ready if actions[latest.rows[symbol]] != HOLD]
+        allowed, reasons = portfolio.approve_orders(np.array(rows, dtype=np.intp), actions[rows] * trade_sizes[rows])
+        approved = {row: (ok, reason) for row, ok, reason in zip(rows, allowed, reasons)}
+        cycle = int(time.time() // 60)
+        orders = []
+        for symbol in ready:
+            row = latest.rows[symbol]
+            action, trade_size, price = ACTION_NAMES[actions[row]], trade_sizes[row], latest.prices[row]
+            logging.info(f"Trading decision for {symbol}: {action} at price {price}")
+            if action == 'Hold':
+                continue
+            ok, reason = approved[row]
+            if not ok:
+                logging.info(f"Order for {symbol} rejected by portfolio limits: {portfolio.describe_reasons(reason)}")
+                continue
+            # Keyed by symbol and cycle, so a resent order can never be placed twice
+            orders.append({'action': action.lower(), 'symbol': symbol, 'quantity': trade_size, 'price': price,
+                           'client_order_id': f"{symbol}-{cycle}"})
 
-                # Execute trade
-                if action != 'Hold':
-                    order_id = executer.execute_trade(action.lower(), symbol, trade_size, market_data['current_price'])
-                    order_status = executer.check_order_status(order_id)
-                    logging.info(f"Trade executed for {symbol}. Order ID: {order_id}, Status: {order_status}")
+        # Execute the cycle's trades concurrently on the gateway's persistent session
+        try:
+            order_ids = loop.run_until_complete(executer.execute_trades(orders))
+            for order, order_id in zip(orders, order_ids):
+                if order_id is not None:
+                    order_tracker.track(order_id, order['symbol'], order['action'], order['quantity'], order['price'])
+                    logging.info(f"Trade submitted for {order['symbol']}. Order ID: {order_id}")
+        except Exception as e:
+            logging.error(f"Order submission failed: {str(e)}")
 
-            except Exception as e:
-                logging.error(f"Error occurred for {symbol}: {str(e)}")
-        time.sleep(60)  # Sleep for 1 minute before next iteration
+        # Only after trading: queue the new bars for the background online update, which never waits for a fit
+        for symbol, processed_data in ready.items():
+            queue_model_update(symbol, processed_data)
+        # Sleep for 1 minute before next iteration; the order tracker keeps running on the loop meanwhile
+        loop.run_until_complete(asyncio.sleep(60))
+
+def fetch_symbol(symbol):
+    """Fetch the lookback window of candles for one symbol (pipeline fetch stage)."""
+    to_time = int(time.time())
+    return fetcher.fetch_stock_data(symbol, Config.CANDLE_RESOLUTION, to_time - Config.LOOKBACK_SECONDS, to_time)
+
+def decide_symbol(latest, portfolio, approved, symbol, processed_data):
+    """
+    Decide on a trade for one symbol, size it from the portfolio's cash and run the portfolio checks, then
+    queue its new bars for the online update (pipeline decision stage). approved holds the (row, signed
+    quantity) of the orders approved earlier in the cycle; a new order is checked together with them, as
+    the sequential loop does with approve_orders. Decisions run on the pipeline's single decision worker.
+    """
+    latest.update(symbol, processed_data)
+    portfolio.mark(latest.prices)
+    row = latest.rows[symbol]
+    price = latest.prices[row]
+
+    action, trade_size = strategy.decide_row(latest.values[row], price, portfolio.cash)
+    logging.info(f"Trading decision for {symbol}: {action} at price {price}")
+    queue_model_update(symbol, processed_data)
+    if action == 'Hold':
+        return None
+    # Orders approved earlier in the cycle count as filled, even if some have already been (conservative)
+    rows = np.array([r for r, _ in approved] + [row], dtype=np.intp)
+    quantities = [quantity for _, quantity in approved] + [ACTION_CODES[action] * trade_size]
+    allowed, reasons = portfolio.approve_orders(rows, quantities)
+    if not allowed[-1]:
+        logging.info(f"Order for {symbol} rejected by portfolio limits: {portfolio.describe_reasons(reasons[-1])}")
+        return None
+    approved.append((row, quantities[-1]))
+    return action, trade_size, price
+
+async def execute_decision(symbol, decision):
+    """Send the order for one decision and hand it to the order tracker (pipeline execution stage)."""
+    action, trade_size, price = decision
+    cycle = int(time.time() // Config.CYCLE_SECONDS)
+    order_id = await executer.execute_trade(action.lower(), symbol, trade_size, price, f"{symbol}-{cycle}")
+    if order_id is None:
+        return
+    order_tracker.track(order_id, symbol, action.lower(), trade_size, price)
+    logging.info(f"Trade submitted for {symbol}. Order ID: {order_id}")
+
+def pipelined_trading_loop(stocks):
+    """
+    Run fetch, processing and decisions as concurrent stages, one cycle per wall-clock boundary, with the
+    same portfolio checks and fill booking as main_trading_loop.
+    """
+    latest = LatestIndicators(stocks)
+    portfolio = build_portfolio(stocks)
+    approved = []
+    last_closed_timestamps = None
+
+    def after_cycle():
+        nonlocal last_closed_timestamps
+        # Fold each completed bar into the covariance once, with its final closes
+        if not np.array_equal(latest.closed_timestamps, last_closed_timestamps, equal_nan=True):
+            portfolio.fold_bar(latest.closes)
+            last_closed_timestamps = latest.closed_timestamps.copy()
+        approved.clear()
+
+    pipeline = TradingPipeline(fetch_symbol, partial(decide_symbol, latest, portfolio, approved), execute_decision,
+                               fetch_workers=Config.PIPELINE_FETCH_WORKERS,
+                               process_workers=Config.PIPELINE_PROCESS_WORKERS,
+                               queue_size=Config.PIPELINE_QUEUE_SIZE)
+    order_tracker.add_listener(lambda fill: apply_fill(portfolio, fill))
+    order_tracker.start(pipeline.loop)
+    try:
+        pipeline.run_forever(stocks, cycle_seconds=Config.CYCLE_SECONDS, after_cycle=after_cycle)
+    finally:
+        pipeline.shutdown()
 
 if __name__ == "__main__":
-    main_trading_loop()
+    parser = argparse.ArgumentParser(description="Algorithmic trading bot")
+    parser.add_argument('--pipelined', action='store_true', help="Process symbols concurrently in a staged pipeline")
+    parser.add_argument('--symbols', nargs='+', default=['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'FB', 'TSLA'])
+    args = parser.parse_args()
+
+    if args.pipelined:
+        pipelined_trading_loop(args.symbols)
+    else:
+        main_trading_loop()
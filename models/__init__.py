@@ -1,6 +1,21 @@
 # models/__init__.py
 
-# Import necessary modules or classes from the models directory
-from .model_a import ModelA
-from .model_b import ModelB
-# Add more imports as needed
+# Classes are imported on first access, so TensorFlow/Keras only load when a model is actually used
+import importlib
+
+_EXPORTS = {
+    'ModelTrainer': '.train',
+    'StockPricePredictor': '.predict',
+    'ModelUpdater': '.online_update',
+    'OnlineUpdateService': '.online_update',
+    'SweepRunner': '.sweep',
+    'OptionsStrategy': '.options_strategy',
+    'DerivativesStrategy': '.derivatives_strategy',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,189 @@
+import itertools
+import logging
+import numpy as np
+import pandas as pd
+
+from models.windows import WindowBuilder
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class StreamingDataset:
+    def __init__(self, dataset_path, target_column='Stock_Price', chunk_size=100000, symbol_column=None):
+        """
+        Out-of-core view of a time-ordered training CSV. Rows are only ever read one chunk at a time,
+        so the dataset can be larger than memory. Row ranges are half-open [start_row, end_row).
+        With symbol_column, rows must be sorted by symbol then time; LSTM windows never span two symbols.
+        """
+        self.dataset_path = dataset_path
+        self.target_column = target_column
+        self.symbol_column = symbol_column
+        self.chunk_size = chunk_size
+        self.columns = list(pd.read_csv(dataset_path, nrows=0).columns)
+        for column in (target_column, symbol_column):
+            if column is not None and column not in self.columns:
+                raise ValueError(f"Dataset has no '{column}' column")
+        self.feature_columns = [column for column in self.columns if column not in (target_column, symbol_column)]
+        self._n_rows = None
+
+    @property
+    def n_features(self):
+        return len(self.feature_columns)
+
+    @property
+    def n_rows(self):
+        """Number of data rows, counted with one streaming pass over a single column."""
+        if self._n_rows is None:
+            self._n_rows = sum(len(chunk) for chunk in pd.read_csv(self.dataset_path, usecols=[self.target_column],
+                                                                    chunksize=self.chunk_size))
+        return self._n_rows
+
+    def read_rows(self, start_row, end_row, chunksize=None):
+        """
+        Read rows [start_row, end_row), or a sequential iterator of chunks of them. The rows before start_row
+        are skipped without being parsed but still scanned, so a range should be streamed through one
+        chunked reader rather than read with one call per chunk.
+        """
+        # An integer skiprows is skipped by the C parser; a range of row numbers would be built into a set
+        return pd.read_csv(self.dataset_path, header=None, names=self.columns, skiprows=start_row + 1,
+                           nrows=end_row - start_row, chunksize=chunksize)
+
+    def iter_chunks(self, start_row=0, end_row=None):
+        """Yield (features, target) float32 arrays for consecutive chunks of rows in [start_row, end_row)."""
+        end_row = self.n_rows if end_row is None else min(end_row, self.n_rows)
+        if end_row <= start_row:
+            return
+        for chunk in self.read_rows(start_row, end_row, self.chunk_size):
+            yield (chunk[self.feature_columns].to_numpy(dtype=np.float32),
+                   chunk[self.target_column].to_numpy(dtype=np.float32))
+
+    def fit_scaler(self, scaler, start_row=0, end_row=None):
+        """Fit scaler by streaming partial_fit over the chunks of a row range."""
+        for features, _ in self.iter_chunks(start_row, end_row):
+            scaler.partial_fit(features)
+        return scaler
+
+    def time_split(self, validation_fraction=0.2):
+        """Return ((0, split), (split, n_rows)): the oldest rows train, the most recent rows validate."""
+        split = int(self.n_rows * (1 - validation_fraction))
+        return (0, split), (split, self.n_rows)
+
+    def walk_forward_splits(self, n_folds, min_train_fraction=0.5):
+        """
+        Yield expanding-window ((0, train_end), (train_end, val_end)) row ranges.
+        The first fold trains on min_train_fraction of the rows; the rest is cut into n_folds validation blocks.
+        """
+        first_train_end = int(self.n_rows * min_train_fraction)
+        block = (self.n_rows - first_train_end) // n_folds
+        for fold in range(n_folds):
+            train_end = first_train_end + fold * block
+            val_end = self.n_rows if fold == n_folds - 1 else train_end + block
+            yield (0, train_end), (train_end, val_end)
+
+    def _epoch_chunks(self, lookback, start_row, end_row, shuffle, num_shards, shard_index, entropy, epoch):
+        """
+        One pass over [start_row, end_row) with a single sequential chunked reader, yielding for each of this
+        shard's chunks its raw (features, targets) rows and the window ends to take from them, in visiting
+        order. The last lookback - 1 rows of each chunk are carried into the next, so windows ending early in
+        a chunk are complete without reading any row twice. Shuffling permutes the ends within a chunk, seeded
+        by (entropy, epoch, chunk), so every epoch visits the windows in a different order.
+        """
+        if end_row <= start_row:
+            return
+        builder = WindowBuilder(lookback)
+        carry = None
+        for chunk_index, frame in enumerate(self.read_rows(start_row, end_row, self.chunk_size)):
+            features = frame[self.feature_columns].to_numpy(dtype=np.float32)
+            targets = frame[self.target_column].to_numpy(dtype=np.float32)
+            groups = frame[self.symbol_column].to_numpy() if self.symbol_column else None
+            n_carried = 0
+            if carry is not None:
+                n_carried = len(carry[0])
+                features = np.concatenate([carry[0], features])
+                targets = np.concatenate([carry[1], targets])
+                groups = None if groups is None else np.concatenate([carry[2], groups])
+
+            if chunk_index % num_shards == shard_index:
+                ends = builder.valid_ends(len(features), groups)
+                ends = ends[ends >= n_carried]  # Only windows ending inside this chunk
+                if shuffle:
+                    seed = np.random.SeedSequence(entropy, spawn_key=(epoch, chunk_index))
+                    ends = np.random.default_rng(seed).permutation(ends)
+                yield features, targets, ends.astype(np.int64)
+
+            keep = lookback - 1
+            if keep:
+                carry = (features[-keep:], targets[-keep:], None if groups is None else groups[-keep:])
+
+    def make_tf_dataset(self, scaler, start_row=0, end_row=None, batch_size=32, lookback=1, shuffle=False,
+                        shuffle_buffer=None, num_shards=1, shard_index=0, seed=None):
+        """
+        Build a tf.data pipeline over a row range. Each epoch streams the range once through a sequential
+        chunked reader on the generator; this worker's shard of the raw chunks is then scaled and windowed in
+        a parallel dataset.map, split into batches and prefetched. Yields ((main_input, lstm_input), target)
+        batches where lstm_input holds the lookback bars ending at each row; batches never span two chunks.
+        With shuffle, the order is reshuffled every epoch (reproducibly for a given seed), but only within a
+        chunk: windows from different chunks are never mixed, except across batches through shuffle_buffer.
+        The map materializes a chunk's windows at once, so memory grows with chunk_size * lookback times the
+        number of chunks in flight.
+        """
+        import tensorflow as tf
+
+        end_row = self.n_rows if end_row is None else min(end_row, self.n_rows)
+        mean = tf.constant(np.asarray(scaler.mean_, dtype=np.float32))
+        scale = tf.constant(np.asarray(scaler.scale_, dtype=np.float32))
+        n_features = self.n_features
+        signature = (tf.TensorSpec(shape=(None, n_features), dtype=tf.float32),
+                     tf.TensorSpec(shape=(None,), dtype=tf.float32),
+                     tf.TensorSpec(shape=(None,), dtype=tf.int64))
+        entropy = np.random.SeedSequence(seed).entropy
+        epochs = itertools.count()  # tf.data calls the generator function again for every epoch
+        dataset = tf.data.Dataset.from_generator(
+            lambda: self._epoch_chunks(lookback, start_row, end_row, shuffle, num_shards, shard_index, entropy,
+                                       next(epochs)),
+            output_signature=signature)
+
+        offsets = tf.range(-(lookback - 1), 1, dtype=tf.int64)
+
+        def window_chunk(features, targets, ends):
+            values = (features - mean) / scale
+            lstm_input = tf.gather(values, ends[:, None] + offsets)  # (windows, lookback, features)
+            return (tf.gather(values, ends), lstm_input), tf.gather(targets, ends)
+
+        dataset = dataset.map(window_chunk, num_parallel_calls=tf.data.AUTOTUNE)
+        dataset = dataset.flat_map(lambda inputs, targets: tf.data.Dataset.from_tensor_slices((inputs, targets))
+                                   .batch(batch_size))
+
+        n_chunks = -(-max(end_row - start_row, 0) // self.chunk_size)
+        if self.symbol_column is None:
+            # Generators have unknown length; declaring it lets Keras size epochs and progress bars
+            n_batches = 0
+            for chunk_index in range(shard_index, n_chunks, num_shards):
+                chunk_start = start_row + chunk_index * self.chunk_size
+                chunk_end = min(chunk_start + self.chunk_size, end_row)
+                n_windows = chunk_end - max(chunk_start, start_row + lookback - 1)
+                n_batches += -(-max(n_windows, 0) // batch_size)
+            dataset = dataset.apply(tf.data.experimental.assert_cardinality(n_batches))
+        if shuffle_buffer:
+            dataset = dataset.shuffle(shuffle_buffer)
+        return dataset.prefetch(tf.data.AUTOTUNE)
+
+# Usage example
+if __name__ == "__main__":
+    import os
+    import tempfile
+    from sklearn.preprocessing import StandardScaler
+
+    path = os.path.join(tempfile.mkdtemp(), 'ticks.csv')
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(rng.normal(size=(10000, 4)), columns=['Feature1', 'Feature2', 'Feature3', 'Feature4'])
+    frame['Stock_Price'] = 100 + frame.sum(axis=1)
+    frame.to_csv(path, index=False)
+
+    stream = StreamingDataset(path, chunk_size=1000)
+    (train_start, train_end), (val_start, val_end) = stream.time_split()
+    scaler = stream.fit_scaler(StandardScaler(), train_start, train_end)
+    print(f"{stream.n_rows} rows, train {train_start}-{train_end}, validation {val_start}-{val_end}")
+    for (main_input, lstm_input), target in stream.make_tf_dataset(scaler, train_start, train_end, batch_size=256, lookback=20).take(1):
+        print(main_input.shape, lstm_input.shape, target.shape)
+    print(list(stream.walk_forward_splits(3)))
@@ -1,8 +1,27 @@
 import logging
+import time
+import numpy as np
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Action labels of the batch API; an action code is the index of its label
+FUTURES_ACTIONS = ['Hold', 'Sell to stop loss', 'Sell to realize profit', 'Buy to stop loss', 'Buy to realize profit']
+OPTIONS_ACTIONS = ['No action', 'Buy call', 'Buy put']
+SWAP_ACTIONS = ['No swap action', 'Enter swap to pay fixed, receive floating', 'Enter swap to pay floating, receive fixed']
+
+REQUIRED_RISK_PARAMETERS = ['volatility_threshold', 'profit_target', 'stop_loss_limit']
+
+def validate_risk_parameters(risk_parameters):
+    """Check that risk parameters are a dict holding every required key."""
+    if not isinstance(risk_parameters, dict):
+        logging.error("Market data and risk parameters should be dictionaries.")
+        raise ValueError("Market data and risk parameters should be dictionaries.")
+    for param in REQUIRED_RISK_PARAMETERS:
+        if param not in risk_parameters:
+            logging.error(f"{param} missing in risk parameters.")
+            raise KeyError(f"{param} missing in risk parameters.")
+
 class DerivativesStrategy:
     def __init__(self, market_data, risk_parameters, model_predictions=None):
         """
@@ -17,15 +36,10 @@ class DerivativesStrategy:
         """
         Validates the necessary parameters to ensure they meet expected criteria.
         """
-        if not isinstance(self.market_data, dict) or not isinstance(self.risk_parameters, dict):
+        if not isinstance(self.market_data, dict):
             logging.error("Market data and risk parameters should be dictionaries.")
             raise ValueError("Market data and risk parameters should be dictionaries.")
-
-        required_params = ['volatility_threshold', 'profit_target', 'stop_loss_limit']
-        for param in required_params:
-            if param not in self.risk_parameters:
-                logging.error(f"{param} missing in risk parameters.")
-                raise KeyError(f"{param} missing in risk parameters.")
+        validate_risk_parameters(self.risk_parameters)
 
     def futures_trading_strategy(self, position, current_price):
         """
@@ -86,6 +100,84 @@ class DerivativesStrategy:
             logging.error(f"Error in swap strategy: {e}")
             raise
 
+def _choice_mask(values, allowed, name):
+    """Boolean mask of values == allowed[0] for an array of two-valued strings, validating every entry once."""
+    values = np.asarray(values)
+    first = values == allowed[0]
+    if not np.all(first | (values == allowed[1])):
+        logging.error(f"{name} must be either '{allowed[0]}' or '{allowed[1]}'.")
+        raise ValueError(f"{name} must be either '{allowed[0]}' or '{allowed[1]}'.")
+    return first
+
+class DerivativesBatch:
+    def __init__(self, risk_parameters):
+        """
+        Batch counterpart of DerivativesStrategy for whole books of positions. Risk parameters are
+        validated once here; each signal method takes aligned arrays (one entry per position) and returns
+        int8 action codes indexing FUTURES_ACTIONS, OPTIONS_ACTIONS or SWAP_ACTIONS. The if/elif order of
+        the per-position methods is kept (np.select takes the first matching condition), and NaN inputs
+        match no condition, as in the scalar comparisons.
+        """
+        validate_risk_parameters(risk_parameters)
+        self.risk_parameters = risk_parameters
+
+    def futures_signals(self, positions, current_prices, target_prices, stop_losses):
+        """Vectorized futures_trading_strategy; positions are 'long'/'short' strings."""
+        long = _choice_mask(positions, ('long', 'short'), "Position")
+        short = ~long
+        price = np.asarray(current_prices, dtype=np.float64)
+        target = np.asarray(target_prices, dtype=np.float64)
+        stop = np.asarray(stop_losses, dtype=np.float64)
+        conditions = [long & (price < stop), long & (price > target), short & (price > stop), short & (price < target)]
+        return np.select(conditions, [1, 2, 3, 4], 0).astype(np.int8)
+
+    def options_signals(self, option_types, volatilities):
+        """Vectorized options_trading_strategy; option_types are 'call'/'put' strings."""
+        calls = _choice_mask(option_types, ('call', 'put'), "Option type")
+        active = np.asarray(volatilities, dtype=np.float64) > self.risk_parameters['volatility_threshold']
+        return np.where(active, np.where(calls, 1, 2), 0).astype(np.int8)
+
+    def swap_signals(self, expected_rates, current_rates):
+        """Vectorized swap_trading_strategy."""
+        expected = np.asarray(expected_rates, dtype=np.float64)
+        current = np.asarray(current_rates, dtype=np.float64)
+        return np.select([expected > current, expected < current], [1, 2], 0).astype(np.int8)
+
+    @staticmethod
+    def labels(codes, actions):
+        """Translate action codes back to the per-position method labels, e.g. labels(codes, FUTURES_ACTIONS)."""
+        return np.asarray(actions, dtype=object)[codes]
+
+def benchmark_batch(n_positions=100000, repeats=5, seed=0):
+    """Return positions judged per second by the per-position futures/swap methods and by the batch API."""
+    rng = np.random.default_rng(seed)
+    risk_parameters = {'volatility_threshold': 0.25, 'profit_target': 160, 'stop_loss_limit': 145}
+    positions = rng.choice(['long', 'short'], n_positions)
+    prices = rng.normal(150, 10, n_positions)
+    targets, stops = prices * rng.uniform(0.9, 1.1, n_positions), prices * rng.uniform(0.9, 1.1, n_positions)
+    expected, current = rng.normal(0.03, 0.01, n_positions), rng.normal(0.03, 0.01, n_positions)
+    batch = DerivativesBatch(risk_parameters)
+
+    def scalar():
+        for i in range(n_positions):
+            strategy = DerivativesStrategy({}, risk_parameters, {'target_price': targets[i], 'stop_loss': stops[i]})
+            strategy.futures_trading_strategy(positions[i], prices[i])
+            strategy.swap_trading_strategy(expected[i], current[i])
+
+    def vectorized():
+        batch.futures_signals(positions, prices, targets, stops)
+        batch.swap_signals(expected, current)
+
+    rates = {}
+    for name, func, runs in (('per_position', scalar, 1), ('batch', vectorized, repeats)):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        rates[name] = n_positions / min(timings)
+    return rates
+
 # Example usage
 if __name__ == "__main__":
     market_data = {"AAPL": {"current_price": 150, "volatility": 0.3}}
@@ -96,3 +188,9 @@ if __name__ == "__main__":
     print(strategy.futures_trading_strategy('long', market_data["AAPL"]["current_price"]))
     print(strategy.options_trading_strategy('call', 150))
     print(strategy.swap_trading_strategy(1.5, 1.2))
+
+    batch = DerivativesBatch(risk_params)
+    codes = batch.futures_signals(['long', 'short', 'long'], [150, 150, 140], [160, 140, 160], [145, 155, 145])
+    print(DerivativesBatch.labels(codes, FUTURES_ACTIONS))
+    for name, per_second in benchmark_batch().items():
+        print(f"{name:>12}: {per_second:14,.0f} positions/s")
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import logging
+import socket
+import threading
+import time
+import numpy as np
+
+from models.predict import to_bars, to_windows
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class ModelServer:
+    def __init__(self, predictor, host='127.0.0.1', port=8765, unix_path=None, max_batch_size=256, max_wait_ms=5):
+        """
+        Serve one warm predictor (model and scaler loaded once) to many local clients.
+        Concurrent requests are merged into micro-batches of up to max_batch_size windows; a batch is
+        sent as soon as it is full or max_wait_ms after its first request arrived. batches_run, rows_served
+        and largest_batch count what the batcher has done.
+        Protocol: one JSON object per line, {"id": ..., "windows": [window, ...]}, each window being the
+        predictor's lookback bars (oldest first) as lists of values in EXPECTED_FEATURES order.
+        """
+        if max_batch_size <= 0 or max_wait_ms < 0:
+            logging.error("Batch size must be positive and max wait non-negative.")
+            raise ValueError("Batch size must be positive and max wait non-negative.")
+        self.predictor = predictor
+        self.lookback = predictor.window_builder.lookback
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = None
+        self.server = None
+        self.batches_run = 0
+        self.rows_served = 0
+        self.largest_batch = 0
+
+    @classmethod
+    def from_paths(cls, model_path, scaler_path, lookback=20, **kwargs):
+        from models.predict import StockPricePredictor
+        return cls(StockPricePredictor(model_path, scaler_path, lookback), **kwargs)
+
+    async def _handle_client(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = None
+                try:
+                    request = json.loads(line)
+                    windows = request['windows']
+                    windows, _ = to_windows(windows, range(len(windows)), self.lookback)
+                    futures = []
+                    for window in windows:
+                        future = loop.create_future()
+                        await self.queue.put((window, future))
+                        futures.append(future)
+                    predictions = await asyncio.gather(*futures)
+                    response = {'id': request.get('id'), 'predictions': predictions}
+                except Exception as e:
+                    logging.error(f"Model server request failed: {e}")
+                    response = {'id': request.get('id') if isinstance(request, dict) else None, 'error': str(e)}
+                writer.write((json.dumps(response) + '\n').encode())
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def _collect_batch(self):
+        """Wait for the first request, then gather more until the batch is full or the deadline passes."""
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            features = np.stack([window for window, _ in batch])
+            try:
+                # Runs in a worker thread so the loop keeps accepting requests during the forward pass
+                predictions = await loop.run_in_executor(None, self.predictor.predict_batch, features, list(range(len(batch))))
+                for i, (_, future) in enumerate(batch):
+                    if not future.done():
+                        future.set_result(predictions[i])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            self.batches_run += 1
+            self.rows_served += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+
+    async def serve(self, ready=None):
+        self.queue = asyncio.Queue()
+        if self.unix_path:
+            self.server = await asyncio.start_unix_server(self._handle_client, path=self.unix_path)
+        else:
+            self.server = await asyncio.start_server(self._handle_client, self.host, self.port)
+            self.port = self.server.sockets[0].getsockname()[1]  # Resolves port 0 to the bound port
+        batcher = asyncio.create_task(self._batcher())
+        logging.info(f"Model server listening on {self.unix_path or f'{self.host}:{self.port}'}")
+        if ready is not None:
+            ready.set()
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            batcher.cancel()
+
+    def run(self):
+        asyncio.run(self.serve())
+
+    def start_in_thread(self):
+        """Start serving on a background thread and return once the socket is listening."""
+        ready = threading.Event()
+        thread = threading.Thread(target=lambda: asyncio.run(self.serve(ready)), daemon=True)
+        thread.start()
+        ready.wait()
+        return thread
+
+class ModelClient:
+    def __init__(self, host='127.0.0.1', port=8765, unix_path=None, timeout=5, lookback=20):
+        """
+        Thin client stub for ModelServer with the same predict() and predict_batch() signatures as
+        StockPricePredictor. lookback must match the served model. Keeps one persistent connection;
+        safe to share between threads.
+        """
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.timeout = timeout
+        self.lookback = lookback
+        self.sock = None
+        self.reader = None
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def _connect(self):
+        if self.unix_path:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(self.unix_path)
+        else:
+            self.sock = socket.create_connection((self.host, self.port))
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.settimeout(self.timeout)
+        self.reader = self.sock.makefile('rb')
+
+    def predict(self, input_data):
+        """Predict for the last bar of a DataFrame of one symbol's recent bars (see to_bars)."""
+        windows, _ = to_windows({None: to_bars(input_data, self.lookback)}, None, self.lookback)
+        return self._request(windows)
+
+    def predict_batch(self, features, symbols=None):
+        """{symbol: DataFrame of recent bars} or (symbols x lookback x features) windows -> {symbol: prediction}."""
+        windows, symbols = to_windows(features, symbols, self.lookback)
+        return dict(zip(symbols, self._request(windows).tolist()))
+
+    def _request(self, windows):
+        with self._lock:
+            if self.sock is None:
+                self._connect()
+            self._next_id += 1
+            request = {'id': self._next_id, 'windows': windows.tolist()}
+            try:
+                self.sock.sendall((json.dumps(request) + '\n').encode())
+                response = json.loads(self.reader.readline())
+            except (OSError, ValueError):
+                self.close()
+                raise
+        if 'error' in response:
+            logging.error(f"Prediction error: {response['error']}")
+            raise RuntimeError(response['error'])
+        return np.array(response['predictions'], dtype=np.float32)
+
+    def close(self):
+        if self.sock is not None:
+            self.reader.close()
+            self.sock.close()
+            self.sock = None
+
+# Usage example
+if __name__ == "__main__":
+    from utilities.config import Config
+
+    server = ModelServer.from_paths(Config.MODEL_PATH, Config.SCALER_PATH, Config.LOOKBACK, host=Config.MODEL_SERVER_HOST,
+                                    port=Config.MODEL_SERVER_PORT, max_batch_size=Config.MODEL_SERVER_MAX_BATCH_SIZE,
+                                    max_wait_ms=Config.MODEL_SERVER_MAX_WAIT_MS)
+    server.run()
@@ -0,0 +1,174 @@
+import logging
+import time
+import numpy as np
+
+from models.predict import EXPECTED_FEATURES, to_bars, to_windows
+from models.windows import WindowBuilder
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+ACTIVATIONS = {
+    'relu': lambda x: np.maximum(x, 0),
+    'linear': lambda x: x,
+    'tanh': np.tanh,
+    'sigmoid': lambda x: 1 / (1 + np.exp(-x)),
+}
+
+def export_model(model, scaler, path):
+    """
+    Freeze the dual-input Keras model built by ModelTrainer.build_model, plus its scaler,
+    into a float32 .npz artifact that NumpyStockPricePredictor runs without TensorFlow.
+    Dropout layers are inference no-ops and are dropped.
+    """
+    layers = {layer.name: layer for layer in model.layers}
+    output_layer = model.layers[-1]
+    dense_layers = [layer for layer in model.layers if type(layer).__name__ == 'Dense' and layer is not output_layer]
+    lstm_layers = [layer for layer in model.layers if type(layer).__name__ == 'LSTM']
+    if len(lstm_layers) != 1 or type(output_layer).__name__ != 'Dense':
+        raise ValueError("Model must have the ModelTrainer layout: Dense stack + one LSTM into a Dense output")
+    lstm = lstm_layers[0]
+
+    # Chain the feed-forward Dense layers from the main input onwards
+    n_features = layers['main_input'].output.shape[-1] if 'main_input' in layers else len(EXPECTED_FEATURES)
+    chain, width = [], n_features
+    remaining = list(dense_layers)
+    while remaining:
+        layer = next((layer for layer in remaining if layer.get_weights()[0].shape[0] == width), None)
+        if layer is None:
+            break
+        chain.append(layer)
+        remaining.remove(layer)
+        width = layer.get_weights()[0].shape[1]
+
+    arrays = {
+        'features': np.array(EXPECTED_FEATURES),
+        'scaler_mean': np.asarray(scaler.mean_, dtype=np.float32),
+        'scaler_scale': np.asarray(scaler.scale_, dtype=np.float32),
+        'dense_activations': np.array([layer.get_config()['activation'] for layer in chain]),
+        'lstm_activation': np.array(lstm.get_config()['activation']),
+        'lstm_recurrent_activation': np.array(lstm.get_config()['recurrent_activation']),
+    }
+    for i, layer in enumerate(chain):
+        kernel, bias = layer.get_weights()
+        arrays[f'dense_{i}_kernel'] = np.ascontiguousarray(kernel, dtype=np.float32)
+        arrays[f'dense_{i}_bias'] = np.asarray(bias, dtype=np.float32)
+    kernel, recurrent_kernel, bias = lstm.get_weights()
+    arrays['lstm_kernel'] = np.ascontiguousarray(kernel, dtype=np.float32)
+    arrays['lstm_recurrent_kernel'] = np.ascontiguousarray(recurrent_kernel, dtype=np.float32)
+    arrays['lstm_bias'] = np.asarray(bias, dtype=np.float32)
+    kernel, bias = output_layer.get_weights()
+    arrays['output_kernel'] = np.ascontiguousarray(kernel, dtype=np.float32)
+    arrays['output_bias'] = np.asarray(bias, dtype=np.float32)
+    arrays['output_activation'] = np.array(output_layer.get_config()['activation'])
+
+    np.savez(path, **arrays)
+    logging.info(f"Exported NumPy runtime artifact to {path}.")
+
+class NumpyStockPricePredictor:
+    def __init__(self, artifact_path, lookback=20):
+        """
+        Drop-in replacement for StockPricePredictor that runs an exported artifact with plain NumPy matmuls.
+        Does not import TensorFlow.
+        """
+        self.window_builder = WindowBuilder(lookback)
+        artifact = np.load(artifact_path)
+        self.features = list(artifact['features'])
+        if self.features != EXPECTED_FEATURES:
+            raise ValueError(f"Artifact was exported for features {self.features}")
+        self.scaler_mean = artifact['scaler_mean']
+        self.scaler_scale = artifact['scaler_scale']
+        activations = list(artifact['dense_activations'])
+        self.dense = [(artifact[f'dense_{i}_kernel'], artifact[f'dense_{i}_bias'], ACTIVATIONS[activation])
+                      for i, activation in enumerate(activations)]
+        self.lstm_kernel = artifact['lstm_kernel']
+        self.lstm_recurrent_kernel = artifact['lstm_recurrent_kernel']
+        self.lstm_bias = artifact['lstm_bias']
+        self.lstm_activation = ACTIVATIONS[str(artifact['lstm_activation'])]
+        self.lstm_recurrent_activation = ACTIVATIONS[str(artifact['lstm_recurrent_activation'])]
+        self.output_kernel = artifact['output_kernel']
+        self.output_bias = artifact['output_bias']
+        self.output_activation = ACTIVATIONS[str(artifact['output_activation'])]
+
+    def _lstm(self, sequences):
+        """Keras LSTM forward pass (gate order i, f, c, o) returning the last hidden state."""
+        batch, steps, _ = sequences.shape
+        units = self.lstm_recurrent_kernel.shape[0]
+        # Project every time step's input in one matmul, leaving only the recurrent part in the loop
+        projected = sequences @ self.lstm_kernel + self.lstm_bias
+        h = np.zeros((batch, units), dtype=np.float32)
+        c = np.zeros((batch, units), dtype=np.float32)
+        for t in range(steps):
+            z = projected[:, t] + h @ self.lstm_recurrent_kernel
+            i = self.lstm_recurrent_activation(z[:, :units])
+            f = self.lstm_recurrent_activation(z[:, units:2 * units])
+            g = self.lstm_activation(z[:, 2 * units:3 * units])
+            o = self.lstm_recurrent_activation(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * self.lstm_activation(c)
+        return h
+
+    def forward(self, ff_input, lstm_input):
+        """Run the model on already scaled inputs: ff_input (batch, features), lstm_input (batch, steps, features)."""
+        x = ff_input
+        for kernel, bias, activation in self.dense:
+            x = activation(x @ kernel + bias)
+        merged = np.concatenate([x, self._lstm(lstm_input)], axis=1)
+        return self.output_activation(merged @ self.output_kernel + self.output_bias)
+
+    def scale(self, features):
+        return ((np.asarray(features, dtype=np.float32) - self.scaler_mean) / self.scaler_scale).astype(np.float32)
+
+    def predict(self, input_data):
+        """Make predictions for a DataFrame of recent bars (see to_bars), like StockPricePredictor.predict."""
+        input_data = to_bars(input_data, self.window_builder.lookback)
+        missing = set(EXPECTED_FEATURES) - set(input_data.columns)
+        if missing:
+            logging.error(f"Missing features in input data: {missing}")
+            raise ValueError(f"Missing features: {missing}")
+        scaled = self.scale(input_data[EXPECTED_FEATURES].to_numpy())
+        return self.forward(*self.window_builder.latest(scaled)).flatten()
+
+    def predict_batch(self, features, symbols=None):
+        """Same contract as StockPricePredictor.predict_batch, returns {symbol: prediction}."""
+        windows, symbols = to_windows(features, symbols, self.window_builder.lookback)
+        windows = self.scale(windows)
+        return dict(zip(symbols, self.forward(windows[:, -1], windows).reshape(-1).tolist()))
+
+def compare_with_keras(keras_model, runtime, n_rows=256, repeats=20):
+    """Return the largest prediction difference and best latencies (seconds) of Keras vs the NumPy runtime."""
+    rng = np.random.default_rng(0)
+    lookback = runtime.window_builder.lookback
+    windows = rng.normal(size=(n_rows, lookback, len(EXPECTED_FEATURES))).astype(np.float32)
+    inputs = [windows[:, -1], windows]
+    expected = np.asarray(keras_model(inputs, training=False))
+    actual = runtime.forward(*inputs)
+
+    def best_time(func):
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    return {
+        'max_abs_diff': float(np.max(np.abs(expected - actual))),
+        'keras_predict_s': best_time(lambda: keras_model.predict(inputs, verbose=0)),
+        'keras_call_s': best_time(lambda: keras_model(inputs, training=False)),
+        'numpy_s': best_time(lambda: runtime.forward(*inputs)),
+    }
+
+# Usage example
+if __name__ == "__main__":
+    from keras.models import load_model
+    import joblib
+    from utilities.config import Config
+
+    keras_model = load_model(Config.MODEL_PATH)
+    export_model(keras_model, joblib.load(Config.SCALER_PATH), Config.RUNTIME_ARTIFACT_PATH)
+    runtime = NumpyStockPricePredictor(Config.RUNTIME_ARTIFACT_PATH)
+    for n_rows in (1, 64, 1024):
+        report = compare_with_keras(keras_model, runtime, n_rows)
+        print(f"rows={n_rows:>5} max|diff|={report['max_abs_diff']:.2e} predict={report['keras_predict_s'] * 1e3:.2f}ms "
+              f"call={report['keras_call_s'] * 1e3:.2f}ms numpy={report['numpy_s'] * 1e3:.2f}ms")
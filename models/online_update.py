@@ -1,53 +1,69 @@
 import pandas as pd
 import numpy as np
-from keras.models import load_model
-from keras.preprocessing.sequence import TimeseriesGenerator
-from sklearn.preprocessing import StandardScaler
-import joblib
 import logging
+import threading
+import time
+
+from models.predict import EXPECTED_FEATURES, to_windows
+from models.windows import WindowBuilder
 
 # Setup basic configuration for logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 class ModelUpdater:
-    def __init__(self, model_path, scaler_path):
-        # Load the existing trained model and scaler
-        self.model = load_model(model_path)
+    def __init__(self, model_path, scaler_path, lookback=20, learning_rate=1e-4):
+        # Load the existing trained model and scaler; Keras is imported here rather than at module import
+        from keras.models import load_model
+        from keras.optimizers import Adam
+        # Recompiled with a fresh optimizer: optimizer state restored from .h5 files cannot take new steps
+        self.model = load_model(model_path, compile=False)
+        self.model.compile(optimizer=Adam(learning_rate=learning_rate), loss='mean_squared_error')
         self.scaler = self.load_scaler(scaler_path)
+        self.window_builder = WindowBuilder(lookback)
 
     def load_scaler(self, scaler_path):
         """Load the scaler used in the training phase."""
+        import joblib
         return joblib.load(scaler_path)
 
     def preprocess_data(self, new_data):
-        """Preprocess new incoming data to be fed into the model for online updates."""
+        """
+        Preprocess consecutive bars of one symbol (oldest first) into model inputs.
+        Returns (ff_input, lstm_input, ends): one sample per bar that ends a full lookback window.
+        """
         if isinstance(new_data, dict):  # If data is provided as a dictionary
             new_data = pd.DataFrame([new_data])  # Convert to DataFrame
         elif isinstance(new_data, pd.DataFrame):
             pass  # Use the DataFrame as is
         else:
             raise ValueError("Input data should be a dictionary or a pandas DataFrame.")
-        
+
         self.validate_data(new_data)
 
-        features = new_data.select_dtypes(include=[np.number])  # Selecting numeric columns for scaling
-        features_scaled = self.scaler.transform(features)
-        return features_scaled.reshape(1, features_scaled.shape[0], 1)  # Reshape for LSTM
+        features_scaled = np.ascontiguousarray(self.scaler.transform(new_data[EXPECTED_FEATURES]), dtype=np.float32)
+        ends = self.window_builder.valid_ends(len(features_scaled))
+        ff_input, lstm_input = self.window_builder.gather(features_scaled, ends)
+        return ff_input, lstm_input, ends
 
     def validate_data(self, new_data):
         """Validate new data for expected formats and completeness."""
-        required_columns = ['Feature1', 'Feature2', 'Feature3', 'Feature4']
-        if not all(col in new_data.columns for col in required_columns):
-            missing = list(set(required_columns) - set(new_data.columns))
+        if not all(col in new_data.columns for col in EXPECTED_FEATURES):
+            missing = list(set(EXPECTED_FEATURES) - set(new_data.columns))
             logging.error("Missing columns: %s", missing)
             raise ValueError(f"Missing columns: {missing}")
 
     def update_model(self, new_data, new_labels, batch_size=10):
-        """Update the model incrementally with new data in batches."""
+        """
+        Update the model incrementally with new data in batches. new_labels holds one label per row
+        of new_data; rows without a full lookback window before them are skipped.
+        """
         try:
-            preprocessed_data = self.preprocess_data(new_data)
-            # Assuming new_labels are provided in the same batch structure
-            self.model.fit(preprocessed_data, new_labels, epochs=1, batch_size=batch_size)
+            ff_input, lstm_input, ends = self.preprocess_data(new_data)
+            labels = np.asarray(new_labels, dtype=np.float32).reshape(-1)[ends]
+            # train_on_batch runs one optimizer step without fit()'s per-call training loop setup
+            for start in range(0, len(ends), batch_size):
+                batch = slice(start, start + batch_size)
+                self.model.train_on_batch([ff_input[batch], lstm_input[batch]], labels[batch])
             logging.info("Model updated successfully.")
         except Exception as e:
             logging.error("Failed to update model: %s", e)
@@ -58,17 +74,228 @@ class ModelUpdater:
         self.model.save(new_model_path)
         logging.info("Updated model saved successfully.")
 
+class ReplayBuffer:
+    def __init__(self, capacity, n_features, lookback):
+        """
+        Fixed-capacity ring buffer of labelled (ff_input, lstm_input, label) samples shared by all symbols.
+        Once full, the oldest samples are overwritten. Storage is preallocated; nothing is allocated per sample.
+        """
+        self.capacity = capacity
+        self.ff_inputs = np.zeros((capacity, n_features), dtype=np.float32)
+        self.lstm_inputs = np.zeros((capacity, lookback, n_features), dtype=np.float32)
+        self.labels = np.zeros(capacity, dtype=np.float32)
+        self.size = 0
+        self.position = 0
+        self.total_added = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    def add_many(self, ff_inputs, lstm_inputs, labels):
+        """Append a block of samples, wrapping around the end of the buffer."""
+        with self._lock:
+            for start in range(0, len(labels), self.capacity):
+                ff, lstm, y = (array[start:start + self.capacity] for array in (ff_inputs, lstm_inputs, labels))
+                slots = (self.position + np.arange(len(y))) % self.capacity
+                self.ff_inputs[slots], self.lstm_inputs[slots], self.labels[slots] = ff, lstm, y
+                self.position = (self.position + len(y)) % self.capacity
+                self.size = min(self.size + len(y), self.capacity)
+                self.total_added += len(y)
+
+    def sample(self, batch_size, rng):
+        """Return a uniformly sampled batch (with replacement, so it always has batch_size rows)."""
+        with self._lock:
+            slots = rng.integers(0, self.size, size=batch_size)
+            return self.ff_inputs[slots], self.lstm_inputs[slots], self.labels[slots]
+
+class OnlineUpdateService:
+    def __init__(self, updater, buffer_capacity=50000, batch_size=64, steps_per_update=4,
+                 min_new_samples=256, interval_seconds=300, seed=None, feature_columns=None):
+        """
+        Background online learning for the live model. Labelled samples from every symbol go into one
+        replay buffer; a worker thread runs steps_per_update train_on_batch steps of exactly batch_size
+        samples once min_new_samples new samples have arrived or interval_seconds have passed.
+        feature_columns maps each model feature to the bar column that feeds it (e.g.
+        Config.MODEL_FEATURE_COLUMNS); by default the bars must carry the feature columns themselves.
+
+        Inference never runs on the model being trained. Two inference copies are kept (double buffering):
+        new weights are written into the idle copy, which is then swapped in with a single reference
+        assignment, so predictions see either the old or the new weights and never wait for a fit.
+        """
+        from keras.models import clone_model
+
+        self.updater = updater
+        self.window_builder = updater.window_builder
+        self.feature_columns = dict(feature_columns or {feature: feature for feature in EXPECTED_FEATURES})
+        self.batch_size = batch_size
+        self.steps_per_update = steps_per_update
+        self.min_new_samples = min_new_samples
+        self.interval_seconds = interval_seconds
+        self.buffer = ReplayBuffer(buffer_capacity, len(EXPECTED_FEATURES), self.window_builder.lookback)
+        self.rng = np.random.default_rng(seed)
+
+        self._buffers = [clone_model(updater.model), clone_model(updater.model)]
+        for model in self._buffers:
+            model.set_weights(updater.model.get_weights())
+        self._front = 0
+        self._readers = [0, 0]
+        self._readers_done = threading.Condition()
+
+        self._last_labelled = {}  # Timestamp of the last bar that produced a sample, per symbol
+        self._trained_through = 0  # buffer.total_added at the last update
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.updates_run = 0
+        self.weights_version = 0
+
+    @classmethod
+    def from_paths(cls, model_path, scaler_path, lookback=20, **kwargs):
+        return cls(ModelUpdater(model_path, scaler_path, lookback), **kwargs)
+
+    def add_samples(self, features, labels):
+        """
+        Add every full window of consecutive bars of one symbol (oldest first) with one label per bar.
+        Returns the number of samples added.
+        """
+        ff_input, lstm_input, ends = self.updater.preprocess_data(features)
+        labels = np.asarray(labels, dtype=np.float32).reshape(-1)[ends]
+        self._add(ff_input, lstm_input, labels)
+        return len(ends)
+
+    def _add(self, ff_input, lstm_input, labels):
+        self.buffer.add_many(ff_input, lstm_input, labels)
+        if self.buffer.total_added - self._trained_through >= self.min_new_samples:
+            self._wake.set()
+
+    def add_bars(self, symbol, bars, target_column='Close', time_column='Timestamp'):
+        """
+        Label the bars of one symbol with the next bar's target_column and add the windows not seen before.
+        Bars are told apart by time_column, so overlapping (e.g. sliding) windows of bars are only added once.
+        Windows with a missing value (e.g. indicators still warming up) are skipped. The most recent bar
+        has no label yet and is picked up on a later call. Returns the number of samples added.
+        """
+        missing = [column for column in [*self.feature_columns.values(), target_column, time_column]
+                   if column not in bars.columns]
+        if missing:
+            logging.error("Missing columns: %s", missing)
+            raise ValueError(f"Missing columns: {missing}")
+        features = pd.DataFrame({feature: bars[column].to_numpy(dtype=np.float64)
+                                 for feature, column in self.feature_columns.items()})[EXPECTED_FEATURES]
+        labels = bars[target_column].shift(-1).to_numpy(dtype=np.float32)
+        timestamps = bars[time_column].to_numpy()
+
+        ends = self.window_builder.valid_ends(len(bars) - 1)  # Every bar but the last has its next-bar label
+        last = self._last_labelled.get(symbol)
+        if last is not None:
+            ends = ends[timestamps[ends] > last]
+        if len(ends) == 0:
+            return 0
+        self._last_labelled[symbol] = timestamps[ends[-1]]
+        # A window is usable when none of its bars has a missing feature and its label is known
+        invalid = np.concatenate([[0], np.cumsum(features.isna().any(axis=1).to_numpy())])
+        lookback = self.window_builder.lookback
+        ends = ends[(invalid[ends + 1] == invalid[ends + 1 - lookback]) & np.isfinite(labels[ends])]
+        if len(ends) == 0:
+            return 0
+
+        first = ends[0] - (lookback - 1)
+        scaled = np.ascontiguousarray(self.updater.scaler.transform(features.iloc[first:ends[-1] + 1]), dtype=np.float32)
+        ff_input, lstm_input = self.window_builder.gather(scaled, ends - first)
+        self._add(ff_input, lstm_input, labels[ends])
+        return len(ends)
+
+    def update_now(self):
+        """Run one update (if there is enough data) and publish the new weights. Returns True if it ran."""
+        if len(self.buffer) < self.batch_size:
+            return False
+        self._trained_through = self.buffer.total_added
+        for _ in range(self.steps_per_update):
+            ff_input, lstm_input, labels = self.buffer.sample(self.batch_size, self.rng)
+            self.updater.model.train_on_batch([ff_input, lstm_input], labels)
+        self.publish_weights()
+        self.updates_run += 1
+        return True
+
+    def publish_weights(self):
+        """Copy the trained weights into the idle inference model and swap it in."""
+        back = 1 - self._front
+        with self._readers_done:
+            # A prediction that picked this copy up before the last swap may still be running on it
+            self._readers_done.wait_for(lambda: self._readers[back] == 0)
+            self._buffers[back].set_weights(self.updater.model.get_weights())
+            self._front = back
+        self.weights_version += 1
+
+    def _acquire(self):
+        with self._readers_done:
+            index = self._front
+            self._readers[index] += 1
+        return index
+
+    def _release(self, index):
+        with self._readers_done:
+            self._readers[index] -= 1
+            self._readers_done.notify_all()
+
+    def predict_batch(self, features, symbols=None):
+        """
+        Predict with the currently published weights. features is {symbol: DataFrame of recent bars} or
+        (symbols x lookback x features) windows, like StockPricePredictor.predict_batch.
+        """
+        windows, symbols = to_windows(features, symbols, self.updater.window_builder.lookback)
+        windows = np.ascontiguousarray(
+            self.updater.scaler.transform(pd.DataFrame(windows.reshape(-1, windows.shape[-1]), columns=EXPECTED_FEATURES)),
+            dtype=np.float32).reshape(windows.shape)
+        index = self._acquire()
+        try:
+            output = self._buffers[index]([windows[:, -1], windows], training=False)
+        finally:
+            self._release(index)
+        return dict(zip(symbols, np.asarray(output).reshape(-1).tolist()))
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval_seconds)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                start = time.perf_counter()
+                if self.update_now():
+                    logging.info(f"Online update {self.updates_run} published in {time.perf_counter() - start:.3f}s "
+                                 f"({len(self.buffer)} samples buffered).")
+            except Exception as e:
+                logging.error(f"Online update failed: {e}")
+
+    def start(self):
+        """Start the background update thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='online-update', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
 # Usage example
 if __name__ == "__main__":
-    updater = ModelUpdater('path_to_existing_model.h5', 'path_to_scaler.pkl')
-    # Example new data and labels for the update
-    new_data = {
-        'Feature1': 0.6,
-        'Feature2': -0.2,
-        'Feature3': 3.7,
-        'Feature4': 1.3
-    }
-    new_labels = np.array([[120.5]])  # Example new target value reshaped for LSTM
-
-    updater.update_model(new_data, new_labels)
-    updater.save_updated_model('path_to_updated_model.h5')
\ No newline at end of file
+    service = OnlineUpdateService.from_paths('path_to_existing_model.h5', 'path_to_scaler.pkl',
+                                             min_new_samples=64, interval_seconds=60).start()
+    # Example bars for two symbols; each bar is labelled with the next bar's close
+    rng = np.random.default_rng(0)
+    for symbol in ('AAPL', 'MSFT'):
+        bars = pd.DataFrame(rng.normal(size=(200, len(EXPECTED_FEATURES))), columns=EXPECTED_FEATURES)
+        bars['Close'] = 100 + bars['Feature1'].cumsum()
+        bars['Timestamp'] = 1700000000 + 86400 * np.arange(len(bars))
+        print(symbol, "samples added:", service.add_bars(symbol, bars))
+
+    service.update_now()
+    print(service.predict_batch(rng.normal(size=(2, service.updater.window_builder.lookback, len(EXPECTED_FEATURES))), ['AAPL', 'MSFT']))
+    service.stop()
+    service.updater.save_updated_model('path_to_updated_model.h5')
@@ -0,0 +1,167 @@
+import logging
+import numpy as np
+from scipy.special import ndtr
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Every function broadcasts its inputs, so one call prices a whole chain (strikes x expiries x underlyings).
+# expiry is in years, rate and dividend_yield are continuously compounded, volatility is annualized.
+
+def _is_call(option_type):
+    """Boolean array from 'call'/'put' strings (scalar or array) or booleans."""
+    option_type = np.asarray(option_type)
+    if option_type.dtype == bool:
+        return option_type
+    lowered = np.char.lower(option_type.astype(str))
+    if not np.all((lowered == 'call') | (lowered == 'put')):
+        logging.error("Option type must be 'call' or 'put'.")
+        raise ValueError("Option type must be 'call' or 'put'.")
+    return lowered == 'call'
+
+def _norm_pdf(x):
+    return np.exp(-0.5 * x * x) / np.sqrt(2 * np.pi)
+
+def _d1_d2(spot, strike, expiry, rate, volatility, dividend_yield):
+    sqrt_t = np.sqrt(expiry)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1 = (np.log(spot / strike) + (rate - dividend_yield + 0.5 * volatility ** 2) * expiry) / (volatility * sqrt_t)
+    return d1, d1 - volatility * sqrt_t
+
+def black_scholes_price(spot, strike, expiry, rate, volatility, option_type='call', dividend_yield=0.0):
+    """European option prices. At expiry (or zero volatility) the discounted intrinsic value is returned."""
+    spot, strike, expiry, rate, volatility, dividend_yield = np.broadcast_arrays(
+        *(np.asarray(x, dtype=np.float64) for x in (spot, strike, expiry, rate, volatility, dividend_yield)))
+    is_call = np.broadcast_to(_is_call(option_type), spot.shape)
+    d1, d2 = _d1_d2(spot, strike, expiry, rate, volatility, dividend_yield)
+    forward_discount = np.exp(-dividend_yield * expiry)
+    discount = np.exp(-rate * expiry)
+    call = spot * forward_discount * ndtr(d1) - strike * discount * ndtr(d2)
+    put = strike * discount * ndtr(-d2) - spot * forward_discount * ndtr(-d1)
+    price = np.where(is_call, call, put)
+
+    degenerate = (expiry <= 0) | (volatility <= 0)
+    if np.any(degenerate):
+        forward_value = spot * forward_discount - strike * discount
+        intrinsic = np.where(is_call, np.maximum(forward_value, 0.0), np.maximum(-forward_value, 0.0))
+        price = np.where(degenerate, intrinsic, price)
+    return price
+
+def black_scholes_greeks(spot, strike, expiry, rate, volatility, option_type='call', dividend_yield=0.0):
+    """
+    European Greeks as a dict of arrays: delta, gamma, vega (per 1.00 of volatility),
+    theta (per year) and rho (per 1.00 of rate). Undefined at expiry or zero volatility (NaN).
+    """
+    spot, strike, expiry, rate, volatility, dividend_yield = np.broadcast_arrays(
+        *(np.asarray(x, dtype=np.float64) for x in (spot, strike, expiry, rate, volatility, dividend_yield)))
+    is_call = np.broadcast_to(_is_call(option_type), spot.shape)
+    d1, d2 = _d1_d2(spot, strike, expiry, rate, volatility, dividend_yield)
+    sqrt_t = np.sqrt(expiry)
+    forward_discount = np.exp(-dividend_yield * expiry)
+    discount = np.exp(-rate * expiry)
+    pdf_d1 = _norm_pdf(d1)
+    sign = np.where(is_call, 1.0, -1.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        delta = forward_discount * np.where(is_call, ndtr(d1), ndtr(d1) - 1)
+        gamma = forward_discount * pdf_d1 / (spot * volatility * sqrt_t)
+        vega = spot * forward_discount * pdf_d1 * sqrt_t
+        theta = (-spot * forward_discount * pdf_d1 * volatility / (2 * sqrt_t)
+                 - sign * rate * strike * discount * ndtr(sign * d2)
+                 + sign * dividend_yield * spot * forward_discount * ndtr(sign * d1))
+        rho = sign * strike * expiry * discount * ndtr(sign * d2)
+    return {'delta': delta, 'gamma': gamma, 'vega': vega, 'theta': theta, 'rho': rho}
+
+def binomial_price(spot, strike, expiry, rate, volatility, option_type='call', dividend_yield=0.0,
+                   steps=200, american=True):
+    """
+    Cox-Ross-Rubinstein tree prices, American (early exercise) by default. All contracts are rolled back
+    together: each of the steps iterations is one vectorized update over every contract's tree level.
+    """
+    spot, strike, expiry, rate, volatility, dividend_yield = np.broadcast_arrays(
+        *(np.asarray(x, dtype=np.float64) for x in (spot, strike, expiry, rate, volatility, dividend_yield)))
+    shape = spot.shape
+    is_call = np.broadcast_to(_is_call(option_type), shape).reshape(-1, 1)
+    spot, strike, expiry, rate, volatility, dividend_yield = (
+        x.reshape(-1, 1) for x in (spot, strike, expiry, rate, volatility, dividend_yield))
+
+    dt = np.maximum(expiry, 1e-12) / steps
+    up = np.exp(np.maximum(volatility, 1e-12) * np.sqrt(dt))
+    down = 1 / up
+    growth = np.exp((rate - dividend_yield) * dt)
+    p_up = np.clip((growth - down) / (up - down), 0.0, 1.0)
+    step_discount = np.exp(-rate * dt)
+    sign = np.where(is_call, 1.0, -1.0)
+
+    # Terminal level: node j has j down moves
+    j = np.arange(steps + 1)
+    prices = spot * up ** (steps - j) * down ** j
+    values = np.maximum(sign * (prices - strike), 0.0)
+    for level in range(steps - 1, -1, -1):
+        values = step_discount * (p_up * values[:, :-1] + (1 - p_up) * values[:, 1:])
+        if american:
+            prices = prices[:, :-1] * down
+            values = np.maximum(values, sign * (prices - strike))
+    return values[:, 0].reshape(shape)
+
+def implied_volatility(price, spot, strike, expiry, rate, option_type='call', dividend_yield=0.0,
+                       tol=1e-8, max_iter=100, low=1e-6, high=5.0):
+    """
+    Black-Scholes implied volatility for arrays of quoted prices: Newton steps safeguarded by a bisection
+    bracket [low, high], so every contract converges even where vega is tiny. A contract is done once its
+    volatility is known to within tol (Newton step or bracket width). Prices outside the no-arbitrage
+    bounds (or with no solution in the bracket) give NaN.
+    """
+    price, spot, strike, expiry, rate, dividend_yield = np.broadcast_arrays(
+        *(np.asarray(x, dtype=np.float64) for x in (price, spot, strike, expiry, rate, dividend_yield)))
+    is_call = np.broadcast_to(_is_call(option_type), price.shape)
+
+    lower = black_scholes_price(spot, strike, expiry, rate, low, is_call, dividend_yield)
+    upper = black_scholes_price(spot, strike, expiry, rate, high, is_call, dividend_yield)
+    # A price equal to the bound (e.g. zero to double precision far out of the money) pins down no volatility
+    solvable = (price > lower) & (price < upper) & (expiry > 0)
+
+    lo = np.full(price.shape, low)
+    hi = np.full(price.shape, high)
+    sigma = np.full(price.shape, 0.3)
+    active = solvable.copy()
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        diff = black_scholes_price(spot, strike, expiry, rate, sigma, is_call, dividend_yield) - price
+        vega = black_scholes_greeks(spot, strike, expiry, rate, sigma, is_call, dividend_yield)['vega']
+        # Price is increasing in volatility, so the sign of the error narrows the bracket
+        hi = np.where(active & (diff > 0), sigma, hi)
+        lo = np.where(active & (diff < 0), sigma, lo)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton_step = diff / vega
+        active &= (diff != 0) & (np.abs(newton_step) > tol) & (hi - lo > tol)
+        newton = sigma - newton_step
+        step = np.where((newton > lo) & (newton < hi), newton, 0.5 * (lo + hi))
+        sigma = np.where(active, step, sigma)
+    return np.where(solvable, sigma, np.nan)
+
+# Example usage
+if __name__ == "__main__":
+    import time
+
+    strikes = np.linspace(50, 150, 201)
+    expiries = np.array([7, 14, 30, 60, 90, 180, 365, 730]) / 365
+    strike_grid, expiry_grid = np.meshgrid(strikes, expiries)
+
+    start = time.perf_counter()
+    prices = black_scholes_price(100, strike_grid, expiry_grid, 0.03, 0.25, 'call')
+    greeks = black_scholes_greeks(100, strike_grid, expiry_grid, 0.03, 0.25, 'call')
+    print(f"Black-Scholes price + Greeks for {prices.size} contracts: {(time.perf_counter() - start) * 1e3:.2f}ms")
+
+    start = time.perf_counter()
+    vols = implied_volatility(prices, 100, strike_grid, expiry_grid, 0.03, 'call')
+    identifiable = greeks['vega'] > 1e-6  # Elsewhere the price does not move with volatility in double precision
+    print(f"Implied volatility for {prices.size} contracts: {(time.perf_counter() - start) * 1e3:.2f}ms, "
+          f"max error {np.nanmax(np.abs(vols - 0.25)[identifiable]):.2e}, unsolved {np.isnan(vols[identifiable]).sum()}")
+
+    start = time.perf_counter()
+    american_puts = binomial_price(100, strike_grid, expiry_grid, 0.03, 0.25, 'put', steps=200)
+    european_puts = black_scholes_price(100, strike_grid, expiry_grid, 0.03, 0.25, 'put')
+    print(f"American puts (200-step tree) for {prices.size} contracts: {(time.perf_counter() - start) * 1e3:.2f}ms, "
+          f"max early-exercise premium {np.max(american_puts - european_puts):.4f}")
@@ -1,4 +1,6 @@
 import logging
+import numpy as np
+import pandas as pd
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -57,6 +59,66 @@ class OptionsStrategy:
             logging.error("Error in protective put strategy: %s", e)
             raise
 
+    def screen_chain(self, strikes, expiries, rate=0.0, dividend_yield=0.0, market_prices=None, american=False, steps=200):
+        """
+        Price and screen a whole option chain on this underlying in one vectorized pass instead of one
+        contract at a time. strikes and expiries (in years) broadcast against each other, e.g. a meshgrid.
+        market_prices is an optional {'call': prices, 'put': prices} of quotes in the same shape; without it
+        contracts are valued at the model price using current_volatility.
+
+        Returns one row per contract with price, model price, implied volatility, Greeks (at current_volatility)
+        and the covered_call (calls) / protective_put (puts) rule outcome, action and value, using the
+        contract's own strike and premium.
+        """
+        from models.option_pricing import (black_scholes_price, black_scholes_greeks, binomial_price,
+                                           implied_volatility)
+
+        strikes, expiries = (array.reshape(-1) for array in np.broadcast_arrays(np.asarray(strikes, dtype=np.float64),
+                                                                             np.asarray(expiries, dtype=np.float64)))
+        n = len(strikes)
+        is_call = np.r_[np.ones(n, dtype=bool), np.zeros(n, dtype=bool)]
+        strike, expiry = np.tile(strikes, 2), np.tile(expiries, 2)
+        args = (self.stock_price, strike, expiry, rate, self.current_volatility, is_call, dividend_yield)
+
+        if american:
+            model_price = binomial_price(*args, steps=steps, american=True)
+        else:
+            model_price = black_scholes_price(*args)
+        if market_prices is not None:
+            price = np.r_[np.broadcast_to(market_prices['call'], (n,)).reshape(-1),
+                          np.broadcast_to(market_prices['put'], (n,)).reshape(-1)].astype(np.float64)
+            iv = implied_volatility(price, self.stock_price, strike, expiry, rate, is_call, dividend_yield)
+        else:
+            price = model_price
+            iv = np.full(2 * n, float(self.current_volatility))
+        chain = pd.DataFrame({'option_type': np.where(is_call, 'call', 'put'), 'strike': strike, 'expiry': expiry,
+                              'price': price, 'model_price': model_price, 'implied_volatility': iv})
+        for name, values in black_scholes_greeks(*args).items():
+            chain[name] = values
+
+        # The covered_call and protective_put rules, for every contract at once
+        forecasts = self.model_forecasts or {}
+        chain['action'], chain['value'] = screen_rules(is_call, self.stock_price, strike, price, self.current_volatility,
+                                                       self.risk_appetite, forecasts.get('price_upside', np.nan),
+                                                       forecasts.get('price_downside', np.nan))
+        return chain
+
+def screen_rules(is_call, stock_price, strike_price, premium, current_volatility, risk_appetite, price_upside,
+                 price_downside):
+    """
+    The covered_call (where is_call) and protective_put (elsewhere) rules over arrays of positions at once.
+    Every argument broadcasts; a missing (NaN) forecast means no action, like a missing model_forecasts.
+    Returns the action labels and values (income, or negative cost, for 100 shares per contract).
+    """
+    is_call, stock_price, strike_price, premium, current_volatility, price_upside, price_downside = np.broadcast_arrays(
+        is_call, stock_price, strike_price, np.asarray(premium, dtype=np.float64), current_volatility,
+        np.asarray(price_upside, dtype=np.float64), np.asarray(price_downside, dtype=np.float64))
+    sell_call = is_call & (price_upside < risk_appetite) & (stock_price <= strike_price) & (current_volatility > 0.2)
+    buy_put = ~is_call & (price_downside > risk_appetite) & (stock_price >= strike_price) & (current_volatility > 0.3)
+    actions = np.select([sell_call, buy_put], ["Sell Covered Call", "Buy Protective Put"], "No Action").astype(object)
+    values = np.select([sell_call, buy_put], [premium * 100, -premium * 100], 0.0)
+    return actions, values
+
 # Example usage
 if __name__ == "__main__":
     model_forecasts = {'price_upside': 0.4, 'price_downside': 0.6}
@@ -67,5 +129,8 @@ if __name__ == "__main__":
 
         action, value = strategy.protective_put()
         print(action, value)
+
+        chain = strategy.screen_chain(np.arange(100, 201, 1.0)[None, :], np.array([30, 60, 90, 180])[:, None] / 365, rate=0.03)
+        print(chain[chain['action'] != "No Action"].sort_values('value', ascending=False).head())
     except Exception as e:
         logging.error("Failed to execute strategies: %s", e)
@@ -1,41 +1,46 @@
 import pandas as pd
 import numpy as np
 import logging
-from keras.models import load_model
-from sklearn.preprocessing import StandardScaler
-import joblib
+import time
+
+from models.windows import WindowBuilder
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+EXPECTED_FEATURES = ['Feature1', 'Feature2', 'Feature3', 'Feature4']  # Add or adjust feature names as needed
+
 class StockPricePredictor:
-    def __init__(self, model_path, scaler_path=None):
+    def __init__(self, model_path, scaler_path=None, lookback=20):
+        """lookback must match the one the model was trained with (ModelTrainer's lookback)."""
+        # Keras, scikit-learn and joblib are heavy to import, so they load with the first predictor
+        from keras.models import load_model
+        from sklearn.preprocessing import StandardScaler
+        import joblib
+
         self.model = load_model(model_path)
         if scaler_path:
             self.scaler = joblib.load(scaler_path)  # Load pre-fitted scaler from file if provided
         else:
             self.scaler = StandardScaler()  # Only initialize if no pre-fitted scaler is available
+        self.window_builder = WindowBuilder(lookback)
 
     def preprocess_data(self, data):
-        """Preprocess input data in the same way as during training."""
-        if isinstance(data, dict):  # If data is provided as a dictionary
-            data = pd.DataFrame([data])  # Convert to DataFrame
-        elif isinstance(data, pd.DataFrame):
-            pass  # Use the DataFrame as is
-        else:
-            logging.error("Input data should be a dictionary or a pandas DataFrame.")
-            raise ValueError("Input data should be a dictionary or a pandas DataFrame.")
-        
+        """
+        Preprocess input data in the same way as during training. data is a DataFrame of the recent bars
+        of one symbol, oldest first, at least lookback of them (see to_bars); the prediction is for the last bar.
+        """
+        data = to_bars(data, self.window_builder.lookback)
+
         # Validate that data includes all necessary features
-        expected_features = ['Feature1', 'Feature2', 'Feature3', 'Feature4']  # Add or adjust feature names as needed
-        if not all(feature in data.columns for feature in expected_features):
-            missing = set(expected_features) - set(data.columns)
+        if not all(feature in data.columns for feature in EXPECTED_FEATURES):
+            missing = set(EXPECTED_FEATURES) - set(data.columns)
             logging.error(f"Missing features in input data: {missing}")
             raise ValueError(f"Missing features: {missing}")
         
-        features = data[expected_features]  # Selecting numeric columns for scaling
-        features_scaled = self.scaler.transform(features)  # Use transform instead of fit_transform
-        return features_scaled.reshape(1, -1), features_scaled.reshape(1, features_scaled.shape[0], 1)  # Prepare for feed-forward and LSTM layers
+        features = data[EXPECTED_FEATURES]  # Selecting numeric columns for scaling
+        features_scaled = np.ascontiguousarray(self.scaler.transform(features), dtype=np.float32)  # Use transform instead of fit_transform
+        return self.window_builder.latest(features_scaled)  # Same windows as in training
 
     def predict(self, input_data):
         """Make predictions using the preprocessed data."""
@@ -47,20 +52,113 @@ class StockPricePredictor:
             logging.error(f"Prediction error: {e}")
             raise
 
+    def predict_batch(self, features, symbols=None, max_batch_size=4096):
+        """
+        Predict for a whole universe at once. features is either {symbol: DataFrame of recent bars}, from
+        which the window ending at each symbol's last bar is built, or a (symbols x lookback x features)
+        array of windows together with symbols (see to_windows). Scaling is one transform call and
+        each chunk of up to max_batch_size symbols is a single forward pass.
+        Returns {symbol: prediction}.
+        """
+        windows, symbols = to_windows(features, symbols, self.window_builder.lookback)
+        try:
+            windows = self.scale_windows(windows)
+            predictions = np.empty(len(windows), dtype=np.float32)
+            for start in range(0, len(windows), max_batch_size):
+                chunk = windows[start:start + max_batch_size]
+                # Calling the model directly skips predict()'s per-call dataset and callback setup
+                output = self.model([chunk[:, -1], chunk], training=False)
+                predictions[start:start + len(chunk)] = np.asarray(output).reshape(-1)
+            return dict(zip(symbols, predictions.tolist()))
+        except Exception as e:
+            logging.error(f"Batch prediction error: {e}")
+            raise
+
+    def scale_windows(self, windows):
+        """Scale (symbols x lookback x features) windows into float32 windows."""
+        windows = np.asarray(windows, dtype=np.float32)
+        if windows.ndim != 3:
+            raise ValueError(f"Windows must have shape (n_symbols, lookback, features), got {windows.shape}")
+        rows = windows.reshape(-1, windows.shape[-1])
+        if hasattr(self.scaler, 'feature_names_in_'):
+            rows = pd.DataFrame(rows, columns=EXPECTED_FEATURES)
+        return np.ascontiguousarray(self.scaler.transform(rows), dtype=np.float32).reshape(windows.shape)
+
+def to_bars(data, lookback):
+    """
+    Normalize single-symbol prediction input to a DataFrame of bars, oldest first. A dict is one bar, which
+    only fills a window when lookback is 1; otherwise it raises ValueError, as does anything but a DataFrame.
+    """
+    if isinstance(data, dict):
+        if lookback > 1:
+            logging.error(f"A single bar cannot fill a {lookback}-bar window.")
+            raise ValueError(f"A single bar (dict) cannot fill a {lookback}-bar window; "
+                             f"pass a DataFrame of at least the last {lookback} bars.")
+        return pd.DataFrame([data])
+    if not isinstance(data, pd.DataFrame):
+        logging.error("Input data should be a dictionary or a pandas DataFrame.")
+        raise ValueError("Input data should be a dictionary or a pandas DataFrame.")
+    return data
+
+def to_windows(features, symbols, lookback):
+    """
+    Normalize batch prediction input to ((symbols x lookback x features) float32 windows, symbols).
+    features is {symbol: DataFrame of recent bars, oldest first}, whose last lookback bars are windowed
+    with WindowBuilder, or an array of windows that must already have exactly that shape; symbols are
+    then required, one per window. Anything else, e.g. one row per symbol, raises ValueError.
+    """
+    n_features = len(EXPECTED_FEATURES)
+    if isinstance(features, dict):
+        symbols = list(features) if symbols is None else list(symbols)
+        builder = WindowBuilder(lookback)
+        windows = np.empty((len(symbols), lookback, n_features), dtype=np.float32)
+        for i, symbol in enumerate(symbols):
+            bars = features[symbol]
+            missing = set(EXPECTED_FEATURES) - set(bars.columns)
+            if missing:
+                logging.error(f"Missing features in input data for {symbol}: {missing}")
+                raise ValueError(f"Missing features for {symbol}: {missing}")
+            windows[i] = builder.latest(bars[EXPECTED_FEATURES].to_numpy(dtype=np.float32))[1][0]
+        return windows, symbols
+
+    windows = np.asarray(features, dtype=np.float32)
+    if windows.ndim != 3 or windows.shape[1:] != (lookback, n_features):
+        logging.error(f"Expected windows of shape (n_symbols, {lookback}, {n_features}), got {windows.shape}")
+        raise ValueError(f"Features must be windows of shape (n_symbols, {lookback}, {n_features}), got {windows.shape}")
+    if symbols is None or len(symbols) != len(windows):
+        raise ValueError("One symbol is required per window")
+    return windows, list(symbols)
+
+def benchmark_batch_latency(predictor, batch_sizes=(1, 4, 16, 64, 256, 1024, 4096), repeats=5):
+    """Return {batch size: best latency per symbol in microseconds} for predict_batch."""
+    rng = np.random.default_rng(0)
+    results = {}
+    for size in batch_sizes:
+        features = rng.normal(size=(size, predictor.window_builder.lookback, len(EXPECTED_FEATURES))).astype(np.float32)
+        symbols = [f"SYM{i}" for i in range(size)]
+        predictor.predict_batch(features, symbols)  # Warm-up, traces the model for this shape
+        best = min(_timed(predictor.predict_batch, features, symbols) for _ in range(repeats))
+        results[size] = best / size * 1e6
+    return results
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
 # Usage example
 if __name__ == "__main__":
     predictor = StockPricePredictor('final_stock_price_model.h5', 'scaler.pkl')
     
-    # Example new data for prediction
-    new_data = {
-        'Feature1': 0.5,
-        'Feature2': -0.1,
-        'Feature3': 3.5,
-        'Feature4': 1.2
-    }
+    # Example new data for prediction: the last lookback bars of one symbol, oldest first
+    new_data = pd.DataFrame(np.random.default_rng(0).normal(size=(predictor.window_builder.lookback, len(EXPECTED_FEATURES))),
+                            columns=EXPECTED_FEATURES)
     
     try:
         predicted_price = predictor.predict(new_data)
         print("Predicted Stock Price:", predicted_price)
     except Exception as e:
         print("Error during prediction:", e)
+
+    for size, per_symbol_us in benchmark_batch_latency(predictor).items():
+        print(f"batch {size:>5}: {per_symbol_us:9.1f}us per symbol")
@@ -0,0 +1,258 @@
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+
+from models.data_pipeline import StreamingDataset
+from models.windows import WindowBuilder
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Settings a trial may override; any other key in a parameter set is rejected
+TRIAL_DEFAULTS = {'learning_rate': 0.001, 'epochs': 100, 'batch_size': 32, 'patience': 10}
+
+def prepare_sweep_data(dataset_path, data_dir, target_column='Stock_Price', symbol_column=None, chunk_size=100000):
+    """
+    Convert a training CSV once into .npy arrays (features, targets and optional symbol codes) that every
+    sweep worker memory-maps, instead of each worker parsing the CSV or receiving a pickled DataFrame.
+    The CSV is streamed chunk by chunk, so it does not have to fit in memory. Returns the array paths.
+    """
+    data_dir = os.path.abspath(data_dir)
+    os.makedirs(data_dir, exist_ok=True)
+    stream = StreamingDataset(dataset_path, target_column, chunk_size, symbol_column)
+    paths = {name: os.path.join(data_dir, f'{name}.npy') for name in ('features', 'targets', 'groups')}
+    features = np.lib.format.open_memmap(paths['features'], mode='w+', dtype=np.float32,
+                                         shape=(stream.n_rows, stream.n_features))
+    targets = np.lib.format.open_memmap(paths['targets'], mode='w+', dtype=np.float32, shape=(stream.n_rows,))
+    groups = np.lib.format.open_memmap(paths['groups'], mode='w+', dtype=np.int32, shape=(stream.n_rows,)) \
+        if symbol_column else None
+
+    codes = {}
+    row = 0
+    for chunk in stream.read_rows(0, stream.n_rows, chunk_size):
+        end = row + len(chunk)
+        features[row:end] = chunk[stream.feature_columns].to_numpy(dtype=np.float32)
+        targets[row:end] = chunk[target_column].to_numpy(dtype=np.float32)
+        if groups is not None:
+            groups[row:end] = [codes.setdefault(symbol, len(codes)) for symbol in chunk[symbol_column]]
+        row = end
+    for array in (features, targets, groups):
+        if array is not None:
+            array.flush()
+    if groups is None:
+        del paths['groups']
+    return paths
+
+def walk_forward_folds(ends, n_folds, min_train_fraction=0.5, groups=None):
+    """
+    Expanding-window (train_ends, val_ends) folds over time-ordered window ends, like
+    StreamingDataset.walk_forward_splits. With groups the fractions apply to each group's own history.
+    """
+    ends = np.asarray(ends)
+    if groups is None:
+        position = np.arange(len(ends)) / max(len(ends), 1)
+    else:
+        labels = np.asarray(groups)[ends]
+        boundaries = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1], True])
+        starts, sizes = boundaries[:-1], np.diff(boundaries)
+        position = (np.arange(len(ends)) - np.repeat(starts, sizes)) / np.repeat(sizes, sizes)
+
+    cuts = np.linspace(min_train_fraction, 1.0, n_folds + 1)
+    cuts[-1] = np.inf  # The last fold validates through the final window
+    for fold in range(n_folds):
+        yield ends[position < cuts[fold]], ends[(position >= cuts[fold]) & (position < cuts[fold + 1])]
+
+def _init_worker(tf_threads):
+    """Give each worker process its own, smaller TensorFlow thread pools so workers do not oversubscribe cores."""
+    os.environ['TF_NUM_INTRAOP_THREADS'] = str(tf_threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(tf_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+def _row_statistics(features, rows, block_size=100000):
+    """Mean and standard deviation (0 replaced by 1) of features[rows], accumulated one block of rows at a time."""
+    total = np.zeros(features.shape[1])
+    total_squares = np.zeros(features.shape[1])
+    for start in range(0, len(rows), block_size):
+        block = np.asarray(features[rows[start:start + block_size]], dtype=np.float64)
+        total += block.sum(axis=0)
+        total_squares += np.square(block).sum(axis=0)
+    mean = total / max(len(rows), 1)
+    scale = np.sqrt(np.maximum(total_squares / max(len(rows), 1) - mean ** 2, 0.0))
+    scale[scale == 0] = 1.0
+    return mean.astype(np.float32), scale.astype(np.float32)
+
+def _run_trial(data_paths, lookback, n_folds, min_train_fraction, params, fold, seed):
+    """Train and validate one parameter set on one walk-forward fold. Runs inside a sweep worker."""
+    import tensorflow as tf
+    from tensorflow.keras.callbacks import EarlyStopping
+    from models.train import build_model
+
+    start = time.perf_counter()
+    tf.keras.utils.set_random_seed(seed)
+    features = np.load(data_paths['features'], mmap_mode='r')
+    targets = np.load(data_paths['targets'], mmap_mode='r')
+    groups = np.load(data_paths['groups'], mmap_mode='r') if 'groups' in data_paths else None
+    settings = {**TRIAL_DEFAULTS, **params}
+
+    builder = WindowBuilder(lookback)
+    ends = builder.valid_ends(len(features), groups)
+    train_ends, val_ends = list(walk_forward_folds(ends, n_folds, min_train_fraction, groups))[fold]
+
+    # Scale with statistics from this fold's training rows only, so validation data never leaks in.
+    # Each batch is scaled as it is gathered from the memory map; workers never hold a scaled copy of the data.
+    mean, scale = _row_statistics(features, train_ends)
+
+    model = build_model(features.shape[1], settings['learning_rate'])
+    history = model.fit(builder.tf_dataset(features, targets, train_ends, settings['batch_size'], shuffle=True,
+                                           mean=mean, scale=scale, seed=seed),
+                        validation_data=builder.tf_dataset(features, targets, val_ends, settings['batch_size'],
+                                                           mean=mean, scale=scale),
+                        epochs=settings['epochs'], verbose=0,
+                        callbacks=[EarlyStopping(monitor='val_loss', patience=settings['patience'],
+                                                 restore_best_weights=True)])
+    val_losses = history.history['val_loss']
+    return {
+        'params': params,
+        'fold': fold,
+        'val_mse': float(min(val_losses)),
+        'best_epoch': int(np.argmin(val_losses)) + 1,
+        'epochs_run': len(val_losses),
+        'train_windows': len(train_ends),
+        'val_windows': len(val_ends),
+        'seconds': time.perf_counter() - start,
+    }
+
+class SweepRunner:
+    def __init__(self, dataset_path, work_dir, param_grid=None, param_distributions=None, n_iter=10, n_folds=3,
+                 min_train_fraction=0.5, lookback=20, target_column='Stock_Price', symbol_column=None,
+                 workers=None, tf_threads=None, seed=0):
+        """
+        Hyperparameter sweep over walk-forward folds, one (parameter set, fold) trial per pool task.
+        Pass param_grid for an exhaustive grid or param_distributions (lists or scipy distributions)
+        for n_iter random draws; keys are ModelTrainer settings (learning_rate, epochs, batch_size, patience).
+
+        The dataset is converted once to memory-mapped .npy arrays in work_dir. Finished trials are
+        appended to work_dir/trials.jsonl as they complete, and a rerun skips them, so an interrupted
+        sweep resumes where it stopped.
+        """
+        if (param_grid is None) == (param_distributions is None):
+            raise ValueError("Pass exactly one of param_grid or param_distributions.")
+        self.dataset_path = dataset_path
+        self.work_dir = work_dir
+        self.param_grid = param_grid
+        self.param_distributions = param_distributions
+        self.n_iter = n_iter
+        self.n_folds = n_folds
+        self.min_train_fraction = min_train_fraction
+        self.lookback = lookback
+        self.target_column = target_column
+        self.symbol_column = symbol_column
+        self.workers = workers or os.cpu_count()
+        self.tf_threads = tf_threads or max(1, (os.cpu_count() or 1) // self.workers)
+        self.seed = seed
+        self.checkpoint_path = os.path.join(work_dir, 'trials.jsonl')
+        self.data_paths = None
+
+    def prepare(self):
+        """Build the memory-mapped arrays unless a previous run already did."""
+        data_dir = os.path.join(self.work_dir, 'data')
+        manifest = os.path.join(data_dir, 'manifest.json')
+        if os.path.exists(manifest):
+            with open(manifest) as f:
+                self.data_paths = json.load(f)
+        else:
+            self.data_paths = prepare_sweep_data(self.dataset_path, data_dir, self.target_column, self.symbol_column)
+            with open(manifest, 'w') as f:
+                json.dump(self.data_paths, f)
+        return self.data_paths
+
+    def parameter_sets(self):
+        from sklearn.model_selection import ParameterGrid, ParameterSampler
+        if self.param_grid is not None:
+            candidates = ParameterGrid(self.param_grid)
+        else:
+            candidates = ParameterSampler(self.param_distributions, self.n_iter, random_state=self.seed)
+        parameter_sets = []
+        for params in candidates:
+            unknown = set(params) - set(TRIAL_DEFAULTS)
+            if unknown:
+                raise ValueError(f"Unknown sweep parameters: {unknown}")
+            # Plain Python types, so sets compare equal after a round trip through the checkpoint file
+            parameter_sets.append({key: value.item() if isinstance(value, np.generic) else value
+                                   for key, value in params.items()})
+        return parameter_sets
+
+    @staticmethod
+    def _trial_key(params, fold):
+        return json.dumps([params, fold], sort_keys=True)
+
+    def load_results(self):
+        """Return the trials finished so far, read from the checkpoint file."""
+        if not os.path.exists(self.checkpoint_path):
+            return []
+        with open(self.checkpoint_path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def pending_trials(self):
+        """The (params, fold) trials not yet in the checkpoint file, in parameter set then fold order."""
+        done = {self._trial_key(result['params'], result['fold']) for result in self.load_results()}
+        return [(params, fold) for params in self.parameter_sets() for fold in range(self.n_folds)
+                if self._trial_key(params, fold) not in done]
+
+    def run(self):
+        """Run every unfinished trial in the process pool and return the comparison table."""
+        os.makedirs(self.work_dir, exist_ok=True)
+        self.prepare()
+        pending = self.pending_trials()
+        logging.info(f"Sweep: {len(self.load_results())} trials already finished, {len(pending)} to run on "
+                     f"{self.workers} workers with {self.tf_threads} TensorFlow threads each.")
+        if not pending:
+            return self.results_table()
+
+        # Spawned workers: TensorFlow is not fork-safe once initialised
+        with ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(self.tf_threads,)) as pool:
+            futures = {pool.submit(_run_trial, self.data_paths, self.lookback, self.n_folds, self.min_train_fraction,
+                                   params, fold, self.seed + fold): (params, fold) for params, fold in pending}
+            with open(self.checkpoint_path, 'a') as checkpoint:
+                for future in as_completed(futures):
+                    params, fold = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logging.error(f"Sweep trial {params} fold {fold} failed: {e}")
+                        continue
+                    checkpoint.write(json.dumps(result) + '\n')
+                    checkpoint.flush()
+                    logging.info(f"Trial {params} fold {fold}: val_mse={result['val_mse']:.4f} ({result['seconds']:.1f}s)")
+        return self.results_table()
+
+    def results_table(self):
+        """One row per parameter set: mean/std/worst validation MSE across folds, best first."""
+        results = self.load_results()
+        if not results:
+            return pd.DataFrame()
+        trials = pd.DataFrame([{**result['params'], **{key: value for key, value in result.items() if key != 'params'}}
+                               for result in results])
+        param_columns = sorted({key for result in results for key in result['params']})
+        table = trials.groupby(param_columns, dropna=False).agg(
+            folds=('fold', 'nunique'), mean_val_mse=('val_mse', 'mean'), std_val_mse=('val_mse', 'std'),
+            worst_val_mse=('val_mse', 'max'), mean_best_epoch=('best_epoch', 'mean'), seconds=('seconds', 'sum'),
+        ).reset_index().sort_values('mean_val_mse').reset_index(drop=True)
+        table.to_csv(os.path.join(self.work_dir, 'sweep_results.csv'), index=False)
+        return table
+
+# Usage example
+if __name__ == "__main__":
+    runner = SweepRunner('path_to_your_dataset.csv', 'sweep_runs',
+                         param_grid={'learning_rate': [1e-3, 3e-4], 'batch_size': [32, 128], 'epochs': [50]},
+                         n_folds=3, lookback=20)
+    print(runner.run().to_string())
@@ -1,6 +1,5 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 import tensorflow as tf
 from tensorflow.keras.models import Model
@@ -9,68 +8,127 @@ from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
 import logging
 
+from models.data_pipeline import StreamingDataset
+from models.windows import WindowBuilder, split_ends
+
 logging.basicConfig(level=logging.INFO)
 
-class StockPricePredictor:
-    def __init__(self, dataset_path, news_dataset_path=None, learning_rate=0.001, epochs=100, batch_size=32):
-        self.data = pd.read_csv(dataset_path)
+def build_model(n_features, learning_rate=0.001):
+    """Build and compile the dual-input (feed-forward + LSTM window) stock price model."""
+    # Inputs
+    main_input = Input(shape=(n_features,), name='main_input')
+    lstm_input = Input(shape=(None, n_features), name='lstm_input')  # (lookback bars, features)
+
+    # Path 1 - Regular feed-forward network
+    dense_1 = Dense(128, activation='relu')(main_input)
+    dropout_1 = Dropout(0.2)(dense_1)
+    dense_2 = Dense(64, activation='relu')(dropout_1)
+
+    # Path 2 - LSTM for sequential data handling
+    lstm_layer = LSTM(50)(lstm_input)
+    dropout_2 = Dropout(0.2)(lstm_layer)
+
+    # Concatenate both paths
+    concatenated = concatenate([dense_2, dropout_2])
+
+    # Output layer
+    output = Dense(1)(concatenated)
+    
+    model = Model(inputs=[main_input, lstm_input], outputs=output)
+    model.compile(optimizer=Adam(learning_rate=learning_rate), loss='mean_squared_error')
+    return model
+
+class ModelTrainer:
+    def __init__(self, dataset_path, news_dataset_path=None, learning_rate=0.001, epochs=100, batch_size=32,
+                 streaming=False, chunk_size=100000, lookback=20, symbol_column=None, seed=None):
+        """
+        With streaming=True the dataset is never loaded whole: it is read in chunks through a tf.data pipeline.
+        The LSTM branch sees the last lookback bars ending at each row; with symbol_column (rows sorted
+        by symbol then time) windows never span two symbols. seed makes the training shuffle reproducible.
+        """
+        self.streaming = streaming
+        self.lookback = lookback
+        self.symbol_column = symbol_column
+        self.window_builder = WindowBuilder(lookback)
+        self.stream = StreamingDataset(dataset_path, chunk_size=chunk_size, symbol_column=symbol_column) if streaming else None
+        self.data = None if streaming else pd.read_csv(dataset_path)
         self.news_data = pd.read_csv(news_dataset_path) if news_dataset_path else None
         self.model = None
         self.X_train, self.X_test, self.y_train, self.y_test = None, None, None, None
+        self.features_scaled, self.targets, self.groups = None, None, None
+        self.train_ends, self.test_ends = None, None
+        self.train_dataset, self.val_dataset = None, None
+        self.n_features = None
         self.scaler = StandardScaler()
         self.learning_rate = learning_rate
         self.epochs = epochs
         self.batch_size = batch_size
+        self.seed = seed
 
     def preprocess_data(self):
         """Preprocess data by scaling features and splitting the dataset."""
+        if self.streaming:
+            return self.preprocess_streaming()
+
         if self.news_data is not None:
             # Assume news_data contains 'news_text' for sentiment analysis
+            from textblob import TextBlob
             self.data['sentiment'] = self.news_data['news_text'].apply(lambda x: TextBlob(x).sentiment.polarity)
             self.data = pd.merge(self.data, self.news_data[['sentiment']], left_index=True, right_index=True, how='left')
         
-        features = self.data.drop(['Stock_Price'], axis=1)
-        target = self.data['Stock_Price']
-        features_scaled = self.scaler.fit_transform(features)
-        self.X_train, self.X_test, self.y_train, self.y_test = train_test_split(
-            features_scaled, target, test_size=0.2, random_state=42
-        )
-
-    def build_model(self):
-        """Build a neural network using Functional API for predicting stock prices."""
-        # Inputs
-        main_input = Input(shape=(self.X_train.shape[1],), name='main_input')
-        lstm_input = Input(shape=(None, 1), name='lstm_input')
+        features = self.data.drop(['Stock_Price'] + ([self.symbol_column] if self.symbol_column else []), axis=1)
+        self.groups = self.data[self.symbol_column].to_numpy() if self.symbol_column else None
+        # One contiguous buffer; LSTM windows are strided views into it
+        self.features_scaled = np.ascontiguousarray(self.scaler.fit_transform(features), dtype=np.float32)
+        self.targets = self.data['Stock_Price'].to_numpy(dtype=np.float32)
 
-        # Path 1 - Regular feed-forward network
-        dense_1 = Dense(128, activation='relu')(main_input)
-        dropout_1 = Dropout(0.2)(dense_1)
-        dense_2 = Dense(64, activation='relu')(dropout_1)
+        # Keep time order: the most recent 20% of windows is held out instead of a shuffled sample
+        ends = self.window_builder.valid_ends(len(self.features_scaled), self.groups)
+        self.train_ends, self.test_ends = split_ends(ends, 0.2, self.groups)
+        self.X_train, self.y_train = self.features_scaled[self.train_ends], self.targets[self.train_ends]
+        self.X_test, self.y_test = self.features_scaled[self.test_ends], self.targets[self.test_ends]
+        self.n_features = self.features_scaled.shape[1]
 
-        # Path 2 - LSTM for sequential data handling
-        lstm_layer = LSTM(50)(lstm_input)
-        dropout_2 = Dropout(0.2)(lstm_layer)
-
-        # Concatenate both paths
-        concatenated = concatenate([dense_2, dropout_2])
+    def preprocess_streaming(self, validation_fraction=0.2):
+        """Fit the scaler with partial_fit over the training chunks and build time-ordered tf.data pipelines."""
+        if self.news_data is not None:
+            logging.warning("News sentiment merging is not supported in streaming mode; news data is ignored.")
+        (train_start, train_end), (val_start, val_end) = self.stream.time_split(validation_fraction)
+        self.stream.fit_scaler(self.scaler, train_start, train_end)
+        self.train_dataset = self.stream.make_tf_dataset(self.scaler, train_start, train_end, self.batch_size,
+                                                         self.lookback, shuffle=True, seed=self.seed)
+        self.val_dataset = self.stream.make_tf_dataset(self.scaler, val_start, val_end, self.batch_size, self.lookback)
+        self.n_features = self.stream.n_features
 
-        # Output layer
-        output = Dense(1)(concatenated)
-        
-        self.model = Model(inputs=[main_input, lstm_input], outputs=output)
-        self.model.compile(optimizer=Adam(learning_rate=self.learning_rate), loss='mean_squared_error')
+    def build_model(self):
+        """Build a neural network using Functional API for predicting stock prices."""
+        self.model = build_model(self.n_features, self.learning_rate)
 
     def train_model(self):
         """Train the model with early stopping and model checkpointing."""
         early_stopping = EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True)
         model_checkpoint = ModelCheckpoint('best_model.h5', save_best_only=True)
-        
-        self.model.fit([self.X_train, self.X_train], self.y_train, epochs=self.epochs, batch_size=self.batch_size, validation_split=0.2, 
-                       callbacks=[early_stopping, model_checkpoint])
+
+        if self.streaming:
+            self.model.fit(self.train_dataset, validation_data=self.val_dataset, epochs=self.epochs,
+                           callbacks=[early_stopping, model_checkpoint])
+            return
+
+        # The last 20% of the training windows validate, as validation_split did
+        fit_ends, val_ends = split_ends(self.train_ends, 0.2, self.groups)
+        train_dataset = self.window_builder.tf_dataset(self.features_scaled, self.targets, fit_ends, self.batch_size,
+                                                       shuffle=True, seed=self.seed)
+        val_dataset = self.window_builder.tf_dataset(self.features_scaled, self.targets, val_ends, self.batch_size)
+        self.model.fit(train_dataset, validation_data=val_dataset, epochs=self.epochs, callbacks=[early_stopping, model_checkpoint])
 
     def evaluate_model(self):
         """Evaluate the model's performance on the test set."""
-        test_loss = self.model.evaluate([self.X_test, self.X_test], self.y_test)
+        if self.streaming:
+            test_loss = self.model.evaluate(self.val_dataset)
+            logging.info(f"Validation MSE: {test_loss}")
+            return
+        test_dataset = self.window_builder.tf_dataset(self.features_scaled, self.targets, self.test_ends, self.batch_size)
+        test_loss = self.model.evaluate(test_dataset)
         logging.info(f"Test MSE: {test_loss}")
 
     def save_model(self):
@@ -78,11 +136,20 @@ class StockPricePredictor:
         self.model.save('final_stock_price_model.h5')
         logging.info("Model saved successfully.")
 
+    def export_runtime(self, path='final_stock_price_model.npz'):
+        """Export the model and scaler for the TensorFlow-free NumPy inference runtime."""
+        from models.numpy_runtime import export_model
+        export_model(self.model, self.scaler, path)
+
+# Earlier name of ModelTrainer, kept for existing callers
+StockPricePredictor = ModelTrainer
+
 # Usage example
 if __name__ == "__main__":
-    predictor = StockPricePredictor('path_to_your_dataset.csv', 'path_to_your_news_dataset.csv')
+    predictor = ModelTrainer('path_to_your_dataset.csv', 'path_to_your_news_dataset.csv')
     predictor.preprocess_data()
     predictor.build_model()
     predictor.train_model()
     predictor.evaluate_model()
     predictor.save_model()
+    predictor.export_runtime()
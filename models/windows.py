@@ -0,0 +1,106 @@
+import itertools
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+class WindowBuilder:
+    def __init__(self, lookback):
+        """
+        Builds the (lookback, n_features) windows fed to the LSTM branch, for training and live inference alike.
+        Windows are strided views over one contiguous (rows, features) buffer; rows are only copied
+        when a batch is gathered.
+        """
+        if lookback < 1:
+            raise ValueError("Lookback must be at least one bar.")
+        self.lookback = lookback
+
+    def windows(self, values):
+        """Return a read-only (rows - lookback + 1, lookback, features) view of every window, window i ending at row i + lookback - 1."""
+        return sliding_window_view(values, self.lookback, axis=0).transpose(0, 2, 1)
+
+    def valid_ends(self, n_rows, groups=None):
+        """
+        Return the rows that can end a full window. With groups (e.g. a symbol per row, rows sorted by
+        symbol then time), windows that would cross from one symbol into the next are excluded.
+        """
+        ends = np.arange(self.lookback - 1, n_rows)
+        if groups is not None and self.lookback > 1:
+            groups = np.asarray(groups)
+            ends = ends[groups[ends] == groups[ends - self.lookback + 1]]
+        return ends
+
+    def gather(self, values, ends):
+        """Copy out the feed-forward rows (n, features) and LSTM windows (n, lookback, features) ending at ends."""
+        ends = np.asarray(ends)
+        return values[ends], self.windows(values)[ends - self.lookback + 1]
+
+    def latest(self, values):
+        """Inputs for live inference: the last row and the window ending at it."""
+        if len(values) < self.lookback:
+            raise ValueError(f"At least {self.lookback} rows are needed to build a window.")
+        return self.gather(values, [len(values) - 1])
+
+    def batches(self, values, targets, ends, batch_size, shuffle=False, seed=None, mean=None, scale=None):
+        """
+        Yield ((ff_input, lstm_input), target) batches, gathering only one batch of windows at a time.
+        With mean and scale, each gathered batch is standardized as (x - mean) / scale, so values can stay
+        unscaled (e.g. a memory-mapped array) and no scaled copy of the whole buffer is ever made.
+        """
+        ends = np.asarray(ends)
+        if shuffle:
+            ends = np.random.default_rng(seed).permutation(ends)
+        for start in range(0, len(ends), batch_size):
+            batch_ends = ends[start:start + batch_size]
+            ff_input, lstm_input = self.gather(values, batch_ends)
+            if mean is not None:
+                ff_input = ((ff_input - mean) / scale).astype(np.float32)
+                lstm_input = ((lstm_input - mean) / scale).astype(np.float32)
+            yield (ff_input, lstm_input), targets[batch_ends]
+
+    def tf_dataset(self, values, targets, ends, batch_size, shuffle=False, mean=None, scale=None, seed=None):
+        """
+        Wrap batches() in a prefetched tf.data pipeline with a known number of batches. With shuffle, every
+        epoch draws a new order from seed, so a seeded run visits the windows in the same orders each time.
+        """
+        import tensorflow as tf
+
+        n_features = values.shape[1]
+        entropy = np.random.SeedSequence(seed).entropy
+        epochs = itertools.count()  # tf.data calls the generator function again for every epoch
+        dataset = tf.data.Dataset.from_generator(
+            lambda: self.batches(values, targets, ends, batch_size, shuffle,
+                                 np.random.SeedSequence(entropy, spawn_key=(next(epochs),)), mean, scale),
+            output_signature=((tf.TensorSpec(shape=(None, n_features), dtype=tf.float32),
+                               tf.TensorSpec(shape=(None, self.lookback, n_features), dtype=tf.float32)),
+                              tf.TensorSpec(shape=(None,), dtype=tf.float32)))
+        dataset = dataset.apply(tf.data.experimental.assert_cardinality(-(-len(ends) // batch_size)))
+        return dataset.prefetch(tf.data.AUTOTUNE)
+
+def split_ends(ends, test_fraction, groups=None):
+    """
+    Time-ordered split of window ends: the most recent test_fraction of windows
+    (per group, when groups are given) are held out.
+    """
+    ends = np.asarray(ends)
+    if groups is None:
+        split = int(len(ends) * (1 - test_fraction))
+        return ends[:split], ends[split:]
+
+    labels = np.asarray(groups)[ends]
+    # Rows are sorted by group then time, so each group's ends form one contiguous run
+    boundaries = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1], True])
+    starts, sizes = boundaries[:-1], np.diff(boundaries)
+    position = np.arange(len(ends)) - np.repeat(starts, sizes)
+    is_test = position >= np.repeat((sizes * (1 - test_fraction)).astype(int), sizes)
+    return ends[~is_test], ends[is_test]
+
+# Example usage
+if __name__ == "__main__":
+    values = np.arange(24, dtype=np.float32).reshape(12, 2)  # 12 bars x 2 features
+    symbols = np.array(['AAPL'] * 6 + ['MSFT'] * 6)
+    builder = WindowBuilder(lookback=3)
+    ends = builder.valid_ends(len(values), symbols)
+    print("Window ends:", ends)
+    print("Shares memory with the buffer:", np.shares_memory(builder.windows(values), values))
+    ff_input, lstm_input = builder.gather(values, ends[:2])
+    print(ff_input.shape, lstm_input.shape)
+    print(split_ends(ends, 0.25, symbols))
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The project modules are imported from the repository root (data.*, models.*, trading.*)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip('aiohttp')
+from aiohttp import web
+
+from data.async_fetcher import AsyncDataFetcher
+
+class StubAPI:
+    """Local stand-in for the candle and news APIs, recording when each request arrived and how many overlapped."""
+    def __init__(self, delay=0.0, throttle_first=None):
+        self.delay = delay
+        self.throttle_first = throttle_first  # Retry-After seconds for the first candle request, if set
+        self.arrivals = {'stock': [], 'news': []}
+        self.active = {'stock': 0, 'news': 0}
+        self.peak = {'stock': 0, 'news': 0, 'total': 0}
+        self.throttled_at = None
+        self.app = web.Application()
+        self.app.add_routes([web.get('/candle', self.candle), web.get('/news', self.news)])
+        self._runner = None
+
+    async def _serve(self, api, body):
+        self.arrivals[api].append(time.monotonic())
+        if api == 'stock' and self.throttle_first is not None and self.throttled_at is None:
+            self.throttled_at = time.monotonic()
+            return web.Response(status=429, headers={'Retry-After': str(self.throttle_first)})
+        self.active[api] += 1
+        self.peak[api] = max(self.peak[api], self.active[api])
+        self.peak['total'] = max(self.peak['total'], sum(self.active.values()))
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active[api] -= 1
+        return web.json_response(body)
+
+    async def candle(self, request):
+        return await self._serve('stock', {'c': [1.0, 2.0], 'v': [10, 20], 't': [1, 2], 's': 'ok'})
+
+    async def news(self, request):
+        return await self._serve('news', {'articles': []})
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        return f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+def _run(stub, scenario, **fetcher_kwargs):
+    async def main():
+        url = await stub.start()
+        try:
+            async with AsyncDataFetcher(backoff_factor=0.01, **fetcher_kwargs) as fetcher:
+                fetcher.stock_api_url, fetcher.news_api_url = f"{url}/candle", f"{url}/news"
+                return await scenario(fetcher)
+        finally:
+            await stub.stop()
+    return asyncio.run(main())
+
+def test_token_bucket_caps_the_request_rate_across_symbols():
+    stub = StubAPI()
+    symbols = [f"SYM{i}" for i in range(12)]
+    frames = _run(stub, lambda fetcher: fetcher.fetch_many(symbols, 'D', 0, 1),
+                  stock_calls_per_minute=1200, burst=2)  # 20 requests/s after a burst of 2
+    assert all(frame is not None for frame in frames.values())
+    arrivals = stub.arrivals['stock']
+    assert len(arrivals) == len(symbols)
+    assert arrivals[-1] - arrivals[0] >= (len(symbols) - 2) / 20 * 0.9
+
+def test_each_api_has_its_own_in_flight_budget():
+    stub = StubAPI(delay=0.1)
+
+    async def scenario(fetcher):
+        return await asyncio.gather(fetcher.fetch_many([f"SYM{i}" for i in range(6)], 'D', 0, 1),
+                                    fetcher.fetch_news_many([f"query {i}" for i in range(6)]))
+
+    _run(stub, scenario, stock_calls_per_minute=60000, news_calls_per_minute=60000, burst=100, max_in_flight=2)
+    assert stub.peak['stock'] == 2 and stub.peak['news'] == 2
+    assert stub.peak['total'] == 4  # A busy stock API does not use up the news budget
+
+def test_429_with_retry_after_pauses_only_that_api():
+    stub = StubAPI(throttle_first=0.5)
+
+    async def scenario(fetcher):
+        stocks = asyncio.ensure_future(fetcher.fetch_many([f"SYM{i}" for i in range(4)], 'D', 0, 1))
+        await asyncio.sleep(0.1)  # The first candle request has been throttled by now
+        news = await fetcher.fetch_news_many([f"query {i}" for i in range(4)])
+        return await stocks, news
+
+    frames, news = _run(stub, scenario, stock_calls_per_minute=1200, news_calls_per_minute=60000, burst=1)
+    assert all(frame is not None for frame in frames.values()) and all(n is not None for n in news.values())
+    later = [t - stub.throttled_at for t in stub.arrivals['stock'][1:]]
+    assert len(later) == 4 and min(later) >= 0.45  # Every stock request, retry included, waited out the pause
+    assert all(t - stub.throttled_at < 0.45 for t in stub.arrivals['news'])  # News kept going meanwhile
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from data.cleaner import DataCleaner
+from data.processor import DataProcessor
+from trading.backtest import Backtester
+from trading.risk_management import RiskManager
+from trading.strategy import TradingStrategy, LatestIndicators, ACTION_CODES
+
+SYMBOLS = ['AAPL', 'MSFT']
+
+def _bars(n_bars=160, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1.5, size=(n_bars, len(SYMBOLS))), axis=0)
+    volume = rng.integers(1000, 100000, size=(n_bars, len(SYMBOLS))).astype(np.float64)
+    return pd.DataFrame(close, columns=SYMBOLS), pd.DataFrame(volume, columns=SYMBOLS)
+
+def _candles(prices, volumes, symbol, end):
+    """Finnhub-style candle arrays for the first end bars of one symbol."""
+    close = prices[symbol].to_numpy()[:end]
+    return {'c': close, 'h': close + 0.5, 'l': close - 0.5, 'o': close, 'v': volumes[symbol].to_numpy()[:end],
+            't': np.arange(end, dtype=np.int64) * 86400}
+
+def _risk_manager():
+    return RiskManager(max_trade_limit=100000, stop_loss_threshold=0.1, volatility_threshold=0.2)
+
+def test_vectorized_matches_event_driven():
+    prices, volumes = _bars()
+    report = Backtester(_risk_manager()).check_parity(prices, volumes)
+    assert all(count == 0 for count in report.values()), report
+
+def test_live_path_matches_backtest():
+    prices, volumes = _bars()
+    risk_manager = _risk_manager()
+    result = Backtester(risk_manager).run(prices, volumes)
+    strategy = TradingStrategy(None, risk_manager)
+    cleaner, processor = DataCleaner(), DataProcessor()
+    latest = LatestIndicators(SYMBOLS)
+
+    # Replay the live loop one bar at a time: candles -> cleaner -> processor -> LatestIndicators -> decision
+    for end in range(50, len(prices) + 1):
+        for symbol in SYMBOLS:
+            cleaned = cleaner.clean_stock_arrays(_candles(prices, volumes, symbol, end), z_threshold=np.inf)
+            assert len(cleaned) == end
+            latest.update(symbol, processor.add_technical_indicators(cleaned, normalize=False))
+        actions, sizes = strategy.decide_batch(latest.values, latest.prices, latest.volumes)
+        np.testing.assert_array_equal(actions, result.actions[end - 1])
+        np.testing.assert_array_equal(sizes, result.trade_sizes[end - 1])
+        for s, symbol in enumerate(SYMBOLS):
+            row = latest.rows[symbol]
+            action, size = strategy.decide_row(latest.values[row], latest.prices[row], latest.volumes[row])
+            assert ACTION_CODES[action] == result.actions[end - 1, s]
+            assert size == result.trade_sizes[end - 1, s]
@@ -0,0 +1,42 @@
+import numpy as np
+
+from data.cleaner import DataCleaner
+
+WINDOW = 21
+
+def _candles(n_bars, spikes=(), seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+    close[list(spikes)] *= 1.5
+    volume = rng.integers(100000, 200000, n_bars).astype(np.float64)
+    return {'c': close, 'h': close * 1.01, 'l': close * 0.99, 'o': close, 'v': volume,
+            't': np.arange(n_bars, dtype=np.int64) * 60}
+
+def _prefix(data, n_bars):
+    return {key: values[:n_bars] for key, values in data.items()}
+
+def test_spike_is_rejected_and_its_reversion_kept():
+    cleaned = DataCleaner().clean_stock_arrays(_candles(300, spikes=[150]), WINDOW, 5.0)
+    assert 150 * 60 not in cleaned['Timestamp'].values
+    assert 151 * 60 in cleaned['Timestamp'].values
+
+def test_remembered_verdicts_only_score_new_bars():
+    data = _candles(400, spikes=[150, 390])
+    cleaner = DataCleaner()
+    first = cleaner.clean_stock_arrays(_prefix(data, 300), WINDOW, 5.0, symbol='AAPL')
+    scored = []
+    original = cleaner._rolling_robust_scores
+
+    def recording(buffer, window, start=0, trailing=False):
+        scored.append(len(buffer) - start)
+        return original(buffer, window, start, trailing)
+
+    cleaner._rolling_robust_scores = recording
+    for n_bars in range(301, 401):
+        latest = cleaner.clean_stock_arrays(_prefix(data, n_bars), WINDOW, 5.0, symbol='AAPL')
+        # Settled bars keep their verdict and only the last couple of bars are scored again
+        settled = first['Timestamp'].values[:-1]
+        assert np.array_equal(latest['Timestamp'].values[:len(settled)], settled)
+        assert scored[-1] <= 3
+    assert 390 * 60 not in latest['Timestamp'].values and 391 * 60 in latest['Timestamp'].values
+    assert len(latest) == 400 - 2
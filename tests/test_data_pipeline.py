@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('tensorflow')
+from sklearn.preprocessing import StandardScaler
+
+from models.data_pipeline import StreamingDataset
+
+@pytest.fixture
+def stream(tmp_path):
+    path = tmp_path / 'rows.csv'
+    frame = pd.DataFrame(np.random.default_rng(0).normal(size=(3000, 4)), columns=['F1', 'F2', 'F3', 'F4'])
+    frame['Stock_Price'] = np.arange(len(frame), dtype=float)  # The target identifies the window's last row
+    frame.to_csv(path, index=False)
+    return StreamingDataset(path, chunk_size=700)
+
+def _targets(dataset):
+    return np.concatenate([target.numpy() for _, target in dataset])
+
+def test_every_window_once_per_epoch_reshuffled(stream):
+    scaler = stream.fit_scaler(StandardScaler(), 0, 2500)
+    dataset = stream.make_tf_dataset(scaler, 100, 2500, batch_size=64, lookback=20, shuffle=True, seed=1)
+    first, second = _targets(dataset), _targets(dataset)
+    expected = np.arange(119, 2500, dtype=np.float32)
+    np.testing.assert_array_equal(np.sort(first), expected)
+    np.testing.assert_array_equal(np.sort(second), expected)
+    assert (first != second).any()
+    assert dataset.cardinality().numpy() == sum(1 for _ in dataset)
+    np.testing.assert_array_equal(_targets(stream.make_tf_dataset(scaler, 100, 2500, 64, 20, shuffle=True, seed=1)),
+                                  first)
+
+def test_windows_span_chunk_boundaries_and_shards_partition_rows(stream):
+    scaler = stream.fit_scaler(StandardScaler())
+    (main_input, lstm_input), target = next(iter(stream.make_tf_dataset(scaler, 690, 2000, batch_size=8, lookback=20)))
+    rows = pd.read_csv(stream.dataset_path)[stream.feature_columns].to_numpy(dtype=np.float32)
+    expected = (rows[690:710] - scaler.mean_.astype(np.float32)) / scaler.scale_.astype(np.float32)
+    np.testing.assert_allclose(lstm_input.numpy()[0], expected, rtol=1e-6)
+    np.testing.assert_allclose(main_input.numpy()[0], expected[-1], rtol=1e-6)
+    assert target.numpy()[0] == 709
+
+    shards = [_targets(stream.make_tf_dataset(scaler, 690, 2000, 64, 20, num_shards=2, shard_index=i)) for i in (0, 1)]
+    np.testing.assert_array_equal(np.sort(np.concatenate(shards)), np.arange(709, 2000, dtype=np.float32))
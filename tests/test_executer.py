@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from trading.executer import TradeExecuter
+from trading.mock_broker import MockBroker
+
+API_KEY = 'test_key'
+
+def _orders(n_orders=40):
+    return [{'action': 'buy' if i % 2 else 'sell', 'symbol': f"SYM{i % 5}", 'quantity': 10, 'price': 100.0 + i,
+             'client_order_id': f"cycle-1-{i}"} for i in range(n_orders)]
+
+def _run(broker, scenario):
+    async def main():
+        url = await broker.start()
+        try:
+            return await scenario(url)
+        finally:
+            await broker.stop()
+    return asyncio.run(main())
+
+@pytest.mark.parametrize('bulk', [False, True])
+def test_resubmit_with_same_keys_places_nothing_new(bulk):
+    broker = MockBroker(API_KEY, latency_ms=(0, 1), seed=0)
+    orders = _orders()
+
+    async def scenario(url):
+        async with TradeExecuter(url, API_KEY, bulk_orders=bulk, max_batch_size=16) as executer:
+            first = await executer.execute_trades(orders)
+            placed = len(broker.orders)
+            second = await executer.execute_trades(orders)
+        return first, placed, second
+
+    first, placed, second = _run(broker, scenario)
+    assert None not in first and len(set(first)) == len(orders)
+    assert placed == len(orders)
+    assert second == first
+    assert len(broker.orders) == placed
+
+@pytest.mark.parametrize('bulk', [False, True])
+def test_503_responses_are_retried_without_duplicates(bulk):
+    broker = MockBroker(API_KEY, latency_ms=(0, 1), failure_rate=0.3, seed=1)
+    orders = _orders()
+
+    async def scenario(url):
+        async with TradeExecuter(url, API_KEY, max_retries=12, backoff_factor=0.001, bulk_orders=bulk,
+                                 max_batch_size=2) as executer:
+            return await executer.execute_trades(orders)
+
+    order_ids = _run(broker, scenario)
+    assert None not in order_ids
+    # Every order was placed exactly once, although some requests were answered 503 and sent again
+    assert len(broker.orders) == len(orders)
+    assert sorted(order['client_order_id'] for order in broker.orders.values()) == sorted(
+        order['client_order_id'] for order in orders)
+    expected_requests = len(orders) if not bulk else len(orders) // 2
+    assert broker.requests_received > expected_requests
+
+@pytest.mark.parametrize('bulk', [False, True])
+@pytest.mark.parametrize('delay', [None, 0.5])
+def test_retry_after_a_lost_response_returns_the_original_order(bulk, delay):
+    # The broker accepts every order and then drops or delays the answer past the client's timeout
+    broker = MockBroker(API_KEY, latency_ms=(0, 1), lost_response_rate=0.4, lost_response_delay=delay, seed=2)
+    orders = _orders(20)
+
+    async def scenario(url):
+        async with TradeExecuter(url, API_KEY, max_retries=12, backoff_factor=0.001, timeout=0.2, bulk_orders=bulk,
+                                 max_batch_size=2) as executer:
+            return await executer.execute_trades(orders)
+
+    order_ids = _run(broker, scenario)
+    assert broker.responses_lost > 0
+    assert None not in order_ids
+    # Each retry got back the order id the broker assigned when it first accepted the order
+    assert len(broker.orders) == len(orders)
+    assert order_ids == [broker.orders_by_key[order['client_order_id']] for order in orders]
@@ -0,0 +1,50 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.indicator_engine import StreamingIndicators, INDICATOR_COLUMNS
+from data.processor import DataProcessor
+
+def _closes(n_bars=300, seed=0):
+    return 100 + np.cumsum(np.random.default_rng(seed).normal(0, 1, n_bars))
+
+def _assert_row_close(streamed, batch_row, tolerance=1e-9):
+    for column in INDICATOR_COLUMNS:
+        expected = batch_row[column]
+        if math.isnan(expected):
+            assert math.isnan(streamed[column]), column
+        else:
+            assert streamed[column] == pytest.approx(expected, rel=tolerance, abs=tolerance), column
+
+def test_normalized_matches_batch_last_row_every_bar():
+    closes = _closes()
+    engine = StreamingIndicators()
+    processor = DataProcessor()
+    for i, close in enumerate(closes):
+        engine.update(close)
+        if i + 1 >= 50:
+            batch = processor.add_technical_indicators(pd.DataFrame({'Close': closes[:i + 1]}))
+            _assert_row_close(engine.normalized(), batch.iloc[-1])
+
+def test_raw_values_match_unnormalized_batch_columns():
+    closes = _closes(seed=1)
+    engine = StreamingIndicators.from_history(closes)
+    frame = pd.DataFrame({'Close': closes})
+    expected = {
+        'SMA_20': frame['Close'].rolling(20).mean().iloc[-1],
+        'SMA_50': frame['Close'].rolling(50).mean().iloc[-1],
+        'EMA_20': frame['Close'].ewm(span=20, adjust=False).mean().iloc[-1],
+        'EMA_50': frame['Close'].ewm(span=50, adjust=False).mean().iloc[-1],
+        'STD': frame['Close'].rolling(20).std().iloc[-1],
+    }
+    for column, value in expected.items():
+        assert engine.latest[column] == pytest.approx(value, rel=1e-9), column
+
+def test_flat_prices_give_nan_rsi_like_batch():
+    closes = np.full(60, 100.0)
+    engine = StreamingIndicators.from_history(closes)
+    batch = DataProcessor().add_technical_indicators(pd.DataFrame({'Close': closes}))
+    assert math.isnan(engine.latest['RSI'])
+    assert math.isnan(batch['RSI'].iloc[-1])
@@ -0,0 +1,104 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.model_server import ModelClient, ModelServer
+from models.predict import EXPECTED_FEATURES, to_bars, to_windows
+from models.windows import WindowBuilder
+
+LOOKBACK = 3
+
+class SumPredictor:
+    """Stands in for StockPricePredictor: the prediction is the sum of the window."""
+    def __init__(self):
+        self.window_builder = WindowBuilder(LOOKBACK)
+
+    def predict_batch(self, features, symbols=None):
+        windows, symbols = to_windows(features, symbols, LOOKBACK)
+        return dict(zip(symbols, windows.sum(axis=(1, 2)).tolist()))
+
+def _bars(n_bars, offset=0.0):
+    values = np.arange(n_bars * len(EXPECTED_FEATURES), dtype=np.float32).reshape(n_bars, -1) + offset
+    return pd.DataFrame(values, columns=EXPECTED_FEATURES)
+
+@pytest.mark.parametrize('shape', [(4, len(EXPECTED_FEATURES)), (4, 1, len(EXPECTED_FEATURES)),
+                                   (4, LOOKBACK + 1, len(EXPECTED_FEATURES)), (4, LOOKBACK, 2)])
+def test_to_windows_rejects_anything_but_full_windows(shape):
+    with pytest.raises(ValueError):
+        to_windows(np.zeros(shape), [f"SYM{i}" for i in range(shape[0])], LOOKBACK)
+
+def test_to_windows_builds_the_latest_window_from_bars():
+    windows, symbols = to_windows({'AAPL': _bars(5), 'MSFT': _bars(3, 100)}, None, LOOKBACK)
+    assert symbols == ['AAPL', 'MSFT']
+    np.testing.assert_array_equal(windows[0], _bars(5).to_numpy()[-LOOKBACK:])
+    np.testing.assert_array_equal(windows[1], _bars(3, 100).to_numpy())
+    with pytest.raises(ValueError):
+        to_windows({'AAPL': _bars(LOOKBACK - 1)}, None, LOOKBACK)
+
+def test_a_single_bar_only_fills_a_one_bar_window():
+    bar = dict(zip(EXPECTED_FEATURES, range(len(EXPECTED_FEATURES))))
+    assert to_bars(bar, 1).to_dict('records') == [bar]
+    with pytest.raises(ValueError, match='cannot fill a 3-bar window'):
+        to_bars(bar, LOOKBACK)
+    with pytest.raises(ValueError):
+        to_bars([bar], 1)
+    bars = _bars(LOOKBACK)
+    assert to_bars(bars, LOOKBACK) is bars
+
+def test_client_sends_windows_through_the_server():
+    server = ModelServer(SumPredictor(), port=0, max_wait_ms=1)
+    server.start_in_thread()
+    client = ModelClient(port=server.port, lookback=LOOKBACK)
+    try:
+        bars = _bars(6)
+        assert client.predict(bars)[0] == pytest.approx(bars.to_numpy()[-LOOKBACK:].sum())
+        windows = np.random.default_rng(0).normal(size=(5, LOOKBACK, len(EXPECTED_FEATURES))).astype(np.float32)
+        predictions = client.predict_batch(windows, list('abcde'))
+        np.testing.assert_allclose([predictions[s] for s in 'abcde'], windows.sum(axis=(1, 2)), rtol=1e-5)
+        with pytest.raises(ValueError):
+            client.predict_batch(windows[:, 1:], list('abcde'))
+        # The server checks the window length itself, whatever the client was configured with
+        short_client = ModelClient(port=server.port, lookback=LOOKBACK - 1)
+        with pytest.raises(RuntimeError):
+            short_client.predict(bars)
+        short_client.close()
+        with pytest.raises(ValueError):
+            client.predict(bars.iloc[-1].to_dict())  # Rejected before anything is sent
+    finally:
+        client.close()
+
+class SlowSumPredictor(SumPredictor):
+    """A forward pass that takes a while, so requests pile up behind it as they would behind a real model."""
+    def predict_batch(self, features, symbols=None):
+        time.sleep(0.02)
+        return super().predict_batch(features, symbols)
+
+def test_concurrent_requests_are_merged_into_bounded_batches():
+    n_clients, max_batch_size = 16, 4
+    server = ModelServer(SlowSumPredictor(), port=0, max_batch_size=max_batch_size, max_wait_ms=20)
+    server.start_in_thread()
+    clients = [ModelClient(port=server.port, lookback=LOOKBACK) for _ in range(n_clients)]
+    windows = np.random.default_rng(0).normal(size=(n_clients, LOOKBACK, len(EXPECTED_FEATURES))).astype(np.float32)
+    barrier = threading.Barrier(n_clients)
+    results = [None] * n_clients
+
+    def request(i):
+        barrier.wait()
+        results[i] = clients[i].predict_batch(windows[i:i + 1], ['x'])['x']
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(n_clients)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        for client in clients:
+            client.close()
+    np.testing.assert_allclose(results, windows.sum(axis=(1, 2)), rtol=1e-5)
+    assert server.rows_served == n_clients
+    assert server.batches_run < n_clients
+    assert server.largest_batch <= max_batch_size
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('tensorflow')
+from sklearn.preprocessing import StandardScaler
+
+from models.numpy_runtime import NumpyStockPricePredictor, export_model
+from models.predict import EXPECTED_FEATURES
+from models.train import build_model
+
+LOOKBACK = 5
+
+@pytest.fixture(scope='module')
+def models(tmp_path_factory):
+    rng = np.random.default_rng(0)
+    keras_model = build_model(len(EXPECTED_FEATURES))
+    history = pd.DataFrame(rng.normal(10, 3, size=(500, len(EXPECTED_FEATURES))), columns=EXPECTED_FEATURES)
+    scaler = StandardScaler().fit(history)
+    path = tmp_path_factory.mktemp('runtime') / 'model.npz'
+    export_model(keras_model, scaler, path)
+    return keras_model, scaler, NumpyStockPricePredictor(path, lookback=LOOKBACK)
+
+def test_forward_matches_keras(models):
+    keras_model, _, runtime = models
+    windows = np.random.default_rng(1).normal(size=(64, LOOKBACK, len(EXPECTED_FEATURES))).astype(np.float32)
+    expected = np.asarray(keras_model([windows[:, -1], windows], training=False))
+    np.testing.assert_allclose(runtime.forward(windows[:, -1], windows), expected, rtol=1e-4, atol=1e-5)
+
+def test_predict_scales_the_latest_window_like_keras_inputs(models):
+    keras_model, scaler, runtime = models
+    bars = pd.DataFrame(np.random.default_rng(2).normal(10, 3, size=(LOOKBACK + 3, len(EXPECTED_FEATURES))),
+                        columns=EXPECTED_FEATURES)
+    window = scaler.transform(bars).astype(np.float32)[None, -LOOKBACK:]
+    expected = np.asarray(keras_model([window[:, -1], window], training=False)).reshape(-1)
+    np.testing.assert_allclose(runtime.predict(bars), expected, rtol=1e-4, atol=1e-5)
+    with pytest.raises(ValueError, match='single bar'):
+        runtime.predict(bars.iloc[-1].to_dict())
+
+def test_predict_batch_takes_full_windows_only(models):
+    keras_model, scaler, runtime = models
+    rng = np.random.default_rng(3)
+    raw = rng.normal(10, 3, size=(8, LOOKBACK, len(EXPECTED_FEATURES))).astype(np.float32)
+    scaled = ((raw - scaler.mean_) / scaler.scale_).astype(np.float32)
+    expected = np.asarray(keras_model([scaled[:, -1], scaled], training=False)).reshape(-1)
+    symbols = [f"SYM{i}" for i in range(len(raw))]
+    predictions = runtime.predict_batch(raw, symbols)
+    np.testing.assert_allclose([predictions[symbol] for symbol in symbols], expected, rtol=1e-4, atol=1e-5)
+    with pytest.raises(ValueError):
+        runtime.predict_batch(raw[:, -1], symbols)  # One row per symbol is not a window
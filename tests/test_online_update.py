@@ -0,0 +1,126 @@
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('tensorflow')
+from sklearn.preprocessing import StandardScaler
+
+from data.processor import DataProcessor
+from models.online_update import OnlineUpdateService
+from models.predict import EXPECTED_FEATURES
+from models.train import build_model
+from models.windows import WindowBuilder
+
+LOOKBACK = 5
+FEATURE_COLUMNS = {'Feature1': 'Close', 'Feature2': 'Volume', 'Feature3': 'SMA_20', 'Feature4': 'RSI'}
+
+@pytest.fixture
+def service():
+    scaler = StandardScaler().fit(pd.DataFrame(np.random.default_rng(0).normal(size=(100, len(EXPECTED_FEATURES))),
+                                               columns=EXPECTED_FEATURES))
+    updater = SimpleNamespace(model=build_model(len(EXPECTED_FEATURES)), scaler=scaler,
+                              window_builder=WindowBuilder(LOOKBACK))
+    return OnlineUpdateService(updater, buffer_capacity=1000, feature_columns=FEATURE_COLUMNS)
+
+def _candles(n_bars=150):
+    rng = np.random.default_rng(1)
+    return pd.DataFrame({'Close': 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars))),
+                         'Volume': rng.integers(1000, 2000, n_bars).astype(float),
+                         'Timestamp': 1700000000 + 86400 * np.arange(n_bars)})
+
+def _processed(candles, start, end):
+    """A fetch of bars [start, end): rebuilt from scratch with a fresh RangeIndex, like every live cycle."""
+    return DataProcessor().add_technical_indicators(candles.iloc[start:end].reset_index(drop=True))
+
+def test_sliding_windows_add_each_bar_once(service):
+    candles = _candles()
+    processed = _processed(candles, 0, 100)
+    first = service.add_bars('AAPL', processed)
+    # SMA_20 is the last feature to warm up (19 NaN bars); the newest bar has no label yet
+    assert first == 100 - 19 - (LOOKBACK - 1) - 1
+    assert service.add_bars('AAPL', _processed(candles, 0, 100)) == 0
+    assert service.add_bars('AAPL', _processed(candles, 1, 101)) == 1
+    assert service.add_bars('AAPL', _processed(candles, 5, 105)) == 4
+    assert service.buffer.total_added == first + 5
+    assert np.isfinite(service.buffer.lstm_inputs[:len(service.buffer)]).all()
+
+def test_bars_need_the_mapped_columns_and_timestamps(service):
+    processed = _processed(_candles(), 0, 100)
+    with pytest.raises(ValueError):
+        service.add_bars('AAPL', processed.drop(columns=['Timestamp']))
+    with pytest.raises(ValueError):
+        service.add_bars('AAPL', processed.drop(columns=['RSI']))
+
+def _fill(service, value):
+    """Give the training model a recognisable set of weights: every entry equal to value."""
+    service.updater.model.set_weights([np.full_like(w, value) for w in service.updater.model.get_weights()])
+
+def _front_weights(service):
+    return [np.array(w) for w in service._buffers[service._front].get_weights()]
+
+def test_update_now_trains_and_publishes_new_weights(service):
+    assert not service.update_now()  # Nothing buffered yet
+    service.add_bars('AAPL', _processed(_candles(), 0, 150))
+    windows = np.random.default_rng(2).normal(size=(3, LOOKBACK, len(EXPECTED_FEATURES)))
+    before, weights = service.predict_batch(windows, list('abc')), _front_weights(service)
+    assert service.update_now()
+    assert service.updates_run == 1 and service.weights_version == 1
+    published = _front_weights(service)
+    assert any(not np.array_equal(old, new) for old, new in zip(weights, published))
+    for trained, new in zip(service.updater.model.get_weights(), published):
+        np.testing.assert_array_equal(trained, new)
+    assert service.predict_batch(windows, list('abc')) != before
+
+def test_publish_waits_for_readers_of_the_idle_copy(service):
+    _fill(service, 1.0)
+    service.publish_weights()
+    index = service._acquire()  # A prediction running on the version 1 weights
+    _fill(service, 2.0)
+    service.publish_weights()  # Goes into the other copy straight away
+    _fill(service, 3.0)
+    publisher = threading.Thread(target=service.publish_weights)
+    publisher.start()
+    publisher.join(0.2)
+    # The third version would overwrite the copy still in use, so it waits for the reader
+    assert publisher.is_alive()
+    assert all((w == 1.0).all() for w in service._buffers[index].get_weights())
+    assert all((w == 2.0).all() for w in _front_weights(service))
+    service._release(index)
+    publisher.join(5)
+    assert not publisher.is_alive()
+    assert all((w == 3.0).all() for w in _front_weights(service)) and service.weights_version == 3
+
+def test_readers_see_a_complete_set_of_weights(service):
+    stop, seen, torn = threading.Event(), set(), []
+
+    def reader():
+        while not stop.is_set():
+            index = service._acquire()
+            try:
+                values = {float(v) for w in service._buffers[index].get_weights() for v in np.unique(w)}
+            finally:
+                service._release(index)
+            # Every version fills all weights with one value, so a mixed set means a torn read
+            if len(values) == 1:
+                seen.update(values)
+            else:
+                torn.append(values)
+
+    _fill(service, 0.0)
+    service.publish_weights()
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    try:
+        for version in range(1, 41):
+            _fill(service, float(version))
+            service.publish_weights()
+    finally:
+        stop.set()
+        for thread in readers:
+            thread.join()
+    assert not torn
+    assert len(seen) > 1
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from models.option_pricing import binomial_price, black_scholes_greeks, black_scholes_price, implied_volatility
+
+SPOT, RATE, DIVIDEND = 100.0, 0.03, 0.01
+STRIKES = np.linspace(70, 130, 13)[None, :]
+EXPIRIES = np.array([30, 90, 365, 730])[:, None] / 365
+VOLATILITY = 0.25
+
+def _price(option_type='call', spot=SPOT, expiry=EXPIRIES, rate=RATE, volatility=VOLATILITY, dividend_yield=DIVIDEND):
+    return black_scholes_price(spot, STRIKES, expiry, rate, volatility, option_type, dividend_yield)
+
+def test_put_call_parity():
+    parity = SPOT * np.exp(-DIVIDEND * EXPIRIES) - STRIKES * np.exp(-RATE * EXPIRIES)
+    np.testing.assert_allclose(_price('call') - _price('put'), parity, atol=1e-10)
+
+def test_known_value_and_degenerate_contracts():
+    # The textbook at-the-money example: S = K = 100, T = 1, r = 5%, sigma = 20%
+    assert black_scholes_price(100, 100, 1, 0.05, 0.2, 'call') == pytest.approx(10.450583572185565)
+    assert black_scholes_price(100, 100, 1, 0.05, 0.2, 'put') == pytest.approx(5.573526022256971)
+    np.testing.assert_allclose(black_scholes_price(100, [90, 110], 0, 0.05, 0.2, 'call'), [10.0, 0.0])
+    with pytest.raises(ValueError):
+        black_scholes_price(100, 100, 1, 0.05, 0.2, 'straddle')
+
+@pytest.mark.parametrize('option_type', ['call', 'put'])
+def test_greeks_match_finite_differences(option_type):
+    greeks = black_scholes_greeks(SPOT, STRIKES, EXPIRIES, RATE, VOLATILITY, option_type, DIVIDEND)
+    h = 1e-4
+    bump = lambda **kwargs: _price(option_type, **kwargs)
+    np.testing.assert_allclose(greeks['delta'], (bump(spot=SPOT + h) - bump(spot=SPOT - h)) / (2 * h), atol=1e-6)
+    np.testing.assert_allclose(greeks['gamma'], (bump(spot=SPOT + 1e-2) - 2 * bump() + bump(spot=SPOT - 1e-2)) / 1e-4,
+                               atol=1e-5)
+    np.testing.assert_allclose(greeks['vega'], (bump(volatility=VOLATILITY + h) - bump(volatility=VOLATILITY - h)) / (2 * h),
+                               rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(greeks['rho'], (bump(rate=RATE + h) - bump(rate=RATE - h)) / (2 * h), rtol=1e-5, atol=1e-6)
+    # Theta is the change in value as time passes, i.e. as the expiry shrinks
+    np.testing.assert_allclose(greeks['theta'], -(bump(expiry=EXPIRIES + h) - bump(expiry=EXPIRIES - h)) / (2 * h),
+                               rtol=1e-4, atol=1e-5)
+
+@pytest.mark.parametrize('option_type', ['call', 'put'])
+def test_implied_volatility_round_trip(option_type):
+    volatilities = np.array([0.08, 0.2, 0.45, 1.2])[:, None]
+    prices = black_scholes_price(SPOT, STRIKES, EXPIRIES, RATE, volatilities, option_type, DIVIDEND)
+    recovered = implied_volatility(prices, SPOT, STRIKES, EXPIRIES, RATE, option_type, DIVIDEND)
+    vega = black_scholes_greeks(SPOT, STRIKES, EXPIRIES, RATE, volatilities, option_type, DIVIDEND)['vega']
+    identifiable = vega > 1e-6
+    assert identifiable.mean() > 0.8  # Far from the money at low volatility the price barely moves
+    np.testing.assert_allclose(recovered[identifiable], np.broadcast_to(volatilities, prices.shape)[identifiable],
+                               atol=1e-6)
+
+def test_implied_volatility_is_nan_outside_the_arbitrage_bounds():
+    intrinsic = SPOT * np.exp(-DIVIDEND) - 90 * np.exp(-RATE)
+    assert np.isnan(implied_volatility([intrinsic - 1, SPOT * 2], SPOT, 90, 1.0, RATE, 'call', DIVIDEND)).all()
+
+@pytest.mark.parametrize('option_type', ['call', 'put'])
+def test_european_tree_converges_to_black_scholes(option_type):
+    errors = [np.abs(binomial_price(SPOT, STRIKES, EXPIRIES, RATE, VOLATILITY, option_type, DIVIDEND, steps=steps,
+                                    american=False) - _price(option_type)).max() for steps in (50, 200, 800)]
+    assert errors[2] < errors[0] and errors[2] < 0.02
+
+def test_american_prices_carry_an_early_exercise_premium():
+    american = binomial_price(SPOT, STRIKES, EXPIRIES, 0.06, VOLATILITY, 'put', 0.0, steps=400)
+    european = binomial_price(SPOT, STRIKES, EXPIRIES, 0.06, VOLATILITY, 'put', 0.0, steps=400, american=False)
+    assert (american >= european - 1e-12).all() and (american - european).max() > 0.1
+    assert (american >= np.maximum(STRIKES - SPOT, 0) - 1e-9).all()
+    # Without dividends an American call is never exercised early
+    np.testing.assert_allclose(binomial_price(SPOT, STRIKES, EXPIRIES, 0.06, VOLATILITY, 'call', 0.0, steps=400),
+                               binomial_price(SPOT, STRIKES, EXPIRIES, 0.06, VOLATILITY, 'call', 0.0, steps=400,
+                                              american=False), atol=1e-10)
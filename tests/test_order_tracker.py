@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from trading.executer import TradeExecuter
+from trading.mock_broker import MockBroker
+from trading.order_tracker import OrderTracker
+
+API_KEY = 'test_key'
+
+def _update(order_id, filled, status, average_price=100.0, quantity=10):
+    return {'order_id': order_id, 'symbol': 'AAPL', 'action': 'sell', 'quantity': quantity, 'status': status,
+            'filled_quantity': filled, 'average_price': average_price}
+
+def test_repeated_updates_publish_each_fill_once():
+    tracker = OrderTracker(executer=None)
+    tracker.track('1', 'AAPL', 'sell', 10, 100.0)
+    events = [tracker.apply_update(_update('1', 4, 'partially_filled', 100.0)),
+              tracker.apply_update(_update('1', 4, 'partially_filled', 100.0)),  # The same fill from the poll
+              tracker.apply_update(_update('1', 10, 'filled', 101.2)),
+              tracker.apply_update(_update('1', 10, 'filled', 101.2))]
+    fills = [event for event in events if event is not None]
+    assert [fill['quantity'] for fill in fills] == [-4.0, -6.0]  # Sells are negative
+    assert fills[1]['price'] == pytest.approx(102.0)  # New shares priced from the change in the average
+    assert '1' not in tracker.open_orders
+
+def test_closed_orders_leave_the_table_and_stay_recognised():
+    tracker = OrderTracker(executer=None, keep_closed=3)
+    fills = tracker.subscribe()
+    for i in range(5):
+        tracker.track(str(i), 'AAPL', 'sell', 10, 100.0)
+        tracker.apply_update(_update(str(i), 10, 'filled'))
+    assert not tracker.orders and not tracker.open_orders
+    assert list(tracker.closed_orders) == ['2', '3', '4']  # Only the most recent closed rows are kept
+    assert fills.qsize() == 5  # Every fill was published before its order was evicted
+    # A late duplicate (or a track() after the stream already closed it) books nothing again
+    assert tracker.apply_update(_update('4', 10, 'filled')) is None
+    assert tracker.track('4', 'AAPL', 'sell', 10, 100.0)['status'] == 'filled'
+    assert not tracker.orders and fills.qsize() == 5
+    assert asyncio.run(tracker.wait_closed('4'))['filled_quantity'] == 10
+
+def test_missing_average_price_falls_back_to_limit_price():
+    tracker = OrderTracker(executer=None)
+    tracker.track('1', 'AAPL', 'buy', 10, 99.5)
+    tracker.track('2', 'AAPL', 'buy', 10)
+    assert tracker.apply_update({**_update('1', 10, 'filled', None), 'action': 'buy'})['price'] == 99.5
+    assert tracker.apply_update({**_update('2', 10, 'filled', None), 'action': 'buy'})['price'] is None
+
+def test_wait_closed_returns_none_for_untracked_orders():
+    assert asyncio.run(OrderTracker(executer=None).wait_closed('unknown', timeout=0.1)) is None
+
+def test_stream_and_poll_together_book_every_fill_once():
+    broker = MockBroker(API_KEY, latency_ms=(0, 1), fill_delay_seconds=0.02, fill_parts=2, seed=0)
+    orders = [{'action': 'sell' if i % 3 == 0 else 'buy', 'symbol': f"SYM{i % 4}", 'quantity': 10, 'price': 100.0,
+               'client_order_id': f"order-{i}"} for i in range(30)]
+
+    async def main():
+        url = await broker.start()
+        try:
+            async with TradeExecuter(url, API_KEY) as executer:
+                tracker = OrderTracker(executer, stream_url=f"{url}/stream", poll_interval=0.01)
+                fills = tracker.subscribe()
+                tracker.start()
+                while not tracker.streaming:
+                    await asyncio.sleep(0.01)
+                order_ids = await executer.execute_trades(orders)
+                for order, order_id in zip(orders, order_ids):
+                    tracker.track(order_id, order['symbol'], order['action'], order['quantity'], order['price'])
+                # Poll while the stream is up too, so every fill can arrive from both sources
+                while tracker.open_orders:
+                    await tracker.poll_once()
+                    await asyncio.sleep(0.005)
+                await asyncio.wait_for(asyncio.gather(*(tracker.wait_closed(i) for i in order_ids)), 5)
+                await asyncio.sleep(0.05)  # Let late stream messages for closed orders arrive
+                await tracker.stop()
+            return order_ids, [fills.get_nowait() for _ in range(fills.qsize())]
+        finally:
+            await broker.stop()
+
+    order_ids, events = asyncio.run(main())
+    booked = {}
+    for event in events:
+        booked[event['order_id']] = booked.get(event['order_id'], 0.0) + event['quantity']
+        assert event['price'] == 100.0
+    expected = {order_id: (-10.0 if order['action'] == 'sell' else 10.0) for order, order_id in zip(orders, order_ids)}
+    assert booked == expected
+
+def test_fills_arrive_through_the_batched_poll_when_the_stream_drops():
+    broker = MockBroker(API_KEY, latency_ms=(0, 1), fill_delay_seconds=0.05, seed=0)
+    orders = [{'action': 'buy', 'symbol': f"SYM{i % 4}", 'quantity': 10, 'price': 100.0,
+               'client_order_id': f"order-{i}"} for i in range(10)]
+
+    async def main():
+        url = await broker.start()
+        try:
+            async with TradeExecuter(url, API_KEY) as executer:
+                # The stream does not come back within the test, so only polling can deliver the fills
+                tracker = OrderTracker(executer, stream_url=f"{url}/stream", poll_interval=0.02, reconnect_seconds=60)
+                fills = tracker.subscribe()
+                tracker.start()
+                while not tracker.streaming:
+                    await asyncio.sleep(0.01)
+                await broker.disconnect_streams()
+                while tracker.streaming:
+                    await asyncio.sleep(0.01)
+                order_ids = await executer.execute_trades(orders)
+                for order, order_id in zip(orders, order_ids):
+                    tracker.track(order_id, order['symbol'], order['action'], order['quantity'], order['price'])
+                await asyncio.wait_for(asyncio.gather(*(tracker.wait_closed(i) for i in order_ids)), 5)
+                await tracker.stop()
+                requests = executer.stats.summary()
+            return order_ids, [fills.get_nowait() for _ in range(fills.qsize())], requests
+        finally:
+            await broker.stop()
+
+    order_ids, events, requests = asyncio.run(main())
+    assert sorted(event['order_id'] for event in events) == sorted(order_ids)
+    assert all(event['quantity'] == 10.0 and event['price'] == 100.0 for event in events)
+    assert not broker.subscribers
+    assert requests['status_batch']['count'] > 0 and 'status' not in requests  # Batched polls, no per-order requests
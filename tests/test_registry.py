@@ -0,0 +1,101 @@
+import threading
+import time
+
+import numpy as np
+
+from models.options_strategy import OptionsStrategy
+from trading.registry import MarketSnapshot, OptionsStrategyAdapter, Strategy, StrategyDecision, StrategyRegistry, \
+    build_default_registry, realized_volatility
+from trading.risk_management import RiskManager
+from trading.strategy import INDICATOR_COLUMNS
+
+def _snapshot(n_symbols=200, seed=0):
+    rng = np.random.default_rng(seed)
+    prices = rng.normal(100, 5, n_symbols)
+    values = prices[:, None] + rng.normal(0, 3, size=(n_symbols, len(INDICATOR_COLUMNS)))
+    values[:, INDICATOR_COLUMNS.index('RSI')] = rng.uniform(0, 100, n_symbols)
+    return MarketSnapshot([f"SYM{i}" for i in range(n_symbols)], values, prices, rng.integers(1000, 100000, n_symbols),
+                          strike_price=prices * rng.uniform(0.9, 1.1, n_symbols), premium=rng.uniform(1, 5, n_symbols),
+                          volatility=rng.uniform(0.1, 0.5, n_symbols),
+                          price_upside=rng.uniform(0, 1, n_symbols), price_downside=rng.uniform(0, 1, n_symbols),
+                          position=rng.choice(['long', 'short'], n_symbols),
+                          target_price=prices * 1.1, stop_loss=prices * 0.95)
+
+class SlowVolatility(Strategy):
+    """Asks for the shared volatility input after a pause, so several of them overlap in the pool."""
+    def __init__(self, name, calls):
+        self.name = name
+        self.calls = calls
+
+    def evaluate(self, snapshot):
+        def compute(snapshot):
+            self.calls.append(threading.get_ident())
+            time.sleep(0.05)
+            return realized_volatility(snapshot)
+
+        volatility = snapshot.cached('volatility', compute)
+        return StrategyDecision(np.full(len(snapshot.symbols), 'Hold'), volatility)
+
+class Failing(Strategy):
+    name = 'failing'
+
+    def evaluate(self, snapshot):
+        raise RuntimeError("no data")
+
+def test_options_adapter_matches_the_per_symbol_rules():
+    snapshot = _snapshot()
+    for method in ('covered_call', 'protective_put'):
+        decision = OptionsStrategyAdapter(method, 0.5).evaluate(snapshot)
+        for i in range(len(snapshot.symbols)):
+            options = OptionsStrategy(float(snapshot.prices[i]), float(snapshot.fields['strike_price'][i]),
+                                      float(snapshot.fields['premium'][i]), float(snapshot.fields['volatility'][i]), 0.5,
+                                      {'price_upside': float(snapshot.fields['price_upside'][i]),
+                                       'price_downside': float(snapshot.fields['price_downside'][i])})
+            action, value = getattr(options, method)()
+            assert decision.actions[i] == action and decision.values[i] == value
+        assert (decision.actions != "No Action").any()
+
+def test_every_registered_strategy_is_evaluated_for_every_symbol():
+    snapshot = _snapshot()
+    registry = build_default_registry(RiskManager(10000, 0.1, 0.2), workers=4)
+    registry.register(Failing())
+    try:
+        parallel = registry.evaluate_all(snapshot)
+        serial = registry.evaluate_all(snapshot, parallel=False)
+    finally:
+        registry.shutdown()
+    # A failing strategy is left out without blocking the others
+    assert set(parallel) == set(registry.names()) - {'failing'}
+    for name, decision in parallel.items():
+        assert len(decision.actions) == len(decision.values) == len(snapshot.symbols)
+        assert np.array_equal(decision.actions, serial[name].actions)
+        assert np.array_equal(decision.values, serial[name].values)
+
+def test_shared_inputs_are_computed_once_per_snapshot():
+    calls = []
+    registry = StrategyRegistry(workers=4)
+    for i in range(4):
+        registry.register(SlowVolatility(f"slow{i}", calls))
+    try:
+        first = registry.evaluate_all(_snapshot())
+        registry.evaluate_all(_snapshot(seed=1))
+    finally:
+        registry.shutdown()
+    assert len(first) == 4
+    assert len(calls) == 2  # Once per snapshot, although four strategies asked for it concurrently
+
+def test_each_strategy_is_timed_separately():
+    registry = StrategyRegistry(workers=4)
+    registry.register(SlowVolatility('slow', []))
+    registry.register(OptionsStrategyAdapter('covered_call', 0.5))
+    registry.register(Failing())
+    try:
+        for seed in range(3):
+            registry.evaluate_all(_snapshot(seed=seed))
+    finally:
+        registry.shutdown()
+    timings = registry.timings()
+    assert set(timings) == {'slow', 'covered_call', 'failing'}
+    assert all(row['count'] == 3 for row in timings.values())
+    assert timings['failing']['errors'] == 3 and timings['slow']['errors'] == 0
+    assert timings['slow']['mean_ms'] >= 45  # The 50ms pause is charged to that strategy only
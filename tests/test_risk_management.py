@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from trading.risk_management import (PortfolioRiskManager, GROSS_LIMIT, NET_LIMIT, SYMBOL_LIMIT, VAR_LIMIT)
+
+SYMBOLS = ['AAPL', 'MSFT', 'GOOGL']
+DECAY = 0.94
+
+def _prices(n_bars=60, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.02, size=(n_bars, len(SYMBOLS))), axis=0))
+
+def _portfolio(max_gross=1e9, max_net=1e9, max_symbol=1e9, max_var=1e9):
+    return PortfolioRiskManager(SYMBOLS, 1_000_000, max_gross, max_net, max_symbol, max_var, decay=DECAY)
+
+def _book(portfolio, prices):
+    for bar in prices:
+        portfolio.on_bar(bar)
+    for symbol, quantity in zip(SYMBOLS, (100, -50, 30)):
+        portfolio.on_fill(symbol, quantity, prices[-1, portfolio.rows[symbol]])
+    return portfolio
+
+def test_covariance_matches_ewma_of_log_returns():
+    prices = _prices()
+    portfolio = _portfolio()
+    for bar in prices:
+        portfolio.on_bar(bar)
+    returns = np.diff(np.log(prices), axis=0)
+    # The first bar has no previous close and folds in a zero return
+    weights = (1 - DECAY) * DECAY ** np.arange(len(returns) - 1, -1, -1)
+    expected = np.einsum('t,ti,tj->ij', weights, returns, returns)
+    np.testing.assert_allclose(portfolio.covariance, expected, rtol=1e-10, atol=1e-16)
+    assert portfolio.bars_seen == len(prices)
+
+def test_mark_reprices_without_touching_the_covariance():
+    prices = _prices()
+    portfolio = _book(_portfolio(), prices)
+    covariance = portfolio.covariance.copy()
+    portfolio.mark(prices[-1] * 1.1)
+    np.testing.assert_array_equal(portfolio.covariance, covariance)
+    np.testing.assert_allclose(portfolio.exposures, portfolio.positions * prices[-1] * 1.1)
+    assert portfolio.gross_exposure == pytest.approx(np.abs(portfolio.exposures).sum())
+
+def test_cached_variance_matches_full_quadratic_form_after_fills():
+    prices = _prices()
+    portfolio = _book(_portfolio(), prices)
+    portfolio.on_fill('MSFT', 80, prices[-1, 1])
+    portfolio.on_fill('AAPL', -20, prices[-1, 0])
+    exposures = portfolio.positions * prices[-1]
+    np.testing.assert_allclose(portfolio.exposures, exposures)
+    assert portfolio._variance == pytest.approx(exposures @ portfolio.covariance @ exposures, rel=1e-10)
+    assert portfolio.net_exposure == pytest.approx(exposures.sum())
+    assert portfolio.gross_exposure == pytest.approx(np.abs(exposures).sum())
+    assert portfolio.equity == pytest.approx(portfolio.cash + exposures.sum())
+
+@pytest.mark.parametrize('limits, quantity, bit', [
+    ({'max_gross': 20_000}, 300, GROSS_LIMIT),
+    ({'max_net': 10_000}, 300, NET_LIMIT),
+    ({'max_symbol': 15_000}, 100, SYMBOL_LIMIT),
+    ({'max_var': 100}, 300, VAR_LIMIT),
+])
+def test_each_limit_bit_fires(limits, quantity, bit):
+    prices = _prices()
+    portfolio = _book(_portfolio(**limits), prices)
+    allowed, reasons = portfolio.check_orders(['AAPL'], [quantity])
+    assert not allowed[0] and reasons[0] & bit
+
+def test_orders_that_reduce_risk_pass_even_over_the_limits():
+    prices = _prices()
+    portfolio = _book(_portfolio(max_gross=1, max_net=1, max_symbol=1, max_var=1), prices)
+    allowed, reasons = portfolio.check_orders(['AAPL', 'GOOGL'], [-50, -10])
+    assert allowed.all() and not reasons.any()
+    allowed, _ = portfolio.check_orders(['AAPL'], [50])
+    assert not allowed[0]
+
+def test_approve_orders_blocks_orders_that_only_breach_together():
+    prices = _prices()
+    portfolio = _portfolio(max_gross=30_000)
+    for bar in prices:
+        portfolio.on_bar(bar)
+    quantities = [np.floor(20_000 / prices[-1, 0]), np.floor(20_000 / prices[-1, 2])]
+    allowed, _ = portfolio.check_orders(['AAPL', 'GOOGL'], quantities)
+    assert allowed.all()  # Each order alone fits
+    within_limits, metrics = portfolio.check_batch(['AAPL', 'GOOGL'], quantities)
+    assert not within_limits and metrics['gross_exposure'] > 30_000
+    allowed, reasons = portfolio.approve_orders(['AAPL', 'GOOGL'], quantities)
+    assert allowed.tolist() == [True, False] and reasons[1] & GROSS_LIMIT
+
+def test_check_batch_matches_the_book_after_the_fills():
+    prices = _prices()
+    portfolio = _book(_portfolio(), prices)
+    symbols, quantities = ['AAPL', 'MSFT', 'AAPL'], [10, 40, -25]
+    _, metrics = portfolio.check_batch(symbols, quantities)
+    for symbol, quantity in zip(symbols, quantities):
+        portfolio.on_fill(symbol, quantity, prices[-1, portfolio.rows[symbol]])
+    assert metrics['gross_exposure'] == pytest.approx(portfolio.gross_exposure)
+    assert metrics['net_exposure'] == pytest.approx(portfolio.net_exposure)
+    assert metrics['value_at_risk'] == pytest.approx(portfolio.value_at_risk)
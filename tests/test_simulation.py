@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import norm
+
+from trading.simulation import MonteCarloVaR, covariance_factor
+
+SYMBOLS = ['AAPL', 'MSFT', 'GOOGL', 'AMZN']
+
+def _book(seed=0):
+    rng = np.random.default_rng(seed)
+    volatility = rng.uniform(0.005, 0.015, len(SYMBOLS))
+    correlation = np.full((len(SYMBOLS), len(SYMBOLS)), 0.4) + 0.6 * np.eye(len(SYMBOLS))
+    covariance = correlation * np.outer(volatility, volatility)
+    exposures = np.array([100_000.0, -40_000.0, 60_000.0, 25_000.0])
+    return covariance, exposures
+
+def _simulator(**kwargs):
+    covariance, exposures = _book()
+    return MonteCarloVaR(SYMBOLS, covariance, exposures, **{'chunk_size': 5000, **kwargs})
+
+def test_same_seed_gives_the_same_report_for_any_number_of_workers():
+    simulator = _simulator()
+    serial = simulator.run(40000, seed=7, workers=1)
+    pd.testing.assert_frame_equal(serial, simulator.run(40000, seed=7, workers=3))
+    assert not serial.equals(simulator.run(40000, seed=8, workers=1))
+
+def test_gaussian_var_is_close_to_the_parametric_value():
+    covariance, exposures = _book()
+    horizon = 4
+    report = _simulator(horizon_bars=horizon).run(200000, seed=0, workers=1)
+    # Small returns make the book's P&L nearly linear in them, so losses are close to N(0, e' S e)
+    sigma = np.sqrt(horizon * exposures @ covariance @ exposures)
+    for confidence in (0.95, 0.99):
+        label = f"{confidence * 100:g}"
+        assert report.loc['PORTFOLIO', f'VaR_{label}'] == pytest.approx(norm.ppf(confidence) * sigma, rel=0.03)
+        expected_cvar = sigma * norm.pdf(norm.ppf(confidence)) / (1 - confidence)
+        assert report.loc['PORTFOLIO', f'CVaR_{label}'] == pytest.approx(expected_cvar, rel=0.03)
+    symbol_sigma = np.sqrt(horizon * np.diag(covariance)) * np.abs(exposures)
+    np.testing.assert_allclose(report.loc[SYMBOLS, 'VaR_99'], norm.ppf(0.99) * symbol_sigma, rtol=0.05)
+
+def test_cvar_is_at_least_var_and_grows_with_confidence():
+    report = _simulator().run(50000, seed=1, workers=1)
+    assert (report['CVaR_95'] >= report['VaR_95']).all()
+    assert (report['CVaR_99'] >= report['VaR_99']).all()
+    assert (report['VaR_99'] >= report['VaR_95']).all()
+    stressed = _simulator().run(50000, seed=1, workers=1, volatility_multiplier=2.0)
+    assert (stressed['VaR_99'] > report['VaR_99']).all()
+
+def test_stress_reprices_every_position():
+    covariance, exposures = _book()
+    shocks = np.log([0.9, 1.1, 0.95, 1.0])
+    table = _simulator().stress({'crash': np.log(0.8), 'mixed': shocks})
+    np.testing.assert_allclose(table.loc['crash', SYMBOLS], exposures * -0.2)
+    np.testing.assert_allclose(table.loc['mixed', SYMBOLS], exposures * np.array([-0.1, 0.1, -0.05, 0.0]))
+    np.testing.assert_allclose(table['PORTFOLIO'], table[SYMBOLS].sum(axis=1))
+
+def test_factor_of_a_singular_covariance_still_reproduces_it():
+    covariance, _ = _book()
+    covariance[3], covariance[:, 3] = 0.0, 0.0  # A symbol with no return history yet
+    factor = covariance_factor(covariance)
+    np.testing.assert_allclose(factor @ factor.T, covariance, atol=1e-12)
@@ -0,0 +1,84 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.sweep import SweepRunner, walk_forward_folds
+from models.windows import WindowBuilder
+
+def _check_folds(folds, ends, min_train_fraction):
+    previous_train = np.empty(0, dtype=ends.dtype)
+    for train, val in folds:
+        assert len(train) and len(val)
+        assert train.max() < val.min()  # Validation comes strictly after training
+        assert not np.intersect1d(train, val).size
+        assert np.array_equal(train, np.sort(train)) and np.array_equal(val, np.sort(val))
+        assert np.array_equal(train[:len(previous_train)], previous_train)  # Expanding window
+        previous_train = train
+    vals = np.concatenate([val for _, val in folds])
+    assert np.array_equal(vals, ends[len(folds[0][0]):])  # Back to back, through the final window
+    assert len(folds[0][0]) == int(np.ceil(min_train_fraction * len(ends)))
+
+def test_walk_forward_folds_are_time_ordered_and_do_not_overlap():
+    ends = WindowBuilder(5).valid_ends(1003)
+    folds = list(walk_forward_folds(ends, 4, 0.6))
+    assert len(folds) == 4
+    _check_folds(folds, ends, 0.6)
+    assert sum(len(val) for _, val in folds) == len(ends) - len(folds[0][0])
+
+def test_walk_forward_folds_split_each_symbol_history():
+    groups = np.repeat([0, 1, 2], [400, 250, 600])
+    ends = WindowBuilder(10).valid_ends(len(groups), groups)
+    folds = list(walk_forward_folds(ends, 3, 0.5, groups))
+    for symbol in range(3):
+        own = ends[groups[ends] == symbol]
+        _check_folds([(train[groups[train] == symbol], val[groups[val] == symbol]) for train, val in folds], own, 0.5)
+
+def _runner(tmp_path, **kwargs):
+    return SweepRunner(str(tmp_path / 'rows.csv'), str(tmp_path / 'sweep'), n_folds=2, lookback=3, workers=1, **kwargs)
+
+def _write_checkpoint(runner, trials):
+    os.makedirs(runner.work_dir, exist_ok=True)
+    with open(runner.checkpoint_path, 'w') as f:
+        for params, fold in trials:
+            f.write(json.dumps({'params': params, 'fold': fold, 'val_mse': 1.0, 'best_epoch': 1, 'seconds': 0.1}) + '\n')
+
+def test_resume_skips_finished_trials(tmp_path):
+    runner = _runner(tmp_path, param_grid={'learning_rate': [1e-3, 3e-4], 'batch_size': [16, 32]})
+    assert len(runner.pending_trials()) == 8
+    _write_checkpoint(runner, [({'batch_size': 16, 'learning_rate': 1e-3}, 0),
+                               ({'batch_size': 32, 'learning_rate': 3e-4}, 1)])
+    pending = runner.pending_trials()
+    assert len(pending) == 6
+    assert ({'batch_size': 16, 'learning_rate': 1e-3}, 0) not in pending
+    assert ({'batch_size': 16, 'learning_rate': 1e-3}, 1) in pending
+
+def test_resume_recognises_sampled_parameters(tmp_path):
+    # Random draws come back as NumPy scalars; they must still match their JSON round trip
+    runner = _runner(tmp_path, param_distributions={'learning_rate': np.array([1e-3, 3e-4, 1e-4]),
+                                                    'batch_size': np.array([16, 32])}, n_iter=4, seed=3)
+    _write_checkpoint(runner, runner.pending_trials())
+    assert runner.pending_trials() == []
+
+def test_rerun_trains_only_the_missing_trials(tmp_path):
+    pytest.importorskip('tensorflow')
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(rng.normal(size=(120, 4)), columns=['Feature1', 'Feature2', 'Feature3', 'Feature4'])
+    frame['Stock_Price'] = frame['Feature1'].cumsum()
+    frame.to_csv(tmp_path / 'rows.csv', index=False)
+    runner = _runner(tmp_path, param_grid={'learning_rate': [1e-3, 3e-4], 'epochs': [1]})
+
+    table = runner.run()
+    assert len(runner.load_results()) == 4 and (table['folds'] == 2).all()
+    lines = open(runner.checkpoint_path).read().splitlines()
+    with open(runner.checkpoint_path, 'w') as f:  # As if the sweep had been interrupted after three trials
+        f.write('\n'.join(lines[:3]) + '\n')
+    runner.run()
+    rerun = open(runner.checkpoint_path).read().splitlines()
+    assert rerun[:3] == lines[:3] and len(rerun) == 4
+    missing, retrained = json.loads(lines[3]), json.loads(rerun[3])
+    assert (retrained['params'], retrained['fold']) == (missing['params'], missing['fold'])
+    runner.run()
+    assert len(open(runner.checkpoint_path).read().splitlines()) == 4
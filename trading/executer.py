@@ -1,64 +1,207 @@
-import requests
-import logging
 import asyncio
-import json
+import logging
+import time
+import uuid
+
+import aiohttp
+
+from data.async_fetcher import RETRY_STATUSES
+from trading.pipeline import StageStats
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 class TradeExecuter:
-    def __init__(self, api_url, api_key):
-        self.api_url = api_url
-        self.api_key = api_key
-
-    async def execute_trade(self, action, symbol, quantity, price=None):
+    def __init__(self, api_url, api_key, max_in_flight=32, max_retries=3, backoff_factor=0.1, timeout=10,
+                 bulk_orders=False, max_batch_size=100):
         """
-        Asynchronously send a trade order to the brokerage API to improve execution speed.
+        Async order gateway to the brokerage API at api_url. One pooled, keep-alive session is reused for
+        every request; it belongs to the event loop that first uses it.
+
+        Every order carries an idempotency key (client_order_id), sent as the Idempotency-Key header, so
+        retries after timeouts or 5xx responses can never place an order twice. With bulk_orders the
+        broker's POST /orders/batch endpoint takes up to max_batch_size orders per request.
+        Request latencies are kept in stats ('submit', 'submit_batch', 'status', 'status_batch').
         """
+        self.api_url = api_url.rstrip('/')
+        self.api_key = api_key
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.bulk_orders = bulk_orders
+        self.max_batch_size = max_batch_size
+        self.stats = StageStats()
+        self.session = None
+        self._session_loop = None
+        self._in_flight = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def get_session(self):
+        loop = asyncio.get_running_loop()
+        if self.session is None or self.session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.max_in_flight, keepalive_timeout=60)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout,
+                                                 headers={'Content-Type': 'application/json'})
+            self._session_loop = loop
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        return self.session
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    @staticmethod
+    def new_order_id():
+        """A fresh idempotency key for an order that has none."""
+        return uuid.uuid4().hex
+
+    def _order_payload(self, action, symbol, quantity, price, client_order_id):
         if action not in ['buy', 'sell']:
             logging.error("Invalid action specified. Must be 'buy' or 'sell'.")
             raise ValueError("Action must be 'buy' or 'sell'.")
-
-        data = {
+        return {
             'action': action,
             'symbol': symbol,
-            'quantity': quantity,
-            'price': price,
-            'apikey': self.api_key
+            'quantity': float(quantity),  # NumPy sizes are not JSON serializable
+            'price': None if price is None else float(price),
+            'client_order_id': client_order_id,
         }
-        headers = {'Content-Type': 'application/json'}
-        
-        try:
-            async with requests.AsyncClient() as client:
-                response = await client.post(f"{self.api_url}/orders", json=data, headers=headers)
-                response.raise_for_status()  # Raises HTTPError for bad responses
-                logging.info(f"Trade executed: {action} {quantity} shares of {symbol} at {price}")
-        except requests.exceptions.HTTPError as err:
-            logging.error(f"HTTP error occurred: {err}")
-        except Exception as err:
-            logging.error(f"An error occurred: {err}")
+
+    async def _request(self, stage, method, url, **kwargs):
+        """Send one request, retrying transient failures with backoff. Returns the JSON body or None."""
+        session = self.get_session()
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._in_flight:
+                    start = time.perf_counter()  # Latency of the request itself, not the wait for a slot
+                    async with session.request(method, url, **kwargs) as response:
+                        if response.status in RETRY_STATUSES and attempt < self.max_retries:
+                            logging.warning("HTTP %s from %s %s, retrying", response.status, method, url)
+                        else:
+                            response.raise_for_status()  # Raises for bad responses
+                            body = await response.json(content_type=None)
+                            self.stats.record(stage, time.perf_counter() - start)
+                            return body
+            except aiohttp.ClientResponseError as err:
+                self.stats.record_error(stage)
+                logging.error(f"HTTP error occurred: {err}")
+                return None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                if attempt >= self.max_retries:
+                    self.stats.record_error(stage)
+                    logging.error(f"An error occurred: {err}")
+                    return None
+            await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+        self.stats.record_error(stage)
+        return None
+
+    async def execute_trade(self, action, symbol, quantity, price=None, client_order_id=None):
+        """
+        Asynchronously send a trade order to the brokerage API. Returns the broker's order id,
+        or None if the order was rejected or could not be sent.
+        """
+        client_order_id = client_order_id or self.new_order_id()
+        data = {**self._order_payload(action, symbol, quantity, price, client_order_id), 'apikey': self.api_key}
+        body = await self._request('submit', 'POST', f"{self.api_url}/orders", json=data,
+                                   headers={'Idempotency-Key': client_order_id})
+        if body is None:
+            return None
+        logging.info(f"Trade executed: {action} {quantity} shares of {symbol} at {price}")
+        return body['order_id']
+
+    async def execute_trades(self, orders):
+        """
+        Submit a cycle's orders concurrently. orders are dicts with action, symbol, quantity and optional
+        price and client_order_id. Returns the order ids in the same order (None where an order failed).
+        """
+        orders = [{**order, 'client_order_id': order.get('client_order_id') or self.new_order_id()} for order in orders]
+        if not self.bulk_orders:
+            return list(await asyncio.gather(*(
+                self.execute_trade(order['action'], order['symbol'], order['quantity'], order.get('price'),
+                                   order['client_order_id']) for order in orders)))
+
+        batches = [orders[start:start + self.max_batch_size] for start in range(0, len(orders), self.max_batch_size)]
+        results = await asyncio.gather(*(self._submit_batch(batch) for batch in batches))
+        return [order_id for batch_ids in results for order_id in batch_ids]
+
+    async def _submit_batch(self, orders):
+        payload = {'apikey': self.api_key, 'orders': [
+            self._order_payload(order['action'], order['symbol'], order['quantity'], order.get('price'),
+                                order['client_order_id']) for order in orders]}
+        body = await self._request('submit_batch', 'POST', f"{self.api_url}/orders/batch", json=payload)
+        if body is None:
+            return [None] * len(orders)
+        # Matched by idempotency key, so the result does not depend on the broker's response order
+        order_ids = {row['client_order_id']: row['order_id'] for row in body['orders']}
+        logging.info(f"Batch of {len(orders)} orders executed.")
+        return [order_ids.get(order['client_order_id']) for order in orders]
 
     async def check_order_status(self, order_id):
         """
-        Asynchronously check the status of an order.
+        Asynchronously check the status of an order. Returns the status string, or None if unavailable.
         """
-        try:
-            async with requests.AsyncClient() as client:
-                response = await client.get(f"{self.api_url}/orders/{order_id}", params={'apikey': self.api_key})
-                response.raise_for_status()  # Raises HTTPError for bad responses
-                logging.info(f"Order status: {json.loads(response.text)['status']}")
-        except requests.exceptions.HTTPError as err:
-            logging.error(f"HTTP error occurred: {err}")
-        except Exception as err:
-            logging.error(f"An error occurred: {err}")
+        body = await self._request('status', 'GET', f"{self.api_url}/orders/{order_id}", params={'apikey': self.api_key})
+        if body is None:
+            return None
+        logging.info(f"Order status: {body['status']}")
+        return body['status']
+
+    async def get_orders(self, order_ids):
+        """
+        Fetch the full status of many orders in one request (GET /orders?ids=...). Returns the list of
+        order status dicts, or None if the request failed.
+        """
+        if not order_ids:
+            return []
+        body = await self._request('status_batch', 'GET', f"{self.api_url}/orders",
+                                   params={'apikey': self.api_key, 'ids': ','.join(map(str, order_ids))})
+        return None if body is None else body['orders']
+
+    async def check_order_statuses(self, order_ids):
+        """Check several orders concurrently, returning {order_id: status}."""
+        statuses = await asyncio.gather(*(self.check_order_status(order_id) for order_id in order_ids))
+        return dict(zip(order_ids, statuses))
 
 # Example usage
 if __name__ == "__main__":
-    executer = TradeExecuter("https://api.brokerage.com", "your_api_key")
-    try:
-        # Example executing a buy order
-        asyncio.run(executer.execute_trade('buy', 'AAPL', 10, price=150.50))
-        # Example checking an order status
-        asyncio.run(executer.check_order_status("123456"))
-    except Exception as e:
-        logging.error(f"An exception occurred: {e}")
+    from trading.mock_broker import MockBroker
+
+    async def main():
+        n_orders = 500
+        broker = MockBroker(api_key='your_api_key', latency_ms=(1, 10), failure_rate=0.02, seed=0)
+        url = await broker.start()
+        orders = [{'action': 'buy' if i % 2 else 'sell', 'symbol': f"SYM{i % 50}", 'quantity': 10, 'price': 150.5,
+                   'client_order_id': f"cycle-1-{i}"} for i in range(n_orders)]
+        logging.disable(logging.WARNING)  # The gateway logs every order
+        try:
+            for mode, bulk in (('sequential', False), ('gather', False), ('bulk', True)):
+                async with TradeExecuter(url, 'your_api_key', bulk_orders=bulk) as executer:
+                    keyed = [{**order, 'client_order_id': f"{mode}-{order['client_order_id']}"} for order in orders]
+                    start = time.perf_counter()
+                    if mode == 'sequential':
+                        order_ids = [await executer.execute_trade(o['action'], o['symbol'], o['quantity'], o['price'],
+                                                                  o['client_order_id']) for o in keyed]
+                    else:
+                        order_ids = await executer.execute_trades(keyed)
+                    elapsed = time.perf_counter() - start
+                    stage = executer.stats.summary()['submit_batch' if bulk else 'submit']
+                    print(f"{mode:>10}: {n_orders} orders in {elapsed * 1e3:.0f}ms, {sum(i is not None for i in order_ids)} ids, "
+                          f"request p50={stage['p50_ms']:.1f}ms p95={stage['p95_ms']:.1f}ms max={stage['max_ms']:.1f}ms")
+
+                    # Resubmitting with the same keys returns the same orders instead of placing new ones
+                    placed = len(broker.orders)
+                    assert await executer.execute_trades(keyed) == order_ids and len(broker.orders) == placed
+                    statuses = await executer.check_order_statuses(order_ids[:50])
+                    print(f"{'':>10}  idempotent resubmit OK, statuses: {set(statuses.values())}")
+        finally:
+            logging.disable(logging.NOTSET)
+            await broker.stop()
+
+    asyncio.run(main())
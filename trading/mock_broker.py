@@ -0,0 +1,175 @@
+import asyncio
+import itertools
+import logging
+import random
+import time
+
+from aiohttp import web
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class MockBroker:
+    def __init__(self, api_key='test_key', latency_ms=(1, 5), failure_rate=0.0, fill_delay_seconds=0.0, fill_parts=1,
+                 lost_response_rate=0.0, lost_response_delay=None, seed=None):
+        """
+        Local brokerage API for testing TradeExecuter and OrderTracker: POST /orders, POST /orders/batch,
+        GET /orders/{id}, GET /orders?ids=1,2 (batched status) and a WebSocket order feed at /stream.
+        Each request waits a random latency in latency_ms; failure_rate of order requests answer 503 before
+        doing anything, so clients retry. Orders with an Idempotency-Key already seen return the original
+        order instead of a new one. lost_response_rate of order requests are accepted but their answer is lost:
+        it comes lost_response_delay seconds late (past the client's timeout) or, when that is None, the
+        connection is dropped without one, so clients retry orders the broker already holds. An accepted order fills in fill_parts equal parts, fill_delay_seconds
+        apart; every status change is pushed to the stream subscribers.
+        """
+        self.api_key = api_key
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self.fill_delay_seconds = fill_delay_seconds
+        self.fill_parts = fill_parts
+        self.lost_response_rate = lost_response_rate
+        self.lost_response_delay = lost_response_delay
+        self.responses_lost = 0
+        self.rng = random.Random(seed)
+        self.orders = {}
+        self.orders_by_key = {}
+        self.requests_received = 0
+        self.subscribers = set()
+        self._ids = itertools.count(1)
+        self._runner = None
+
+        self.app = web.Application()
+        self.app.add_routes([web.post('/orders', self.post_order), web.post('/orders/batch', self.post_batch),
+                             web.get('/orders', self.get_orders), web.get('/orders/{order_id}', self.get_order),
+                             web.get('/stream', self.stream)])
+
+    async def _simulate_network(self):
+        self.requests_received += 1
+        await asyncio.sleep(self.rng.uniform(*self.latency_ms) / 1000)
+        return self.rng.random() < self.failure_rate
+
+    def _accept(self, order, key):
+        if order.get('apikey') != self.api_key:
+            raise web.HTTPUnauthorized(text='Invalid API key')
+        if order.get('action') not in ('buy', 'sell') or not order.get('symbol') or not order.get('quantity', 0) > 0:
+            raise web.HTTPBadRequest(text='Invalid order')
+        if key is not None and key in self.orders_by_key:
+            return self.orders[self.orders_by_key[key]]
+        order_id = str(next(self._ids))
+        self.orders[order_id] = {
+            'order_id': order_id, 'client_order_id': key, 'action': order['action'], 'symbol': order['symbol'],
+            'quantity': order['quantity'], 'price': order.get('price'), 'status': 'new', 'filled_quantity': 0.0,
+            'accepted_at': time.monotonic(),
+        }
+        if key is not None:
+            self.orders_by_key[key] = order_id
+        loop = asyncio.get_running_loop()
+        for part in range(1, self.fill_parts + 1):
+            loop.call_later(self.fill_delay_seconds * part, self._fill, order_id, part)
+        self._publish(self.orders[order_id])
+        return self.orders[order_id]
+
+    def _fill(self, order_id, part):
+        order = self.orders[order_id]
+        order['filled_quantity'] = order['quantity'] * part / self.fill_parts
+        order['status'] = 'filled' if part == self.fill_parts else 'partially_filled'
+        self._publish(order)
+
+    def _publish(self, order):
+        message = self._status(order)
+        for ws in list(self.subscribers):
+            asyncio.ensure_future(ws.send_json(message))
+
+    def _status(self, order):
+        filled = order['filled_quantity'] > 0
+        return {'order_id': order['order_id'], 'client_order_id': order['client_order_id'], 'symbol': order['symbol'],
+                'action': order['action'], 'quantity': order['quantity'], 'status': order['status'],
+                'filled_quantity': order['filled_quantity'], 'average_price': order['price'] if filled else None}
+
+    async def _respond(self, request, body):
+        """Answer an order request that has been accepted, unless this answer is to be lost."""
+        if self.lost_response_rate and self.rng.random() < self.lost_response_rate:
+            self.responses_lost += 1
+            if self.lost_response_delay is None:
+                request.transport.close()
+                raise ConnectionResetError('Response dropped')
+            await asyncio.sleep(self.lost_response_delay)
+        return web.json_response(body)
+
+    async def post_order(self, request):
+        if await self._simulate_network():
+            raise web.HTTPServiceUnavailable()
+        order = self._accept(await request.json(), request.headers.get('Idempotency-Key'))
+        return await self._respond(request, self._status(order))
+
+    async def post_batch(self, request):
+        if await self._simulate_network():
+            raise web.HTTPServiceUnavailable()
+        body = await request.json()
+        orders = [self._accept({**order, 'apikey': body.get('apikey')}, order.get('client_order_id'))
+                  for order in body['orders']]
+        return await self._respond(request, {'orders': [self._status(order) for order in orders]})
+
+    async def get_order(self, request):
+        await self._simulate_network()
+        if request.query.get('apikey') != self.api_key:
+            raise web.HTTPUnauthorized(text='Invalid API key')
+        order = self.orders.get(request.match_info['order_id'])
+        if order is None:
+            raise web.HTTPNotFound(text='Unknown order')
+        return web.json_response(self._status(order))
+
+    async def get_orders(self, request):
+        await self._simulate_network()
+        if request.query.get('apikey') != self.api_key:
+            raise web.HTTPUnauthorized(text='Invalid API key')
+        order_ids = [order_id for order_id in request.query.get('ids', '').split(',') if order_id]
+        return web.json_response({'orders': [self._status(self.orders[order_id]) for order_id in order_ids
+                                             if order_id in self.orders]})
+
+    async def stream(self, request):
+        """WebSocket feed: one JSON status message per order update, for every order."""
+        if request.query.get('apikey') != self.api_key:
+            raise web.HTTPUnauthorized(text='Invalid API key')
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        self.subscribers.add(ws)
+        try:
+            async for _ in ws:  # The feed is one-way; incoming messages are ignored
+                pass
+        finally:
+            self.subscribers.discard(ws)
+        return ws
+
+    async def disconnect_streams(self):
+        """Drop every stream subscriber, e.g. to test a client's fallback to polling."""
+        for ws in list(self.subscribers):
+            await ws.close()
+
+    async def start(self, host='127.0.0.1', port=0):
+        """Serve on host:port (0 picks a free port) and return the base URL."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        await self.disconnect_streams()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+# Example usage
+if __name__ == "__main__":
+    async def main():
+        broker = MockBroker(latency_ms=(1, 3))
+        url = await broker.start(port=8900)
+        print(f"Mock broker listening on {url}; press Ctrl+C to stop")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await broker.stop()
+
+    asyncio.run(main())
@@ -0,0 +1,238 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+
+import aiohttp
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Statuses after which an order can no longer change
+TERMINAL_STATUSES = {'filled', 'canceled', 'cancelled', 'rejected', 'expired'}
+
+class OrderTracker:
+    def __init__(self, executer, stream_url=None, poll_interval=1.0, reconnect_seconds=5.0, keep_closed=1000):
+        """
+        In-memory table of working orders, kept current without a request per order. With stream_url the
+        broker's WebSocket order feed pushes updates; while the stream is down (or without one) every open
+        order is refreshed by one batched TradeExecuter.get_orders request each poll_interval seconds.
+
+        Fills are published as events {order_id, symbol, quantity (signed: sells are negative), price,
+        status}: to every subscribe() queue and every add_listener callback (plain or async). When the broker
+        reports no average fill price, price is the order's limit price (None for market orders). Updates are
+        applied idempotently, so a fill seen both on the stream and in a poll is only published once.
+        Once an order is closed and its fills published it leaves orders; the last keep_closed closed rows stay
+        in closed_orders, so late duplicate updates are still recognised while memory stays bounded.
+        """
+        self.executer = executer
+        self.stream_url = stream_url
+        self.poll_interval = poll_interval
+        self.reconnect_seconds = reconnect_seconds
+        self.orders = {}
+        self.open_orders = set()
+        self.keep_closed = keep_closed
+        self.closed_orders = OrderedDict()
+        self.streaming = False
+        self._subscribers = []
+        self._listeners = []
+        self._closed = {}  # order_id -> Event set once the order reaches a terminal status
+        self._tasks = []
+
+    def track(self, order_id, symbol, action, quantity, price=None):
+        """Start tracking a submitted order (status 'new' until the broker reports otherwise)."""
+        if order_id in self.orders:
+            return self.orders[order_id]
+        if order_id in self.closed_orders:
+            return self.closed_orders[order_id]
+        self.orders[order_id] = {'order_id': order_id, 'symbol': symbol, 'action': action, 'quantity': float(quantity),
+                                 'price': price, 'status': 'new', 'filled_quantity': 0.0, 'average_price': None,
+                                 'updated_at': time.time()}
+        self.open_orders.add(order_id)
+        return self.orders[order_id]
+
+    def subscribe(self):
+        """Return a queue that receives every fill event from now on."""
+        queue = asyncio.Queue()
+        self._subscribers.append(queue)
+        return queue
+
+    def add_listener(self, callback):
+        """Call callback(event) for every fill, e.g. PortfolioRiskManager updates. Coroutines are awaited as tasks."""
+        self._listeners.append(callback)
+
+    def apply_update(self, update):
+        """
+        Merge one broker status message into the table. Returns the fill event it produced, or None.
+        Unknown orders are added (orders placed before a restart still report their fills).
+        """
+        order_id = str(update['order_id'])
+        if order_id in self.closed_orders:
+            return None
+        order = self.orders.get(order_id)
+        if order is None:
+            order = self.track(order_id, update.get('symbol'), update.get('action'), update.get('quantity', 0.0),
+                               update.get('price'))
+
+        filled = float(update.get('filled_quantity') or 0.0)
+        delta = filled - order['filled_quantity']
+        order['status'] = update.get('status', order['status'])
+        order['updated_at'] = time.time()
+        event = None
+        if delta > 0:
+            # Price of the new shares from the change in the average fill price
+            average = update.get('average_price')
+            previous = order['average_price']
+            if average is None:
+                price = order['price']  # No fill price reported; the limit price is the best estimate
+            elif previous is None or order['filled_quantity'] == 0:
+                price = average
+            else:
+                price = (average * filled - previous * order['filled_quantity']) / delta
+            order['filled_quantity'], order['average_price'] = filled, average
+            sign = -1.0 if order['action'] == 'sell' else 1.0
+            event = {'order_id': order_id, 'symbol': order['symbol'], 'quantity': sign * delta, 'price': price,
+                     'status': order['status']}
+            self._publish(event)
+        if order['status'] in TERMINAL_STATUSES:
+            self._evict(order_id)
+        return event
+
+    def _evict(self, order_id):
+        """Move a closed order out of the working table into the bounded closed_orders history."""
+        self.open_orders.discard(order_id)
+        self.closed_orders[order_id] = self.orders.pop(order_id)
+        while len(self.closed_orders) > self.keep_closed:
+            self.closed_orders.popitem(last=False)
+        if order_id in self._closed:
+            self._closed.pop(order_id).set()
+
+    def _publish(self, event):
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+        for callback in self._listeners:
+            try:
+                result = callback(event)
+                if asyncio.iscoroutine(result):
+                    asyncio.ensure_future(result)
+            except Exception as e:
+                logging.error(f"Fill listener failed for order {event['order_id']}: {e}")
+
+    async def wait_closed(self, order_id, timeout=None):
+        """
+        Wait until an order reaches a terminal status; returns its row, or None if the order is not tracked
+        (or closed so long ago that it has left closed_orders).
+        """
+        if order_id in self.orders:
+            event = self._closed.setdefault(order_id, asyncio.Event())
+            await asyncio.wait_for(event.wait(), timeout)
+        if order_id not in self.closed_orders:
+            logging.warning(f"Order {order_id} is not tracked.")
+            return None
+        return self.closed_orders[order_id]
+
+    async def poll_once(self):
+        """Refresh every open order with a single batched status request."""
+        open_orders = sorted(self.open_orders)
+        if not open_orders:
+            return 0
+        updates = await self.executer.get_orders(open_orders)
+        for update in updates or []:
+            self.apply_update(update)
+        return len(open_orders)
+
+    async def _poll_loop(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if self.streaming:
+                continue
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logging.error(f"Order status poll failed: {e}")
+
+    async def _stream_loop(self):
+        session = self.executer.get_session()
+        while True:
+            try:
+                async with session.ws_connect(self.stream_url, params={'apikey': self.executer.api_key},
+                                              heartbeat=30) as ws:
+                    self.streaming = True
+                    logging.info("Order stream connected.")
+                    # Catch up on anything missed while the stream was down
+                    await self.poll_once()
+                    async for message in ws:
+                        if message.type == aiohttp.WSMsgType.TEXT:
+                            self.apply_update(json.loads(message.data))
+                        elif message.type == aiohttp.WSMsgType.ERROR:
+                            break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logging.warning(f"Order stream unavailable: {e}")
+            finally:
+                self.streaming = False
+            logging.warning(f"Order stream closed; polling until it reconnects in {self.reconnect_seconds}s.")
+            await asyncio.sleep(self.reconnect_seconds)
+
+    def start(self, loop=None):
+        """Start polling (and streaming, with a stream_url) on loop, by default the running one."""
+        loop = loop or asyncio.get_running_loop()
+        if not self._tasks:
+            self._tasks.append(loop.create_task(self._poll_loop()))
+            if self.stream_url:
+                self._tasks.append(loop.create_task(self._stream_loop()))
+        return self
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.streaming = False
+
+# Example usage
+if __name__ == "__main__":
+    from trading.executer import TradeExecuter
+    from trading.mock_broker import MockBroker
+
+    async def main():
+        broker = MockBroker(latency_ms=(1, 5), fill_delay_seconds=0.05, fill_parts=2, seed=0)
+        url = await broker.start()
+        logging.disable(logging.INFO)  # The gateway logs every order
+        async with TradeExecuter(url, 'test_key') as executer:
+            tracker = OrderTracker(executer, stream_url=f"{url}/stream", poll_interval=0.2, reconnect_seconds=0.5)
+            fills = tracker.subscribe()
+            positions = {}
+            tracker.add_listener(lambda fill: positions.__setitem__(
+                fill['symbol'], positions.get(fill['symbol'], 0.0) + fill['quantity']))
+            tracker.start()
+            while not tracker.streaming:
+                await asyncio.sleep(0.01)
+
+            async def submit(n_orders, prefix):
+                orders = [{'action': 'buy' if i % 3 else 'sell', 'symbol': f"SYM{i % 5}", 'quantity': 10, 'price': 100.0,
+                           'client_order_id': f"{prefix}-{i}"} for i in range(n_orders)]
+                for order, order_id in zip(orders, await executer.execute_trades(orders)):
+                    tracker.track(order_id, order['symbol'], order['action'], order['quantity'], order['price'])
+                return orders
+
+            requests_before = broker.requests_received
+            orders = await submit(100, 'streamed')
+            await asyncio.wait_for(asyncio.gather(*(tracker.wait_closed(i) for i in list(tracker.open_orders))), 5)
+            print(f"Streamed: {fills.qsize()} fill events for {len(orders)} orders, "
+                  f"{broker.requests_received - requests_before - len(orders)} status requests")
+
+            # Without the stream the tracker falls back to one batched poll per interval
+            await broker.disconnect_streams()
+            await asyncio.sleep(0.05)
+            requests_before, events_before = broker.requests_received, fills.qsize()
+            orders = await submit(100, 'polled')
+            await asyncio.wait_for(asyncio.gather(*(tracker.wait_closed(i) for i in list(tracker.open_orders))), 5)
+            print(f"Polled: {fills.qsize() - events_before} fill events for {len(orders)} orders, "
+                  f"{executer.stats.summary()['status_batch']['count']} batched status requests")
+            print("Net positions from fill events:", positions)
+            await tracker.stop()
+        logging.disable(logging.NOTSET)
+        await broker.stop()
+
+    asyncio.run(main())
@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Per-process cleaner/processor instances, created lazily inside each pool worker
+_cleaner = None
+_processor = None
+
+
+def clean_and_process(raw_data):
+    """Clean raw candles and add technical indicators. Runs inside the process pool."""
+    global _cleaner, _processor
+    if _cleaner is None:
+        from data.cleaner import DataCleaner
+        from data.processor import DataProcessor
+        _cleaner = DataCleaner()
+        _processor = DataProcessor()
+    from utilities.config import Config
+    cleaned_data = _cleaner.clean_stock_arrays(raw_data, Config.OUTLIER_WINDOW, Config.OUTLIER_Z_THRESHOLD)
+    return _processor.add_technical_indicators(cleaned_data, normalize=False)  # Price units, for the rules
+
+
+def _timed_call(func, *args):
+    """Run func(*args) and return its result together with the elapsed wall time."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class StageStats:
+    def __init__(self, window=1000):
+        """
+        Keep the most recent latency samples for each pipeline stage.
+        """
+        self.window = window
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+        self.errors = defaultdict(int)
+
+    def record(self, stage, seconds):
+        self.samples[stage].append(seconds)
+
+    def record_error(self, stage):
+        self.errors[stage] += 1
+
+    def summary(self):
+        """
+        Return count, mean, p50, p95 and max latency (in milliseconds) for each stage.
+        """
+        report = {}
+        for stage, samples in self.samples.items():
+            ordered = sorted(samples)
+            count = len(ordered)
+            report[stage] = {
+                'count': count,
+                'errors': self.errors[stage],
+                'mean_ms': 1000 * sum(ordered) / count,
+                'p50_ms': 1000 * ordered[int(0.50 * (count - 1))],
+                'p95_ms': 1000 * ordered[int(0.95 * (count - 1))],
+                'max_ms': 1000 * ordered[-1],
+            }
+        return report
+
+    def log_summary(self):
+        for stage, row in self.summary().items():
+            logging.info(f"Stage {stage}: n={row['count']} errors={row['errors']} mean={row['mean_ms']:.1f}ms "
+                         f"p50={row['p50_ms']:.1f}ms p95={row['p95_ms']:.1f}ms max={row['max_ms']:.1f}ms")
+
+
+class TradingPipeline:
+    def __init__(self, fetch_fn, decide_fn, execute_fn, process_fn=clean_and_process,
+                 fetch_workers=16, process_workers=None, queue_size=64):
+        """
+        Staged multi-symbol pipeline:
+        - fetch: I/O bound, runs in a bounded thread pool.
+        - process: CPU bound cleaning and indicators, runs in a process pool.
+        - decide/execute: runs on its own single worker, fed through a bounded queue.
+        A full queue stalls the upstream stages, so a slow decision stage applies backpressure.
+        process_fn must be picklable (a module level function).
+        """
+        if fetch_workers <= 0 or queue_size <= 0:
+            logging.error("Pipeline worker and queue sizes must be positive.")
+            raise ValueError("Pipeline worker and queue sizes must be positive.")
+
+        self.fetch_fn = fetch_fn
+        self.process_fn = process_fn
+        self.decide_fn = decide_fn
+        self.execute_fn = execute_fn
+        self.fetch_workers = fetch_workers
+        self.process_workers = process_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.stats = StageStats()
+
+        self.fetch_pool = ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix='fetch')
+        self.process_pool = ProcessPoolExecutor(max_workers=self.process_workers)
+        self.decision_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='decide')
+        self.loop = asyncio.new_event_loop()
+
+    async def _fetch_and_process(self, symbol, fetch_slots, process_slots, ready):
+        loop = asyncio.get_running_loop()
+        try:
+            async with fetch_slots:
+                raw_data, elapsed = await loop.run_in_executor(self.fetch_pool, _timed_call, self.fetch_fn, symbol)
+            self.stats.record('fetch', elapsed)
+            if raw_data is None:
+                raise ValueError("No data returned")
+        except Exception as e:
+            self.stats.record_error('fetch')
+            logging.error(f"Fetch failed for {symbol}: {e}")
+            return
+
+        try:
+            async with process_slots:
+                processed_data, elapsed = await loop.run_in_executor(self.process_pool, _timed_call, self.process_fn, raw_data)
+            self.stats.record('process', elapsed)
+        except Exception as e:
+            self.stats.record_error('process')
+            logging.error(f"Processing failed for {symbol}: {e}")
+            return
+
+        # Blocks while the decision stage is behind
+        await ready.put((symbol, processed_data))
+
+    async def _execute(self, symbol, decision):
+        try:
+            start = time.perf_counter()
+            result = self.execute_fn(symbol, decision)
+            if asyncio.iscoroutine(result):
+                await result
+            self.stats.record('execute', time.perf_counter() - start)
+        except Exception as e:
+            self.stats.record_error('execute')
+            logging.error(f"Execution failed for {symbol}: {e}")
+
+    async def _decide_and_execute(self, ready):
+        loop = asyncio.get_running_loop()
+        executions = []
+        while True:
+            item = await ready.get()
+            if item is None:
+                break
+            symbol, processed_data = item
+            try:
+                decision, elapsed = await loop.run_in_executor(self.decision_pool, _timed_call, self.decide_fn, symbol, processed_data)
+                self.stats.record('decide', elapsed)
+            except Exception as e:
+                self.stats.record_error('decide')
+                logging.error(f"Decision failed for {symbol}: {e}")
+                continue
+
+            if decision is not None:
+                # Orders go out concurrently; the next decision does not wait for the broker
+                executions.append(asyncio.create_task(self._execute(symbol, decision)))
+        await asyncio.gather(*executions)
+
+    async def run_cycle_async(self, symbols):
+        fetch_slots = asyncio.Semaphore(self.fetch_workers)
+        process_slots = asyncio.Semaphore(2 * self.process_workers)
+        ready = asyncio.Queue(maxsize=self.queue_size)
+
+        start = time.perf_counter()
+        consumer = asyncio.create_task(self._decide_and_execute(ready))
+        await asyncio.gather(*(self._fetch_and_process(symbol, fetch_slots, process_slots, ready) for symbol in symbols))
+        await ready.put(None)
+        await consumer
+        self.stats.record('cycle', time.perf_counter() - start)
+
+    def run_cycle(self, symbols):
+        """
+        Push every symbol through all stages once. Cycles share one event loop, so async clients
+        (e.g. the order gateway's pooled session) keep their connections between cycles.
+        """
+        self.loop.run_until_complete(self.run_cycle_async(symbols))
+
+    def run_forever(self, symbols, cycle_seconds=60, after_cycle=None):
+        """
+        Run one cycle per wall-clock boundary (e.g. at the top of every minute) instead of
+        sleeping a fixed time after the work. Boundaries missed by an overrunning cycle are skipped.
+        after_cycle, if given, is called with no arguments once every stage of a cycle has finished.
+        """
+        while True:
+            now = time.time()
+            next_boundary = math.floor(now / cycle_seconds + 1) * cycle_seconds
+            # Wait on the event loop, so background tasks on it (e.g. order tracking) keep running
+            self.loop.run_until_complete(asyncio.sleep(next_boundary - now))
+
+            self.run_cycle(symbols)
+            if after_cycle is not None:
+                after_cycle()
+            self.stats.log_summary()
+
+            elapsed = time.time() - next_boundary
+            if elapsed > cycle_seconds:
+                logging.warning(f"Cycle took {elapsed:.1f}s, skipping {int(elapsed // cycle_seconds)} boundaries.")
+
+    def shutdown(self):
+        self.fetch_pool.shutdown(wait=True)
+        self.process_pool.shutdown(wait=True)
+        self.decision_pool.shutdown(wait=True)
+        if self.loop is not None:
+            self.loop.close()
+            self.loop = None
+
+
+# Example usage
+if __name__ == "__main__":
+    import random
+
+    def fake_fetch(symbol):
+        time.sleep(random.uniform(0.01, 0.05))
+        return [100.0 + random.uniform(0, 100) for _ in range(60)]
+
+    def fake_decide(symbol, highest_close):
+        return ('Buy', 1) if highest_close > 195 else None
+
+    def fake_execute(symbol, decision):
+        print(f"{symbol}: {decision}")
+
+    # Builtins pickle cleanly, so max stands in for clean_and_process here
+    pipeline = TradingPipeline(fake_fetch, fake_decide, fake_execute, process_fn=max, fetch_workers=8, process_workers=2)
+    try:
+        pipeline.run_cycle([f"SYM{i}" for i in range(50)])
+    finally:
+        pipeline.shutdown()
+    pipeline.stats.log_summary()
@@ -0,0 +1,258 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from trading.pipeline import StageStats
+from trading.strategy import ACTION_NAMES, INDICATOR_COLUMNS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class MarketSnapshot:
+    def __init__(self, symbols, values, prices, volumes, **fields):
+        """
+        The inputs every strategy sees for one decision cycle: the latest INDICATOR_COLUMNS values
+        (symbols x indicators, e.g. LatestIndicators.values), prices and volumes, plus optional per-symbol
+        fields (arrays aligned with symbols, e.g. volatility, strike_price or model forecasts).
+        Derived inputs shared by several strategies go through cached(), so they are computed once.
+        """
+        self.symbols = list(symbols)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.volumes = np.asarray(volumes, dtype=np.float64)
+        self.fields = fields
+        self._cache = {}
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    @classmethod
+    def from_latest(cls, latest, **fields):
+        return cls(latest.symbols, latest.values, latest.prices, latest.volumes, **fields)
+
+    def indicator(self, column):
+        return self.values[:, INDICATOR_COLUMNS.index(column)]
+
+    def field(self, name):
+        if name not in self.fields:
+            raise KeyError(f"Snapshot has no '{name}' field")
+        return self.fields[name]
+
+    def cached(self, name, compute):
+        """Return compute(self), computing it only once per snapshot even when strategies ask concurrently."""
+        if name in self._cache:
+            return self._cache[name]
+        with self._locks_guard:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._cache:
+                self._cache[name] = compute(self)
+        return self._cache[name]
+
+class StrategyDecision:
+    def __init__(self, actions, values):
+        """
+        The common output of every registered strategy: one action label and one number per symbol.
+        What the number means is strategy specific (trade size, income, price or rate).
+        """
+        self.actions = np.asarray(actions, dtype=object)
+        self.values = np.asarray(values, dtype=np.float64)
+
+    def as_dict(self, symbols):
+        return {symbol: (action, value) for symbol, action, value in zip(symbols, self.actions, self.values.tolist())}
+
+class Strategy:
+    """Interface of a registered strategy: evaluate(snapshot) returns a StrategyDecision for every symbol."""
+    name = None
+
+    def evaluate(self, snapshot):
+        raise NotImplementedError
+
+class RuleStrategy(Strategy):
+    name = 'rules'
+
+    def __init__(self, strategy):
+        """The TradingStrategy SMA/RSI/Bollinger rules through the batched decide_batch path."""
+        self.strategy = strategy
+        self._labels = np.array([ACTION_NAMES[code] for code in sorted(ACTION_NAMES)], dtype=object)
+
+    def evaluate(self, snapshot):
+        actions, sizes = self.strategy.decide_batch(snapshot.values, snapshot.prices, snapshot.volumes)
+        # Codes -1, 0, 1 index the sorted label table after shifting by one
+        return StrategyDecision(self._labels[actions + 1], sizes.copy())
+
+class OptionsStrategyAdapter(Strategy):
+    def __init__(self, method, risk_appetite, name=None):
+        """
+        The OptionsStrategy covered_call or protective_put rule for every symbol in one vectorized
+        screen_rules pass. Reads snapshot fields strike_price, premium, price_upside and price_downside;
+        volatility is the shared 'volatility' input.
+        """
+        if method not in ('covered_call', 'protective_put'):
+            raise ValueError(f"Unknown options method '{method}'")
+        if not (0 <= risk_appetite <= 1):
+            logging.error("Risk appetite must be between 0 and 1.")
+            raise ValueError("Risk appetite must be between 0 and 1.")
+        self.method = method
+        self.risk_appetite = risk_appetite
+        self.name = name or method
+
+    def evaluate(self, snapshot):
+        from models.options_strategy import screen_rules
+
+        volatility = snapshot.cached('volatility', realized_volatility)
+        actions, values = screen_rules(self.method == 'covered_call', snapshot.prices,
+                                       np.asarray(snapshot.field('strike_price'), dtype=np.float64),
+                                       snapshot.field('premium'), volatility, self.risk_appetite,
+                                       snapshot.field('price_upside'), snapshot.field('price_downside'))
+        return StrategyDecision(actions, values)
+
+class FuturesStrategyAdapter(Strategy):
+    name = 'futures'
+
+    def __init__(self, risk_parameters):
+        """
+        DerivativesStrategy.futures_trading_strategy for every symbol through the DerivativesBatch API.
+        Reads snapshot fields position ('long'/'short'), target_price and stop_loss.
+        """
+        from models.derivatives_strategy import DerivativesBatch
+        self.batch = DerivativesBatch(risk_parameters)
+
+    def evaluate(self, snapshot):
+        from models.derivatives_strategy import FUTURES_ACTIONS
+
+        codes = self.batch.futures_signals(snapshot.field('position'), snapshot.prices,
+                                           snapshot.field('target_price'), snapshot.field('stop_loss'))
+        return StrategyDecision(self.batch.labels(codes, FUTURES_ACTIONS), snapshot.prices)
+
+class VolatilityOptionsAdapter(Strategy):
+    def __init__(self, option_type, risk_parameters, name=None):
+        """DerivativesStrategy.options_trading_strategy for every symbol, at-the-money (strike = price)."""
+        from models.derivatives_strategy import DerivativesBatch
+        self.option_type = option_type
+        self.batch = DerivativesBatch(risk_parameters)
+        self.name = name or f'volatility_{option_type}'
+
+    def evaluate(self, snapshot):
+        from models.derivatives_strategy import OPTIONS_ACTIONS
+
+        volatility = snapshot.cached('volatility', realized_volatility)
+        codes = self.batch.options_signals(np.full(len(snapshot.symbols), self.option_type), volatility)
+        return StrategyDecision(self.batch.labels(codes, OPTIONS_ACTIONS), snapshot.prices)
+
+def realized_volatility(snapshot):
+    """Shared input: the snapshot's 'volatility' field, else the Bollinger band width relative to price."""
+    if 'volatility' in snapshot.fields:
+        return np.asarray(snapshot.fields['volatility'], dtype=np.float64)
+    width = snapshot.indicator('Upper_Band') - snapshot.indicator('Lower_Band')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.nan_to_num(width / (4 * snapshot.prices))
+
+class StrategyRegistry:
+    def __init__(self, workers=None):
+        """
+        Named strategies evaluated together on one MarketSnapshot. Independent strategies run in a shared
+        thread pool (NumPy-heavy strategies release the GIL) and each evaluation is timed in stats.
+        """
+        self.strategies = {}
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.executor = None
+        self.stats = StageStats()
+
+    def register(self, strategy, name=None):
+        name = name or strategy.name
+        if not name:
+            raise ValueError("Strategy needs a name")
+        if name in self.strategies:
+            raise ValueError(f"Strategy '{name}' is already registered")
+        self.strategies[name] = strategy
+        return strategy
+
+    def unregister(self, name):
+        self.strategies.pop(name, None)
+
+    def names(self):
+        return list(self.strategies)
+
+    def _evaluate_one(self, name, snapshot):
+        start = time.perf_counter()
+        try:
+            return self.strategies[name].evaluate(snapshot)
+        except Exception:
+            self.stats.record_error(name)
+            raise
+        finally:
+            self.stats.record(name, time.perf_counter() - start)
+
+    def evaluate_all(self, snapshot, names=None, parallel=True):
+        """
+        Evaluate the named (default: all) strategies on one snapshot. Returns {name: StrategyDecision};
+        a strategy that raises is logged and left out, so one failure does not block the others.
+        """
+        names = self.names() if names is None else list(names)
+        if not parallel or len(names) < 2:
+            futures = None
+        else:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='strategy')
+            futures = {name: self.executor.submit(self._evaluate_one, name, snapshot) for name in names}
+
+        decisions = {}
+        for name in names:
+            try:
+                decisions[name] = futures[name].result() if futures else self._evaluate_one(name, snapshot)
+            except Exception as e:
+                logging.error(f"Strategy {name} failed: {e}")
+        return decisions
+
+    def timings(self):
+        """Per-strategy evaluation latency summary (count, errors, mean/p50/p95/max in ms)."""
+        return self.stats.summary()
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+def build_default_registry(risk_manager, risk_appetite=0.5, risk_parameters=None, workers=None):
+    """Registry with the equity rules, the options strategies and the derivatives strategies."""
+    from trading.strategy import TradingStrategy
+
+    risk_parameters = risk_parameters or {'volatility_threshold': 0.25, 'profit_target': 0.1, 'stop_loss_limit': 0.05}
+    registry = StrategyRegistry(workers)
+    registry.register(RuleStrategy(TradingStrategy(None, risk_manager)))
+    registry.register(OptionsStrategyAdapter('covered_call', risk_appetite))
+    registry.register(OptionsStrategyAdapter('protective_put', risk_appetite))
+    registry.register(FuturesStrategyAdapter(risk_parameters))
+    registry.register(VolatilityOptionsAdapter('call', risk_parameters))
+    registry.register(VolatilityOptionsAdapter('put', risk_parameters))
+    return registry
+
+# Example usage
+if __name__ == "__main__":
+    from trading.risk_management import RiskManager
+
+    rng = np.random.default_rng(0)
+    n_symbols = 500
+    prices = rng.normal(100, 5, n_symbols)
+    values = prices[:, None] + rng.normal(0, 3, size=(n_symbols, len(INDICATOR_COLUMNS)))
+    values[:, INDICATOR_COLUMNS.index('RSI')] = rng.uniform(0, 100, n_symbols)
+    snapshot = MarketSnapshot([f"SYM{i}" for i in range(n_symbols)], values, prices, rng.integers(1000, 100000, n_symbols),
+                              strike_price=prices * 1.05, premium=rng.uniform(1, 5, n_symbols),
+                              price_upside=rng.uniform(0, 1, n_symbols), price_downside=rng.uniform(0, 1, n_symbols),
+                              position=rng.choice(['long', 'short'], n_symbols),
+                              target_price=prices * 1.1, stop_loss=prices * 0.95)
+
+    logging.disable(logging.INFO)  # The wrapped strategies log every call
+    registry = build_default_registry(RiskManager(10000, 0.1, 0.2))
+    for _ in range(5):
+        decisions = registry.evaluate_all(snapshot)
+    registry.shutdown()
+    logging.disable(logging.NOTSET)
+
+    for name, decision in decisions.items():
+        print(f"{name:>16}: {decision.as_dict(snapshot.symbols)['SYM0']}")
+    for name, row in registry.timings().items():
+        print(f"{name:>16}: n={row['count']} mean={row['mean_ms']:.2f}ms p95={row['p95_ms']:.2f}ms")
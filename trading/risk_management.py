@@ -1,4 +1,7 @@
 import logging
+import threading
+import numpy as np
+from scipy.special import ndtri
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -52,6 +55,18 @@ class RiskManager:
         trade_size = min(max_possible_shares, self.max_trade_limit // current_price)
         return trade_size
 
+    def calculate_trade_sizes(self, current_prices, available_capital):
+        """
+        calculate_trade_size for whole arrays (e.g. bars x symbols) at once.
+        Where price or capital is not positive the size is 0 instead of an error.
+        """
+        prices = np.asarray(current_prices, dtype=np.float64)
+        capital = np.asarray(available_capital, dtype=np.float64)
+        valid = (prices > 0) & (capital > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sizes = np.minimum(capital // prices, self.max_trade_limit // prices)
+        return np.where(valid, sizes, 0.0)
+
     def calculate_stop_loss_price(self, entry_price, market_volatility):
         """
         Calculate the stop loss price for a trade, adjusting for market volatility.
@@ -64,6 +79,249 @@ class RiskManager:
         stop_loss_price = entry_price * (1 - adjusted_stop_loss_threshold)
         return stop_loss_price
 
+    def calculate_stop_loss_prices(self, entry_prices, market_volatility):
+        """calculate_stop_loss_price for arrays of entry prices and volatilities."""
+        entry_prices = np.asarray(entry_prices, dtype=np.float64)
+        return entry_prices * (1 - (self.stop_loss_threshold + np.asarray(market_volatility, dtype=np.float64) / 10))
+
+# Reason bits returned by PortfolioRiskManager.check_orders (0 means the order passes)
+GROSS_LIMIT, NET_LIMIT, SYMBOL_LIMIT, VAR_LIMIT = 1, 2, 4, 8
+LIMIT_NAMES = {GROSS_LIMIT: 'gross exposure', NET_LIMIT: 'net exposure', SYMBOL_LIMIT: 'symbol exposure',
+               VAR_LIMIT: 'value at risk'}
+
+class PortfolioRiskManager:
+    def __init__(self, symbols, cash, max_gross_exposure, max_net_exposure, max_symbol_exposure, max_var,
+                 var_confidence=0.99, decay=0.94):
+        """
+        Portfolio-level risk state for a fixed universe: positions, cash, mark prices and an exponentially
+        weighted (RiskMetrics) covariance of per-bar log returns, with decay as the weight of the old estimate.
+
+        State is updated incrementally: mark reprices the book (every cycle), fold_bar applies a rank-1 covariance
+        update (once per completed bar, with its final closes), on_bar does both, and on_fill only touches the
+        filled symbol. All keep covariance @ exposure and the portfolio variance cached, so check_orders costs
+        O(orders) regardless of the universe size. Limits are in currency; VaR is one-bar parametric VaR.
+        """
+        if any(x <= 0 for x in [max_gross_exposure, max_net_exposure, max_symbol_exposure, max_var]):
+            logging.error("Portfolio limits must be positive values.")
+            raise ValueError("Portfolio limits must be positive values.")
+        if not 0 < var_confidence < 1 or not 0 < decay < 1:
+            logging.error("VaR confidence and decay must be between 0 and 1.")
+            raise ValueError("VaR confidence and decay must be between 0 and 1.")
+
+        self.symbols = list(symbols)
+        self.rows = {symbol: i for i, symbol in enumerate(self.symbols)}
+        n_symbols = len(self.symbols)
+        self.cash = float(cash)
+        self.max_gross_exposure = max_gross_exposure
+        self.max_net_exposure = max_net_exposure
+        self.max_symbol_exposure = max_symbol_exposure
+        self.max_var = max_var
+        self.z_score = float(ndtri(var_confidence))
+        self.decay = decay
+
+        self.positions = np.zeros(n_symbols)
+        self.prices = np.full(n_symbols, np.nan)  # Marks
+        self.closes = np.full(n_symbols, np.nan)  # Closes of the last bar folded into the covariance
+        self.exposures = np.zeros(n_symbols)
+        self.covariance = np.zeros((n_symbols, n_symbols))
+        self.bars_seen = 0
+        self.gross_exposure = 0.0
+        self.net_exposure = 0.0
+        self._risk_exposures = np.zeros(n_symbols)  # covariance @ exposures
+        self._variance = 0.0
+        self._lock = threading.Lock()
+
+    def _indices(self, symbols):
+        """Rows of symbols; integer arrays are taken as rows already (the fast path for repeated checks)."""
+        if isinstance(symbols, np.ndarray) and symbols.dtype.kind in 'iu':
+            return symbols
+        return np.fromiter((self.rows[symbol] for symbol in symbols), dtype=np.intp, count=len(symbols))
+
+    def on_bar(self, prices):
+        """Fold a completed bar's closes (aligned with symbols) into the covariance and mark the book to them."""
+        self.fold_bar(prices)
+        self.mark(prices)
+
+    def fold_bar(self, closes):
+        """
+        Fold the returns of a completed bar into the covariance, from the previous folded closes to closes.
+        Call it once per bar with the final closes: a repeated or partial bar distorts the estimate.
+        Symbols without a positive close on this or the previous bar contribute a zero return.
+        """
+        closes = np.asarray(closes, dtype=np.float64)
+        with self._lock:
+            valid = (closes > 0) & (self.closes > 0)
+            returns = np.zeros(len(closes))
+            np.log(closes, out=returns, where=valid)
+            returns[valid] -= np.log(self.closes[valid])
+
+            self.covariance *= self.decay
+            self.covariance += (1 - self.decay) * np.multiply.outer(returns, returns)
+            self.bars_seen += 1
+
+            priced = closes > 0
+            self.closes[priced] = closes[priced]
+            self._refresh()
+
+    def mark(self, prices):
+        """Reprice the book at the latest prices (aligned with symbols; non-positive prices keep the old mark)."""
+        prices = np.asarray(prices, dtype=np.float64)
+        with self._lock:
+            priced = prices > 0
+            self.prices[priced] = prices[priced]
+            np.multiply(self.positions, np.nan_to_num(self.prices), out=self.exposures)
+            self._refresh()
+
+    def on_fill(self, symbol, quantity, price):
+        """Apply a fill: quantity is signed (positive buys, negative sells); cash moves by quantity * price."""
+        with self._lock:
+            row = self.rows[symbol]
+            if not self.prices[row] > 0:
+                self.prices[row] = price
+            old = self.exposures[row]
+            self.positions[row] += quantity
+            self.cash -= quantity * price
+            self.exposures[row] = self.positions[row] * self.prices[row]
+            change = self.exposures[row] - old
+
+            self.gross_exposure += abs(self.exposures[row]) - abs(old)
+            self.net_exposure += change
+            # Only the filled column of the covariance is needed to update covariance @ exposures
+            self._risk_exposures += change * self.covariance[:, row]
+            self._variance = float(self.exposures @ self._risk_exposures)
+
+    def _refresh(self):
+        self.gross_exposure = float(np.abs(self.exposures).sum())
+        self.net_exposure = float(self.exposures.sum())
+        np.matmul(self.covariance, self.exposures, out=self._risk_exposures)
+        self._variance = float(self.exposures @ self._risk_exposures)
+
+    @property
+    def equity(self):
+        return self.cash + self.net_exposure
+
+    @property
+    def value_at_risk(self):
+        return self.z_score * np.sqrt(max(self._variance, 0.0))
+
+    def correlation(self):
+        """Correlation matrix implied by the tracked covariance (NaN for symbols with no return variance)."""
+        std = np.sqrt(np.diag(self.covariance))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.covariance / np.multiply.outer(std, std)
+
+    def check_orders(self, symbols, quantities, prices=None):
+        """
+        Pre-trade check of a batch of proposed orders, each against the current book as if it were the only
+        order. quantities are signed; exposure is valued at the mark price (or prices, for unmarked symbols).
+        Returns (allowed, reasons): reasons holds the limit bits each order breaches. An order is only
+        rejected for a limit it moves further past, so orders that reduce risk always pass. For orders that
+        will all be sent, use approve_orders, which also accounts for their combined effect.
+        """
+        rows = self._indices(symbols)
+        quantities = np.asarray(quantities, dtype=np.float64)
+        with self._lock:
+            marks = self.prices[rows]
+            if prices is not None:
+                marks = np.where(marks > 0, marks, np.asarray(prices, dtype=np.float64))
+            change = quantities * marks
+            old = self.exposures[rows]
+            new = old + change
+            gross = self.gross_exposure + np.abs(new) - np.abs(old)
+            net = self.net_exposure + change
+            # (e + d)' C (e + d) with d non-zero for one symbol only
+            variance = self._variance + 2 * change * self._risk_exposures[rows] + change ** 2 * self.covariance[rows, rows]
+            var = self.z_score * np.sqrt(np.maximum(variance, 0.0))
+            current_gross, current_net, current_var = self.gross_exposure, abs(self.net_exposure), self.value_at_risk
+
+        reasons = np.zeros(len(rows), dtype=np.int8)
+        reasons |= np.where((gross > self.max_gross_exposure) & (gross > current_gross), GROSS_LIMIT, 0).astype(np.int8)
+        reasons |= np.where((np.abs(net) > self.max_net_exposure) & (np.abs(net) > current_net), NET_LIMIT, 0).astype(np.int8)
+        reasons |= np.where((np.abs(new) > self.max_symbol_exposure) & (np.abs(new) > np.abs(old)), SYMBOL_LIMIT, 0).astype(np.int8)
+        reasons |= np.where((var > self.max_var) & (var > current_var), VAR_LIMIT, 0).astype(np.int8)
+        return reasons == 0, reasons
+
+    def approve_orders(self, symbols, quantities, prices=None):
+        """
+        Pre-trade check for orders that will be sent together: like check_orders, but each order is checked
+        against the book plus the orders approved before it, so approved orders can never jointly breach a
+        limit. Orders are taken in the given order. Returns (allowed, reasons) like check_orders.
+        """
+        rows = self._indices(symbols)
+        quantities = np.asarray(quantities, dtype=np.float64)
+        allowed = np.zeros(len(rows), dtype=bool)
+        reasons = np.zeros(len(rows), dtype=np.int8)
+        with self._lock:
+            marks = self.prices[rows]
+            if prices is not None:
+                marks = np.where(marks > 0, marks, np.asarray(prices, dtype=np.float64))
+            changes = quantities * marks
+            exposures = {}
+            risk_exposures = self._risk_exposures.copy()
+            gross, net, variance = self.gross_exposure, self.net_exposure, self._variance
+
+            for i, (row, change) in enumerate(zip(rows, changes)):
+                old = exposures.get(row, self.exposures[row])
+                new = old + change
+                new_gross = gross + abs(new) - abs(old)
+                new_net = net + change
+                new_variance = variance + 2 * change * risk_exposures[row] + change ** 2 * self.covariance[row, row]
+                current_var = self.z_score * np.sqrt(max(variance, 0.0))
+                new_var = self.z_score * np.sqrt(max(new_variance, 0.0))
+
+                reason = 0
+                if new_gross > self.max_gross_exposure and new_gross > gross:
+                    reason |= GROSS_LIMIT
+                if abs(new_net) > self.max_net_exposure and abs(new_net) > abs(net):
+                    reason |= NET_LIMIT
+                if abs(new) > self.max_symbol_exposure and abs(new) > abs(old):
+                    reason |= SYMBOL_LIMIT
+                if new_var > self.max_var and new_var > current_var:
+                    reason |= VAR_LIMIT
+                reasons[i] = reason
+                if reason:
+                    continue
+
+                # Approved: later orders see the book with this one filled
+                allowed[i] = True
+                exposures[row] = new
+                gross, net, variance = new_gross, new_net, new_variance
+                risk_exposures += change * self.covariance[:, row]
+        return allowed, reasons
+
+    def check_batch(self, symbols, quantities, prices=None):
+        """
+        Check the batch as a whole, i.e. the book after every order in it fills. Returns
+        (within_limits, metrics) with the resulting gross and net exposure and VaR.
+        """
+        rows = self._indices(symbols)
+        quantities = np.asarray(quantities, dtype=np.float64)
+        with self._lock:
+            marks = self.prices[rows]
+            if prices is not None:
+                marks = np.where(marks > 0, marks, np.asarray(prices, dtype=np.float64))
+            touched, inverse = np.unique(rows, return_inverse=True)
+            change = np.bincount(inverse, weights=quantities * marks, minlength=len(touched))
+            old = self.exposures[touched]
+            new = old + change
+            variance = (self._variance + 2 * change @ self._risk_exposures[touched]
+                        + change @ self.covariance[np.ix_(touched, touched)] @ change)
+            metrics = {
+                'gross_exposure': self.gross_exposure + float(np.abs(new).sum() - np.abs(old).sum()),
+                'net_exposure': self.net_exposure + float(change.sum()),
+                'max_symbol_exposure': float(np.abs(new).max()) if len(new) else 0.0,
+                'value_at_risk': self.z_score * np.sqrt(max(variance, 0.0)),
+            }
+        within_limits = (metrics['gross_exposure'] <= self.max_gross_exposure
+                         and abs(metrics['net_exposure']) <= self.max_net_exposure
+                         and metrics['max_symbol_exposure'] <= self.max_symbol_exposure
+                         and metrics['value_at_risk'] <= self.max_var)
+        return within_limits, metrics
+
+    def describe_reasons(self, reasons):
+        """Readable limit names for one reasons value from check_orders."""
+        return [name for bit, name in LIMIT_NAMES.items() if reasons & bit]
+
 # Example usage
 if __name__ == "__main__":
     try:
@@ -74,3 +332,33 @@ if __name__ == "__main__":
         print("Stop loss price for $150 entry with market volatility 0.3:", risk_manager.calculate_stop_loss_price(150, 0.3))
     except ValueError as e:
         print(e)
+
+    import time
+
+    rng = np.random.default_rng(0)
+    n_symbols, n_orders = 500, 100
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+    portfolio = PortfolioRiskManager(symbols, cash=1_000_000, max_gross_exposure=2_000_000, max_net_exposure=500_000,
+                                     max_symbol_exposure=50_000, max_var=25_000)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, size=(250, n_symbols)), axis=0))
+    for bar in prices:
+        portfolio.on_bar(bar)
+    for symbol in rng.choice(symbols, 200, replace=False):
+        portfolio.on_fill(symbol, rng.integers(-100, 100), prices[-1, portfolio.rows[symbol]])
+    print(f"Gross {portfolio.gross_exposure:,.0f}, net {portfolio.net_exposure:,.0f}, "
+          f"VaR {portfolio.value_at_risk:,.0f}, equity {portfolio.equity:,.0f}")
+
+    order_symbols = list(rng.choice(symbols, n_orders))
+    order_quantities = rng.integers(-300, 300, n_orders)
+    allowed, reasons = portfolio.check_orders(order_symbols, order_quantities)
+    print(f"{allowed.sum()} of {n_orders} orders pass; first rejection: "
+          f"{portfolio.describe_reasons(reasons[~allowed][0]) if (~allowed).any() else None}")
+    print("Whole batch:", portfolio.check_batch(order_symbols, order_quantities))
+
+    order_rows = np.array([portfolio.rows[symbol] for symbol in order_symbols])
+    repeats = 10000
+    start = time.perf_counter()
+    for _ in range(repeats):
+        portfolio.check_orders(order_rows, order_quantities)
+    print(f"check_orders for {n_orders} orders over {n_symbols} symbols: "
+          f"{(time.perf_counter() - start) / repeats * 1e6:.1f}us per batch")
@@ -1,51 +1,195 @@
 import logging
+import time
+import numpy as np
+
+# Indicator columns the decision rules read, as produced by DataProcessor.add_technical_indicators with
+# normalize=False: the rules compare the bands with the raw price, so z-scored indicators would be meaningless
+INDICATOR_COLUMNS = ['SMA_20', 'SMA_50', 'EMA_20', 'EMA_50', 'RSI', 'Upper_Band', 'Lower_Band']
+
+# Action codes returned by the array decision paths
+HOLD, BUY, SELL = 0, 1, -1
+ACTION_NAMES = {HOLD: 'Hold', BUY: 'Buy', SELL: 'Sell'}
+ACTION_CODES = {name: code for code, name in ACTION_NAMES.items()}
+
+# Positions of the columns the rules use within a row of INDICATOR_COLUMNS values
+_SMA_20, _SMA_50, _RSI, _UPPER_BAND, _LOWER_BAND = (INDICATOR_COLUMNS.index(column) for column in
+                                                    ('SMA_20', 'SMA_50', 'RSI', 'Upper_Band', 'Lower_Band'))
+
+def apply_rules(actions, mask, sma_20, sma_50, rsi, upper_band, lower_band, price):
+    """
+    Write the decide() action codes for arrays of inputs into actions, using mask as scratch space.
+    Both buffers are caller-owned, so a preallocated pair makes this allocation-free. Rules are applied
+    in decide's order, later ones overriding earlier ones; within each if/elif pair the elif branch is
+    written first so the if branch wins where both hold. NaN inputs never trigger a rule.
+    """
+    actions.fill(HOLD)
+    for left, right, code in ((sma_50, sma_20, SELL), (sma_20, sma_50, BUY), (30, rsi, BUY), (rsi, 70, SELL),
+                              (lower_band, price, BUY), (price, upper_band, SELL)):
+        np.greater(left, right, out=mask)
+        np.copyto(actions, code, where=mask)
+    return actions
+
+def decide_actions(sma_20, sma_50, rsi, upper_band, lower_band, price):
+    """The decide() rules on whole arrays (e.g. bars x symbols) at once, returning new action code arrays."""
+    shape = np.shape(price)
+    return apply_rules(np.empty(shape, dtype=np.int8), np.empty(shape, dtype=bool),
+                       sma_20, sma_50, rsi, upper_band, lower_band, price)
+
+class LatestIndicators:
+    def __init__(self, symbols):
+        """
+        Preallocated latest indicator values, price, volume and bar timestamp for a fixed universe, one row
+        per symbol, plus the close and timestamp of the last completed bar (the one before the latest, which
+        may still be forming). Updates overwrite rows in place, so the batch decision reads one contiguous block.
+        """
+        self.symbols = list(symbols)
+        self.rows = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.values = np.full((len(self.symbols), len(INDICATOR_COLUMNS)), np.nan)
+        self.prices = np.zeros(len(self.symbols))
+        self.volumes = np.zeros(len(self.symbols))
+        self.timestamps = np.full(len(self.symbols), np.nan)  # NaN until a bar with a 'Timestamp' arrives
+        self.closes = np.zeros(len(self.symbols))
+        self.closed_timestamps = np.full(len(self.symbols), np.nan)
+
+    def update(self, symbol, processed_data):
+        """
+        Copy the last bar of a processed DataFrame (unnormalized indicators, 'Close', 'Volume') into the
+        symbol's row.
+        """
+        row = self.rows[symbol]
+        last = processed_data.iloc[-1]
+        self.values[row] = last[INDICATOR_COLUMNS].to_numpy(dtype=np.float64)
+        self.prices[row] = last['Close']
+        self.volumes[row] = last['Volume']
+        has_timestamps = 'Timestamp' in processed_data.columns
+        self.timestamps[row] = last['Timestamp'] if has_timestamps else np.nan
+        if len(processed_data) > 1:
+            closed = processed_data.iloc[-2]
+            self.closes[row] = closed['Close']
+            self.closed_timestamps[row] = closed['Timestamp'] if has_timestamps else np.nan
 
 class TradingStrategy:
     def __init__(self, model, risk_manager):
+        """Build once and reuse: decisions keep no per-call state except the batch buffers."""
         self.model = model
         self.risk_manager = risk_manager
+        self._buffers = None
 
-    def decide(self, market_data):
+    def decide(self, market_data, available_capital=None):
+        """
+        market_data maps each indicator column to its recent values (the last one is used), plus
+        scalar 'current_price' and 'volume'. A DataFrame with those columns works too.
+        available_capital sizes the trade; without it the bar volume is used, as the original rules did.
+        """
         logging.info("Evaluating market data for trading decision.")
-        
-        # Extract and use technical indicators from the market data
-        indicators = market_data[['SMA_20', 'SMA_50', 'EMA_20', 'EMA_50', 'RSI', 'Upper_Band', 'Lower_Band']]
-        current_price = market_data['current_price']
-        volume = market_data['volume']
+
+        # Extract the latest value of each technical indicator from the market data
+        row = [np.asarray(market_data[column]).reshape(-1)[-1] for column in INDICATOR_COLUMNS]
+        if available_capital is None:
+            available_capital = market_data['volume']
+        action, trade_size = self.decide_row(row, market_data['current_price'], available_capital)
+        logging.info(f"Action: {action}, Trade Size: {trade_size}")
+
+        return action, trade_size
+
+    def decide_row(self, row, current_price, available_capital):
+        """
+        The decision for one symbol from a row of its latest INDICATOR_COLUMNS values (a NumPy row,
+        e.g. of LatestIndicators.values, or any sequence), sized with available_capital (e.g. the
+        portfolio's cash). Plain float comparisons, no pandas.
+        """
+        sma_20, sma_50, rsi = row[_SMA_20], row[_SMA_50], row[_RSI]
 
         # Decision logic based on moving averages crossover
-        if indicators['SMA_20'].iloc[-1] > indicators['SMA_50'].iloc[-1]:
+        if sma_20 > sma_50:
             action = 'Buy'
-        elif indicators['SMA_20'].iloc[-1] < indicators['SMA_50'].iloc[-1]:
+        elif sma_20 < sma_50:
             action = 'Sell'
         else:
             action = 'Hold'
 
         # Additional logic using RSI for overbought/oversold
-        if indicators['RSI'].iloc[-1] > 70:
+        if rsi > 70:
             action = 'Sell'  # Overbought
-        elif indicators['RSI'].iloc[-1] < 30:
+        elif rsi < 30:
             action = 'Buy'  # Oversold
 
         # Check Bollinger Bands
-        if current_price > indicators['Upper_Band'].iloc[-1]:
+        if current_price > row[_UPPER_BAND]:
             action = 'Sell'  # Price is high
-        elif current_price < indicators['Lower_Band'].iloc[-1]:
+        elif current_price < row[_LOWER_BAND]:
             action = 'Buy'  # Price is low
 
         # Apply risk management
-        trade_size = self.risk_manager.calculate_trade_size(current_price, volume)
-        logging.info(f"Action: {action}, Trade Size: {trade_size}")
-
+        trade_size = self.risk_manager.calculate_trade_size(current_price, available_capital)
         return action, trade_size
 
+    def decide_batch(self, values, prices, available_capital):
+        """
+        Decide for a whole universe in one call. values is (symbols x INDICATOR_COLUMNS), e.g.
+        LatestIndicators.values; available_capital sizes the trades, one value for all symbols (e.g. the
+        portfolio's cash) or one per symbol. Returns (action codes, trade sizes) arrays; symbols whose price
+        or capital is not positive get Hold and size 0. The returned arrays are reused by the next call with
+        the same number of symbols, so copy them to keep them.
+        """
+        n_symbols = len(prices)
+        if self._buffers is None or len(self._buffers[0]) != n_symbols:
+            self._buffers = (np.empty(n_symbols, dtype=np.int8), np.empty(n_symbols), np.empty(n_symbols),
+                             np.empty(n_symbols, dtype=bool), np.empty(n_symbols, dtype=bool))
+        actions, sizes, scratch, mask, invalid = self._buffers
+
+        apply_rules(actions, mask, values[:, _SMA_20], values[:, _SMA_50], values[:, _RSI],
+                    values[:, _UPPER_BAND], values[:, _LOWER_BAND], prices)
+
+        # calculate_trade_size for every symbol: min(capital // price, max_trade_limit // price)
+        np.less_equal(prices, 0, out=invalid)
+        np.less_equal(available_capital, 0, out=mask)
+        np.logical_or(invalid, mask, out=invalid)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            np.floor_divide(available_capital, prices, out=sizes)
+            np.floor_divide(self.risk_manager.max_trade_limit, prices, out=scratch)
+        np.minimum(sizes, scratch, out=sizes)
+        np.copyto(sizes, 0.0, where=invalid)
+        np.copyto(actions, HOLD, where=invalid)
+        return actions, sizes
+
+def benchmark_decisions(strategy, n_symbols=500, repeats=20, seed=0):
+    """Return decisions per second for decide (dict input), decide_row and decide_batch on a random universe."""
+    rng = np.random.default_rng(seed)
+    values = rng.normal(100, 5, size=(n_symbols, len(INDICATOR_COLUMNS)))
+    values[:, _RSI] = rng.uniform(0, 100, n_symbols)
+    prices = rng.normal(100, 5, n_symbols)
+    volumes = rng.integers(1000, 100000, n_symbols).astype(np.float64)
+    market_data = [dict(zip(INDICATOR_COLUMNS, row), current_price=price, volume=volume)
+                   for row, price, volume in zip(values, prices, volumes)]
+    row_inputs = [(row, float(price), float(volume)) for row, price, volume in zip(values.tolist(), prices, volumes)]
+
+    def rate(func, decisions):
+        best = min(_timed(func) for _ in range(repeats))
+        return decisions / best
+
+    previous_level = logging.root.manager.disable
+    logging.disable(logging.INFO)  # decide() logs every call
+    try:
+        return {
+            'decide': rate(lambda: [strategy.decide(data) for data in market_data], n_symbols),
+            'decide_row': rate(lambda: [strategy.decide_row(*inputs) for inputs in row_inputs], n_symbols),
+            'decide_batch': rate(lambda: strategy.decide_batch(values, prices, volumes), n_symbols),
+        }
+    finally:
+        logging.disable(previous_level)
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
 # Example usage
 if __name__ == "__main__":
-    from models.model import TradingModel
-    from risk_management import RiskManager
+    from trading.risk_management import RiskManager
     
-    # Assuming model and risk_manager are defined elsewhere
-    model = TradingModel()
+    # The rules do not use the model; it is kept for strategies that do
+    model = None
     risk_manager = RiskManager(max_trade_limit=100000, stop_loss_threshold=0.1, volatility_threshold=0.2)
     strategy = TradingStrategy(model, risk_manager)
     
@@ -63,3 +207,6 @@ if __name__ == "__main__":
     }
     action, trade_size = strategy.decide(market_data)
     print(f"Decided Action: {action}, Trade Size: {trade_size}")
+
+    for path, per_second in benchmark_decisions(strategy).items():
+        print(f"{path:>12}: {per_second:12,.0f} decisions/s")
@@ -1,6 +1,15 @@
-# dashboard/__init__.py
+# ui/__init__.py
 
-# Import necessary modules or classes from the dashboard directory
-from .dashboard_app import app
-from .dashboard_layouts import layout1, layout2
-# Add more imports as needed
+# The Dash app is imported on first access so Dash/Plotly only load when the dashboard is used
+import importlib
+
+_EXPORTS = {
+    'app': '.dashboard',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,6 +1,19 @@
-# utils/__init__.py
+# utilities/__init__.py
 
-# Import necessary modules or functions from the utils directory
-from .helper_functions import function_a, function_b
-from .constants import CONSTANT_A, CONSTANT_B
-# Add more imports as needed
+# Names are imported on first access so importing the package stays cheap
+import importlib
+
+_EXPORTS = {
+    'Config': '.config',
+    'AlertSystem': '.alerts',
+    'str_to_date': '.tools',
+    'date_to_str': '.tools',
+    'calculate_percentage_change': '.tools',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
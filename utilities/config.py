@@ -2,6 +2,7 @@
 class Config:
     API_KEY_FINNHUB = 'your_finnhub_api_key'
     API_KEY_NEWSAPI = 'your_newsapi_key'
+    API_KEY_BROKERAGE = 'your_brokerage_api_key'
     DATABASE_URI = 'your_database_uri'
 
     # Risk management parameters
@@ -9,8 +10,60 @@ class Config:
     STOP_LOSS_THRESHOLD = 0.1
     VOLATILITY_THRESHOLD = 0.2
 
+    # Portfolio-level pre-trade limits (currency amounts; VaR is one-bar parametric VaR)
+    PORTFOLIO_CASH = 100000
+    MAX_GROSS_EXPOSURE = 200000
+    MAX_NET_EXPOSURE = 100000
+    MAX_SYMBOL_EXPOSURE = 25000
+    MAX_PORTFOLIO_VAR = 5000
+    VAR_CONFIDENCE = 0.99
+    COVARIANCE_DECAY = 0.94
+
     # Other configurable parameters
-    TRADE_EXECUTION_URL = 'https://api.brokerage.com/orders'
+    TRADE_EXECUTION_URL = 'https://api.brokerage.com'  # Base URL; the gateway adds /orders
+
+    # Order gateway
+    ORDER_MAX_IN_FLIGHT = 32  # Pooled connections / concurrent order requests
+    ORDER_MAX_RETRIES = 3
+    BULK_ORDERS = False  # Set when the broker supports POST /orders/batch
+    ORDER_BATCH_SIZE = 100
+    ORDER_STREAM_URL = None  # Broker WebSocket order feed, e.g. 'wss://api.brokerage.com/stream'
+    ORDER_POLL_INTERVAL_SECONDS = 2  # Batched status poll for open orders while there is no stream
+
+    # Pipelined trading loop parameters
+    CYCLE_SECONDS = 60
+    CANDLE_RESOLUTION = 'D'
+    LOOKBACK_SECONDS = 120 * 24 * 60 * 60  # Enough daily bars for the 50-bar indicators
+    PIPELINE_FETCH_WORKERS = 16
+    PIPELINE_PROCESS_WORKERS = None  # Defaults to the number of CPUs
+    PIPELINE_QUEUE_SIZE = 64
+
+    # Local candle cache used for incremental fetches and warm starts
+    CANDLE_STORE_DIR = 'candle_cache'
+
+    # Candle cleaning: bars per median/MAD outlier window (None for whole-history z-scores)
+    OUTLIER_WINDOW = 51
+    OUTLIER_Z_THRESHOLD = 3.0
+
+    # Model artifacts and the shared inference server
+    MODEL_PATH = 'final_stock_price_model.h5'
+    SCALER_PATH = 'scaler.pkl'
+    RUNTIME_ARTIFACT_PATH = 'final_stock_price_model.npz'  # Exported for the NumPy runtime
+    MODEL_SERVER_HOST = '127.0.0.1'
+    MODEL_SERVER_PORT = 8765
+    MODEL_SERVER_MAX_BATCH_SIZE = 256
+    MODEL_SERVER_MAX_WAIT_MS = 5
+    LOOKBACK = 20  # Bars per LSTM window; must match the trained model
+
+    # Candle/indicator column behind each model input feature; must match the columns the model was trained on
+    MODEL_FEATURE_COLUMNS = {'Feature1': 'Close', 'Feature2': 'Volume', 'Feature3': 'SMA_20', 'Feature4': 'RSI'}
+
+    # Online model updates (replay buffer shared by all symbols)
+    REPLAY_BUFFER_CAPACITY = 50000
+    ONLINE_UPDATE_BATCH_SIZE = 64
+    ONLINE_UPDATE_STEPS = 4  # train_on_batch steps per update
+    ONLINE_UPDATE_MIN_NEW_SAMPLES = 256  # Update early once this many new samples have arrived
+    ONLINE_UPDATE_INTERVAL_SECONDS = 300
 
 # Example usage:
 if __name__ == "__main__":
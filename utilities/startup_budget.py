@@ -0,0 +1,57 @@
+# startup_budget.py
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold-start budget in seconds for importing each module in a fresh interpreter.
+# 'main' covers everything `python main.py` does before the trading loop starts.
+IMPORT_BUDGETS = {
+    'utilities': 0.05,
+    'data': 0.05,
+    'models': 0.05,
+    'trading': 0.05,
+    'ui': 0.05,
+    'data.cleaner': 0.6,
+    'models.predict': 0.6,
+    'main': 1.0,
+}
+
+# Modules that must not be imported as a side effect of starting the trading bot
+HEAVY_MODULES = ['tensorflow', 'keras', 'sklearn', 'nltk', 'dash', 'plotly']
+
+def measure_import(module, repeats=3):
+    """
+    Import module in a fresh interpreter and return (best import time in seconds, heavy modules it pulled in).
+    """
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"heavy = [name for name in {HEAVY_MODULES!r} if name in sys.modules]\n"
+        "print(elapsed, ','.join(heavy))\n"
+    )
+    best, heavy = None, []
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+        elapsed, _, loaded = result.stdout.strip().partition(' ')
+        best = float(elapsed) if best is None else min(best, float(elapsed))
+        heavy = [name for name in loaded.split(',') if name]
+    return best, heavy
+
+def check_budgets(budgets=IMPORT_BUDGETS):
+    """Measure every module against its budget; returns True if all of them fit."""
+    ok = True
+    for module, budget in budgets.items():
+        elapsed, heavy = measure_import(module)
+        within = elapsed <= budget and not heavy
+        ok = ok and within
+        note = f" (pulled in {', '.join(heavy)})" if heavy else ""
+        print(f"{'OK  ' if within else 'OVER'} {module:<16} {elapsed * 1000:8.1f}ms / {budget * 1000:.0f}ms{note}")
+    return ok
+
+# Example usage:
+if __name__ == "__main__":
+    sys.exit(0 if check_budgets() else 1)